@@ -1,8 +1,12 @@
+import argparse
 import gymnasium as gym
 import numpy as np
 import matplotlib.pyplot as plt
 import pickle
 from gymnasium.envs.toy_text.frozen_lake import generate_random_map
+from vector_q_learning import SparseQTable, env_model, train_q_learning
+from planning import SOLVERS, episode_limit, map_model, solve
+from policy_evaluation import evaluate_policy, print_evaluation, sample_policy
 
 # ---------------------------------------------------------
 # 輔助函式：計算並顯示成功率
@@ -23,8 +27,15 @@ def print_success_rate(rewards_per_episode):
 # episodes: 總回合數
 # is_training: True 代表訓練模式(會更新Q表)，False 代表測試模式(只讀取Q表)
 # render: 是否要畫出畫面 (測試時通常設為 True)
+# vectorized: 訓練時改用向量化 Q-Learning (讀轉移表，同時跑 batch_size 個 episode，快很多)
+# solver: 'value' / 'policy' 時不做 Q-Learning，直接從地圖的轉移模型算出精確的 Q-table (存檔格式相同)
+# exact: 測試時不逐回合跑 Gymnasium，直接解馬可夫鏈得到精確成功率；episodes > 0 時另外做向量化抽樣交叉驗證
+# map_size: 地圖邊長 (8 以上的大地圖請搭配 vectorized 或 solver，TimeLimit 依 planning.episode_limit 放寬)
+# dtype: Q-table 的型別，float32 / float16 可以省記憶體 (float16 在大地圖上 Q 值太小時會變成 0)
+# sparse_q: vectorized 訓練時只為走過的狀態配置 Q 值 (SparseQTable)，存檔時再轉回一般的 Q-table
 # ---------------------------------------------------------
-def run(episodes, is_training=True, render=False):
+def run(episodes, is_training=True, render=False, vectorized=False, batch_size=1000, solver=None, exact=False,
+        map_size=8, dtype='float64', sparse_q=False):
     
     # 定義檔案名稱：分開儲存「地圖」與「Q-table(大腦)」
     map_filename = 'frozen_lake_map.pkl'
@@ -35,7 +46,7 @@ def run(episodes, is_training=True, render=False):
     # 如果不存檔，訓練完後測試時會生成一張新地圖，導致原本訓練好的 Agent 撞牆。
     if is_training:
         # 訓練時：生成一張 8x8 的隨機地圖 (p=0.8 代表 80% 是冰面，20% 是洞)
-        map_desc = generate_random_map(size=8, p=0.9)
+        map_desc = generate_random_map(size=map_size, p=0.9)
         # 將地圖存檔，供測試時使用
         with open(map_filename, 'wb') as f:
             pickle.dump(map_desc, f)
@@ -48,18 +59,22 @@ def run(episodes, is_training=True, render=False):
             print("Loaded map from training.")
         except FileNotFoundError:
             # 防呆機制：如果找不到地圖檔，只好生成新的 (但這會導致測試結果很差)
-            map_desc = generate_random_map(size=8, p=0.8)
+            map_desc = generate_random_map(size=map_size, p=0.8)
             print("Warning: Map file not found, generated new one.")
 
     # --- 2. 建立環境 ---
     # is_slippery=True: 地板會滑。你選「向右」，實際上可能「向右、向上、或向下」。
     # 這增加了環境的隨機性，需要更保守的學習率。
-    env = gym.make('FrozenLake-v1', desc=map_desc, is_slippery=True, render_mode='human' if render else None)
+    env = gym.make('FrozenLake-v1', desc=map_desc, is_slippery=True, render_mode='human' if render else None,
+                   max_episode_steps=episode_limit(len(map_desc)))
 
     # --- 3. 初始化 Q-table ---
     if(is_training):
         # 訓練時：建立一個全為 0 的表格 (64個狀態 x 4個動作)
-        q = np.zeros((env.observation_space.n, env.action_space.n))
+        if vectorized and sparse_q:
+            q = SparseQTable(env.observation_space.n, env.action_space.n, dtype=dtype)
+        else:
+            q = np.zeros((env.observation_space.n, env.action_space.n), dtype=dtype)
     else:
         # 測試時：讀取已經訓練好的 Q-table
         f = open(q_table_filename, 'rb')
@@ -87,7 +102,32 @@ def run(episodes, is_training=True, render=False):
     rewards_per_episode = np.zeros(episodes)
 
     # --- 5. 訓練/測試 迴圈開始 ---
-    for i in range(episodes):
+    if is_training and solver is not None:
+        # 模型式規劃：地圖已知，用 Value / Policy Iteration 求出收斂的 Q 值
+        q, iterations = solve(map_desc, solver, discount_factor_g)
+        q = q.astype(dtype)
+        print(f"Solved with {solver} iteration in {iterations} iterations.")
+        episodes_to_step = 0
+    elif not is_training and exact:
+        # 精確評估：貪婪策略 (同分隨機) + TimeLimit，與下面的測試迴圈估計的是同一個成功率
+        model = map_model(map_desc, max_steps=env.spec.max_episode_steps)
+        print_evaluation(evaluate_policy(model, q))
+        if episodes > 0:
+            rewards_per_episode, _ = sample_policy(model, q, episodes, rng)
+        episodes_to_step = 0
+    elif is_training and vectorized:
+        # 向量化版本：同樣的學習率、折扣、epsilon 排程與 tie-breaking，但不經過 env.step
+        model = env_model(env)
+        q, rewards_per_episode = train_q_learning(model, episodes, learning_rate_a, discount_factor_g,
+                                                  epsilon_decay_rate, batch_size, rng, q)
+        if isinstance(q, SparseQTable):
+            print(f"Visited {len(q)} / {q.shape[0]} states ({q.nbytes / 1024:.1f} KiB sparse Q-table).")
+            q = q.to_dense()
+        episodes_to_step = 0
+    else:
+        episodes_to_step = episodes
+
+    for i in range(episodes_to_step):
         # 重置環境，回到起點 (state 0)
         state = env.reset()[0]
         terminated = False      # 是否掉進洞或到達終點
@@ -141,25 +181,40 @@ def run(episodes, is_training=True, render=False):
         sum_rewards[t] = np.sum(rewards_per_episode[max(0, t-100):(t+1)])
     
     if is_training:
-        # 繪製學習曲線
-        plt.plot(sum_rewards)
-        plt.savefig('frozen_lake8x8.png')
+        # 繪製學習曲線 (規劃求解沒有跑 episode，沒有曲線可畫)
+        if solver is None:
+            plt.plot(sum_rewards)
+            plt.savefig('frozen_lake8x8.png')
         
         # 儲存 Q-table (大腦)
         with open(q_table_filename, "wb") as f:
             pickle.dump(q, f)
         print(f"Training finished. Map saved to {map_filename}. Q-table saved to {q_table_filename}.")
     
-    if not is_training:
+    if not is_training and episodes > 0:
         print_success_rate(rewards_per_episode)
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Q-learning on a random slippery FrozenLake map")
+    parser.add_argument('--episodes', type=int, default=15000, help='Training episodes')
+    parser.add_argument('--test-episodes', type=int, default=1000, help='Test episodes (with --exact: sampled cross-check episodes, 0 to skip)')
+    parser.add_argument('--vectorized', action='store_true', help='Train many episodes at once from the transition table')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Parallel episodes for --vectorized')
+    parser.add_argument('--solver', choices=sorted(SOLVERS), default=None, help='Compute the Q-table exactly by value or policy iteration instead of Q-learning')
+    parser.add_argument('--map-size', type=int, default=8, help='Map size (use --vectorized or --solver above 8x8)')
+    parser.add_argument('--dtype', default='float64', choices=['float64', 'float32', 'float16'], help='Q-table dtype')
+    parser.add_argument('--sparse-q', action='store_true', help='With --vectorized, only allocate Q-values for visited states')
+    parser.add_argument('--exact', action='store_true', help='Compute the exact success rate from the Markov chain instead of stepping Gymnasium')
+    args = parser.parse_args()
+
     # 1. 訓練階段 (Training)
     # 跑 15000 次，不渲染畫面 (加速)，更新 Q 表
     print("--- Starting Training ---")
-    run(15000, is_training=True, render=False)
+    run(args.episodes, is_training=True, render=False, vectorized=args.vectorized, batch_size=args.batch_size,
+        solver=args.solver, map_size=args.map_size, dtype=args.dtype, sparse_q=args.sparse_q)
     
     # 2. 測試階段 (Testing)
     # 跑 1000 次，不渲染畫面 (計算勝率用)，不更新 Q 表，epsilon=0 (純利用)
+    # --exact：改為精確計算成功率，1000 次改用向量化抽樣當交叉驗證
     print("\n--- Starting Testing ---")
-    run(1000, is_training=False, render=False)
\ No newline at end of file
+    run(args.test_episodes, is_training=False, render=False, exact=args.exact, map_size=args.map_size)
\ No newline at end of file
@@ -0,0 +1,144 @@
+import argparse
+import json
+import time
+
+import matplotlib
+matplotlib.use("Agg")  # 只輸出圖檔，不開視窗
+import matplotlib.pyplot as plt
+import numpy as np
+from gymnasium.envs.toy_text.frozen_lake import generate_random_map
+
+from planning import episode_limit, map_model, value_iteration
+from policy_evaluation import evaluate_policy
+from vector_q_learning import SparseQTable, train_q_learning
+
+# ---------------------------------------------------------
+# 地圖大小擴充測試：地圖越大，表格式 Q-Learning 還撐不撐得住？
+# 每個大小量：
+#   - 訓練速度 (每秒幾步，向量化 Q-Learning)
+#   - 記憶體：轉移模型、float64 / float32 / float16 的完整 Q-table、只存走過狀態的 SparseQTable
+#   - 收斂時間：訓練回合數從 --start-episodes 開始加倍，直到精確成功率達到最佳策略 (Value Iteration) 的
+#     --target 倍，或超過 --max-seconds 就算不收斂
+# 用法：
+#   python frozen_lake_scaling.py --sizes 8 16 32 64 128 256 --max-seconds 60
+# ---------------------------------------------------------
+
+
+def model_nbytes(model):
+    return sum(value.nbytes for value in model.values() if isinstance(value, np.ndarray))
+
+
+def measure_size(size, throughput_episodes=2000, start_episodes=1000, target=0.9, max_seconds=60.0,
+                 dtype=np.float32, p=0.9, seed=0):
+    """ 單一地圖大小的測量結果 (dict) """
+    desc = generate_random_map(size=size, p=p, seed=seed)
+    model = map_model(desc, max_steps=episode_limit(size))
+    n_states = size * size
+
+    # --- 最佳策略 (模型式規劃)：收斂的參考標準 ---
+    start = time.perf_counter()
+    optimal_q, iterations = value_iteration(model)
+    solve_seconds = time.perf_counter() - start
+    optimal = evaluate_policy(model, optimal_q)["success_rate"]
+
+    # --- 訓練速度與走過的狀態數 ---
+    rng = np.random.default_rng(seed)
+    q = SparseQTable(n_states, dtype=dtype)
+    start = time.perf_counter()
+    q, _, lengths = train_q_learning(model, throughput_episodes, rng=rng, q=q, return_lengths=True)
+    seconds = time.perf_counter() - start
+
+    # --- 收斂時間：回合數加倍，每次從頭訓練 ---
+    episodes = start_episodes
+    converged = None
+    history = []
+    while optimal > 0:
+        start = time.perf_counter()
+        learned, _ = train_q_learning(model, episodes, rng=rng, q=SparseQTable(n_states, dtype=dtype))
+        train_seconds = time.perf_counter() - start
+        success = evaluate_policy(model, learned.to_dense())["success_rate"]
+        history.append({"episodes": episodes, "seconds": train_seconds, "success_rate": success})
+        if success >= target * optimal:
+            converged = history[-1]
+            break
+        if sum(entry["seconds"] for entry in history) + 2 * train_seconds > max_seconds:
+            break
+        episodes *= 2
+
+    return {
+        "size": size,
+        "states": n_states,
+        "episode_limit": model["max_steps"],
+        "steps_per_second": int(lengths.sum()) / seconds,
+        "visited_states": len(q),
+        "memory_bytes": {
+            "model": model_nbytes(model),
+            "dense_float64": n_states * 4 * 8,
+            "dense_float32": n_states * 4 * 4,
+            "dense_float16": n_states * 4 * 2,
+            "sparse": q.nbytes,
+        },
+        "value_iteration_seconds": solve_seconds,
+        "value_iteration_iterations": iterations,
+        "optimal_success_rate": optimal,
+        "converged": converged,
+        "history": history,
+    }
+
+
+def plot(results, path):
+    """ 左：訓練速度；右：收斂時間與 Value Iteration 求解時間 (對數) """
+    sizes = [entry["size"] for entry in results]
+    fig, (left, right) = plt.subplots(1, 2, figsize=(11, 4))
+    left.plot(sizes, [entry["steps_per_second"] for entry in results], "o-")
+    left.set_ylabel("Q-learning steps / s")
+    converged = [(entry["size"], entry["converged"]["seconds"]) for entry in results if entry["converged"]]
+    if converged:
+        right.plot(*zip(*converged), "o-", label="Q-learning to target")
+    right.plot(sizes, [entry["value_iteration_seconds"] for entry in results], "x--", label="value iteration")
+    right.set_ylabel("seconds")
+    right.set_yscale("log")
+    right.legend()
+    for axis in (left, right):
+        axis.set_xscale("log", base=2)
+        axis.set_xticks(sizes, [f"{size}x{size}" for size in sizes])
+        axis.set_xlabel("Map size")
+        axis.grid(True, which="both", alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Tabular Q-learning throughput, memory and convergence versus FrozenLake map size")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[8, 16, 32, 64, 128, 256], help='Map sizes')
+    parser.add_argument('--throughput-episodes', type=int, default=2000, help='Episodes used to measure steps/s')
+    parser.add_argument('--start-episodes', type=int, default=1000, help='First episode budget of the convergence search')
+    parser.add_argument('--target', type=float, default=0.9, help='Converged when success >= target * optimal success')
+    parser.add_argument('--max-seconds', type=float, default=60.0, help='Training time cap per map size')
+    parser.add_argument('--dtype', default='float32', choices=['float64', 'float32', 'float16'], help='Q-table dtype')
+    parser.add_argument('--seed', type=int, default=0, help='Map and training seed')
+    parser.add_argument('--output', default="frozen_lake_scaling", help='Output prefix for the .png chart and .json data')
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        entry = measure_size(size, args.throughput_episodes, args.start_episodes, args.target, args.max_seconds,
+                             np.dtype(args.dtype), seed=args.seed)
+        results.append(entry)
+        memory = entry["memory_bytes"]
+        if entry["converged"]:
+            convergence = f"{entry['converged']['episodes']} episodes / {entry['converged']['seconds']:.1f}s"
+        else:
+            convergence = "not converged"
+        print(f"{size:>3}x{size:<3} {entry['steps_per_second'] / 1e6:6.2f} M steps/s  "
+              f"visited {entry['visited_states']}/{entry['states']}  "
+              f"Q {memory['dense_float64'] / 1024:8.1f} KiB (f64) {memory['sparse'] / 1024:8.1f} KiB (sparse)  "
+              f"model {memory['model'] / 2 ** 20:6.1f} MiB  "
+              f"optimal {entry['optimal_success_rate']:.1%} (VI {entry['value_iteration_seconds']:.2f}s)  "
+              f"Q-learning: {convergence}")
+
+    plot(results, f"{args.output}.png")
+    with open(f"{args.output}.json", "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=1)
+    print(f"Chart saved to {args.output}.png")
@@ -0,0 +1,151 @@
+import argparse
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from gymnasium.envs.toy_text.frozen_lake import generate_random_map
+
+from planning import SOLVERS, episode_limit, map_model
+from policy_evaluation import evaluate_policy
+from vector_q_learning import train_q_learning
+
+# ---------------------------------------------------------
+# 多地圖批次訓練：一次產生 (或讀入) 上百張隨機地圖，用多個行程平行訓練 / 求解，
+# 所有地圖與 Q-table 存進同一個 .npz (以地圖編號為索引)，最後報告成功率的分布，
+# 而不是只看單一張地圖的結果 (單張地圖可能 0% 也可能 99%)
+# 用法：
+#   python map_pool.py --maps 200 --method q-learning --episodes 15000 --workers 8
+#   python map_pool.py --load frozen_lake_pool.npz --method value       # 同一批地圖改用 Value Iteration
+#   python map_pool.py --load frozen_lake_pool.npz --export 17          # 取出第 17 張，給 frozen_lake.py 測試
+# ---------------------------------------------------------
+
+METHODS = ["q-learning"] + sorted(SOLVERS)
+
+
+def make_maps(count, size=8, p=0.9, seed=0):
+    """ 產生 count 張隨機地圖，第 i 張用 seed + i，結果可重現 """
+    return [generate_random_map(size=size, p=p, seed=seed + i) for i in range(count)]
+
+
+def _train_map(job):
+    """ 子行程執行的單張地圖訓練 / 求解 (模組層級函式才能被 pickle)，回傳 (index, q, 精確評估結果) """
+    index, map_desc, method, episodes, seed, dtype = job
+    model = map_model(map_desc, max_steps=episode_limit(len(map_desc)))
+    if method == "q-learning":
+        q, _ = train_q_learning(model, episodes, rng=np.random.default_rng([seed, index]))
+    else:
+        q, _ = SOLVERS[method](model)
+    q = q.astype(dtype)  # 評估存進 store 的那一份 (型別較小時，同分的動作可能變多)
+    return index, q, evaluate_policy(model, q)
+
+
+def run_pool(maps, method="q-learning", episodes=15000, n_workers=None, seed=0, dtype='float64'):
+    """
+    平行處理所有地圖，回傳 dict：
+      q_tables (地圖數, 狀態數, 4，型別 dtype，float32 / float16 可以讓 store 小一半以上)、success_rate / mean_length (每張地圖的精確值，TimeLimit 依 planning.episode_limit 隨地圖大小放寬)、
+      seconds、maps_per_second
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    jobs = [(index, map_desc, method, episodes, seed, dtype) for index, map_desc in enumerate(maps)]
+    n_states = len(maps[0]) * len(maps[0][0])
+    q_tables = np.zeros((len(maps), n_states, 4), dtype=dtype)
+    success_rate = np.zeros(len(maps))
+    mean_length = np.zeros(len(maps))
+
+    def collect(outcomes):
+        for index, q, result in outcomes:
+            q_tables[index] = q
+            success_rate[index] = result["success_rate"]
+            mean_length[index] = result["mean_length"]
+
+    start = time.perf_counter()
+    if n_workers <= 1:
+        collect(map(_train_map, jobs))
+    else:
+        # with 區塊：子行程出錯時也會關閉行程池
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            collect(pool.map(_train_map, jobs, chunksize=max(1, len(jobs) // (n_workers * 8))))
+    seconds = time.perf_counter() - start
+
+    return {
+        "q_tables": q_tables,
+        "success_rate": success_rate,
+        "mean_length": mean_length,
+        "seconds": seconds,
+        "maps_per_second": len(maps) / seconds if seconds > 0 else float("inf"),
+    }
+
+
+def save_store(path, maps, report, method, episodes, seed):
+    """ 地圖 (地圖數, 邊長, 邊長) 的字元陣列、Q-table 與評估結果存成同一個 .npz，第 i 筆就是第 i 張地圖 """
+    np.savez(path,
+             maps=np.array([np.asarray(map_desc, dtype="c") for map_desc in maps]),
+             q_tables=report["q_tables"],
+             success_rate=report["success_rate"],
+             mean_length=report["mean_length"],
+             method=np.array(method),
+             episodes=np.array(episodes),
+             seed=np.array(seed))
+
+
+def load_maps(path):
+    """ 從 .npz 讀回地圖 (generate_random_map 的字串列表格式) """
+    with np.load(path) as store:
+        return [[row.tobytes().decode() for row in grid] for grid in store["maps"]]
+
+
+def load_entry(path, index):
+    """ 讀出第 index 張地圖與它的 Q-table """
+    with np.load(path) as store:
+        map_desc = [row.tobytes().decode() for row in store["maps"][index]]
+        return map_desc, store["q_tables"][index]
+
+
+def export_entry(path, index, map_filename='frozen_lake_map.pkl', q_table_filename='frozen_lake8x8.pkl'):
+    """ 把第 index 張地圖寫回 frozen_lake.py 使用的兩個 pickle，方便用原本的測試流程 (或畫面) 檢查 """
+    map_desc, q = load_entry(path, index)
+    with open(map_filename, 'wb') as f:
+        pickle.dump(map_desc, f)
+    with open(q_table_filename, 'wb') as f:
+        pickle.dump(q, f)
+
+
+def print_distribution(success_rate):
+    """ 成功率的分布：平均、分位數，以及每 10% 一格的直方圖 """
+    percentiles = np.percentile(success_rate, [0, 10, 25, 50, 75, 90, 100])
+    print(f"Maps: {len(success_rate)}, mean success rate {success_rate.mean():.2%} (std {success_rate.std():.2%})")
+    print("Percentiles  " + "  ".join(f"p{q}: {value:.1%}" for q, value in zip((0, 10, 25, 50, 75, 90, 100), percentiles)))
+    counts, edges = np.histogram(success_rate, bins=10, range=(0, 1))
+    for count, low in zip(counts, edges[:-1]):
+        print(f"  {low:4.0%} - {low + 0.1:4.0%} | {'#' * int(round(50 * count / len(success_rate))):<50} {count}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train or solve many random FrozenLake maps in parallel")
+    parser.add_argument('--maps', type=int, default=200, help='Number of random maps to generate')
+    parser.add_argument('--size', type=int, default=8, help='Map size')
+    parser.add_argument('--p', type=float, default=0.9, help='Probability that a tile is frozen')
+    parser.add_argument('--load', default=None, help='Reuse the maps stored in this .npz instead of generating new ones')
+    parser.add_argument('--method', default="q-learning", choices=METHODS, help='Vectorized Q-learning or exact planning')
+    parser.add_argument('--episodes', type=int, default=15000, help='Q-learning episodes per map')
+    parser.add_argument('--dtype', default='float64', choices=['float64', 'float32', 'float16'], help='Stored Q-table dtype')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for maps and training')
+    parser.add_argument('--output', default='frozen_lake_pool.npz', help='Store for all maps and Q-tables')
+    parser.add_argument('--export', type=int, default=None, help='Write map INDEX of --load to the frozen_lake.py pickles and exit')
+    args = parser.parse_args()
+
+    if args.export is not None:
+        if args.load is None:
+            parser.error("--export requires --load")
+        export_entry(args.load, args.export)
+        print(f"Map {args.export} exported to frozen_lake_map.pkl / frozen_lake8x8.pkl.")
+    else:
+        maps = load_maps(args.load) if args.load else make_maps(args.maps, args.size, args.p, args.seed)
+        report = run_pool(maps, args.method, args.episodes, args.workers, args.seed, args.dtype)
+        save_store(args.output, maps, report, args.method, args.episodes, args.seed)
+        print(f"{len(maps)} maps ({args.method}) in {report['seconds']:.1f}s ({report['maps_per_second']:.1f} maps/s), "
+              f"saved to {args.output}")
+        print_distribution(report["success_rate"])
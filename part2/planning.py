@@ -0,0 +1,160 @@
+import argparse
+import time
+import numpy as np
+
+# ---------------------------------------------------------
+# 模型式規劃 (Model-based planning)：地圖已知時，Q-table 可以直接從滑冰的轉移模型算出來，不必靠 Q-Learning 慢慢試
+# 轉移表直接由地圖 desc 建立 (不經過 gym.make / env.unwrapped.P)，每個 (s, a) 最多 3 個結果，
+# 存成 (狀態數, 4, 3) 的稀疏陣列，格式與 vector_q_learning.transition_arrays (讀 env.unwrapped.P) 相同，兩邊可以共用；
+# 大地圖逐格轉換 P 太慢，向量化訓練也改用這裡的模型 (vector_q_learning.env_model)
+# 用法：
+#   python planning.py --size 64 --method value
+# ---------------------------------------------------------
+
+# 動作編號與 FrozenLake 相同：0 左、1 下、2 右、3 上 (列、行的位移)
+MOVES = np.array([[0, -1], [1, 0], [0, 1], [-1, 0]])
+
+
+def episode_limit(size):
+    """ TimeLimit 步數：8x8 以下維持 FrozenLake-v1 的 100 步，更大的地圖依邊長等比例放寬，否則根本走不到終點 """
+    return 100 * max(1, size // 8)
+
+
+def map_model(desc, is_slippery=True, max_steps=100):
+    """
+    由地圖 desc (generate_random_map 的字串列表，或 env.unwrapped.desc) 建立轉移模型，規則與 FrozenLake-v1 相同：
+      - 會滑時，選動作 a 實際會走 a-1、a、a+1 三個方向之一 (各 1/3)，撞牆就留在原地
+      - 走到 'G' 獎勵 1 並結束，走到 'H' 結束；已經在 'G' / 'H' 上時停在原地 (獎勵 0)
+    回傳 dict：probs, next_states, rewards, dones (形狀都是 (狀態數, 4, K))、initial、max_steps
+    """
+    desc = np.asarray(desc, dtype="c")
+    n_rows, n_cols = desc.shape
+    n_states = n_rows * n_cols
+    rows, cols = np.divmod(np.arange(n_states), n_cols)
+
+    # 每個 (s, a) 實際可能走的方向：會滑時 (a-1, a, a+1)，不會滑時只有 a
+    offsets = np.array([-1, 0, 1]) if is_slippery else np.array([0])
+    directions = (np.arange(4)[:, None] + offsets[None, :]) % 4              # (4, K)
+    new_rows = np.clip(rows[:, None, None] + MOVES[directions, 0], 0, n_rows - 1)
+    new_cols = np.clip(cols[:, None, None] + MOVES[directions, 1], 0, n_cols - 1)
+    next_states = (new_rows * n_cols + new_cols).astype(np.int32)          # (S, 4, K)，大地圖時省一半記憶體
+
+    letters = desc.ravel()
+    terminal = np.isin(letters, [b"G", b"H"])
+    rewards = (letters[next_states] == b"G").astype(float)
+    dones = terminal[next_states]
+    probs = np.full(next_states.shape, 1.0 / len(offsets))
+
+    # 終點 / 洞：停在原地，機率 1、獎勵 0 (只放在第一個位置，其餘機率 0)
+    next_states[terminal] = np.flatnonzero(terminal)[:, None, None]
+    rewards[terminal] = 0.0
+    dones[terminal] = True
+    probs[terminal] = 0.0
+    probs[terminal, :, 0] = 1.0
+
+    initial = (letters == b"S").astype(float)
+    return {
+        "probs": probs,
+        "next_states": next_states,
+        "rewards": rewards,
+        "dones": dones,
+        "initial": initial / initial.sum(),
+        "max_steps": max_steps,
+    }
+
+
+def backup_terms(model, discount_factor_g=0.99):
+    """
+    Bellman 更新中與 V 無關的部分先算好：
+      Q(s, a) = expected_rewards[s, a] + Σ_k weights[s, a, k] * V(next_states[s, a, k])
+    expected_rewards = Σ 機率 * 獎勵，weights = 機率 * gamma (結束的轉移為 0，不再加上 V(s'))
+    """
+    expected_rewards = np.sum(model["probs"] * model["rewards"], axis=2)
+    weights = np.where(model["dones"], 0.0, model["probs"] * discount_factor_g)
+    return expected_rewards, weights
+
+
+def q_from_values(model, values, discount_factor_g=0.99, terms=None):
+    """ Q(s, a) = Σ 機率 * (獎勵 + gamma * V(s'))，結束的轉移不再加上 V(s') """
+    expected_rewards, weights = terms if terms is not None else backup_terms(model, discount_factor_g)
+    return expected_rewards + np.sum(weights * values[model["next_states"]], axis=2)
+
+
+def value_iteration(model, discount_factor_g=0.99, tol=1e-10, max_iterations=1000000):
+    """
+    Value Iteration：V(s) <- max_a Q(s, a)，直到一次迭代中 V 的最大變化 < tol。
+    回傳 (q, 迭代次數)，q 的格式與 Q-Learning 存的 Q-table 相同 (狀態數 x 4)。
+    """
+    terms = backup_terms(model, discount_factor_g)
+    values = np.zeros(model["probs"].shape[0])
+    for iteration in range(1, max_iterations + 1):
+        new_values = q_from_values(model, values, terms=terms).max(axis=1)
+        delta = np.max(np.abs(new_values - values))
+        values = new_values
+        if delta < tol:
+            break
+    return q_from_values(model, values, terms=terms), iteration
+
+
+def policy_iteration(model, discount_factor_g=0.99, tol=1e-10, max_iterations=10000):
+    """
+    Policy Iteration：固定策略做策略評估 (迭代到 V 的變化 < tol，延續上一輪的 V，不用解線性方程組)，
+    再對 Q 取最大值改進策略，策略不再改變就結束。同分時保留原本的動作，避免在等值的動作間來回切換。
+    回傳 (q, 策略改進次數)。
+    """
+    expected_rewards, weights = terms = backup_terms(model, discount_factor_g)
+    n_states = model["probs"].shape[0]
+    states = np.arange(n_states)
+    policy = np.zeros(n_states, dtype=np.int64)
+    values = np.zeros(n_states)
+    for iteration in range(1, max_iterations + 1):
+        # --- 策略評估 ---
+        policy_rewards = expected_rewards[states, policy]
+        policy_weights = weights[states, policy]
+        next_states = model["next_states"][states, policy]
+        while True:
+            new_values = policy_rewards + np.sum(policy_weights * values[next_states], axis=1)
+            delta = np.max(np.abs(new_values - values))
+            values = new_values
+            if delta < tol:
+                break
+
+        # --- 策略改進 ---
+        q = q_from_values(model, values, terms=terms)
+        best = q.max(axis=1)
+        keep = q[states, policy] >= best - tol
+        new_policy = np.where(keep, policy, np.argmax(q, axis=1))
+        if np.array_equal(new_policy, policy):
+            break
+        policy = new_policy
+    return q, iteration
+
+
+SOLVERS = {
+    "value": value_iteration,
+    "policy": policy_iteration,
+}
+
+
+def solve(desc, method="value", discount_factor_g=0.99, is_slippery=True):
+    """ 由地圖直接算出 Q-table (格式同 frozen_lake8x8.pkl)，回傳 (q, 迭代次數) """
+    return SOLVERS[method](map_model(desc, is_slippery), discount_factor_g)
+
+
+if __name__ == '__main__':
+    from gymnasium.envs.toy_text.frozen_lake import generate_random_map
+
+    parser = argparse.ArgumentParser(description="Solve random FrozenLake maps exactly with value or policy iteration")
+    parser.add_argument('--size', type=int, nargs='+', default=[8, 16, 32, 64], help='Map sizes')
+    parser.add_argument('--method', default="value", choices=sorted(SOLVERS), help='Planning algorithm')
+    parser.add_argument('--p', type=float, default=0.9, help='Probability that a tile is frozen')
+    parser.add_argument('--seed', type=int, default=0, help='Map seed')
+    args = parser.parse_args()
+
+    for size in args.size:
+        desc = generate_random_map(size=size, p=args.p, seed=args.seed)
+        start = time.perf_counter()
+        model = map_model(desc)
+        q, iterations = SOLVERS[args.method](model)
+        seconds = time.perf_counter() - start
+        print(f"{size}x{size}: {iterations} iterations, {seconds:.2f}s, V(start) = {q[np.argmax(model['initial'])].max():.4f}")
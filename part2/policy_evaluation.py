@@ -0,0 +1,186 @@
+import argparse
+import pickle
+import numpy as np
+
+try:
+    from scipy import sparse
+    from scipy.sparse.linalg import spsolve
+except ImportError:  # 沒有 scipy 時改用迭代法求解
+    sparse = None
+
+from planning import episode_limit, map_model
+from vector_q_learning import greedy_actions, sample_transitions
+
+# ---------------------------------------------------------
+# 精確評估：Q-table 的貪婪策略 (同分隨機) 在已知地圖上形成一條吸收馬可夫鏈 (終點、洞是吸收狀態)，
+# 直接解這條鏈就能得到「到達終點的機率」與「平均回合長度」，不必跑 1000 個 episode 去估計 (而且沒有抽樣誤差)
+# 用法：
+#   python policy_evaluation.py                      # 讀 frozen_lake_map.pkl 與 frozen_lake8x8.pkl
+#   python policy_evaluation.py --sample 100000      # 另外用向量化抽樣交叉驗證
+# ---------------------------------------------------------
+
+
+def greedy_policy(q):
+    """ 每個狀態各動作的機率：Q 最大的動作平分機率 (與 run 測試時的隨機 tie-breaking 相同) """
+    best = q == q.max(axis=1, keepdims=True)
+    return best / best.sum(axis=1, keepdims=True)
+
+
+def policy_chain(model, q):
+    """
+    貪婪策略下的馬可夫鏈，以 COO 形式 (rows, cols, data) 表示「沒有結束的轉移」(暫態 -> 暫態)，
+    另外回傳每個狀態下一步進入終點的機率 goal[s] 與進入洞的機率 hole[s]。
+    """
+    n_states = model["probs"].shape[0]
+    weights = greedy_policy(q)[:, :, None] * model["probs"]                 # (S, A, K)
+    dones = model["dones"]
+    reached_goal = dones & (model["rewards"] > 0)
+
+    goal = np.sum(np.where(reached_goal, weights, 0.0), axis=(1, 2))
+    hole = np.sum(np.where(dones & ~reached_goal, weights, 0.0), axis=(1, 2))
+
+    moving = ~dones & (weights > 0)
+    rows = np.broadcast_to(np.arange(n_states)[:, None, None], weights.shape)[moving]
+    return (rows, model["next_states"][moving], weights[moving]), goal, hole
+
+
+def _multiply(chain, x, n_states):
+    """ (T @ x)[s] = Σ T[s, s'] x[s'] """
+    rows, cols, data = chain
+    return np.bincount(rows, weights=data * x[cols], minlength=n_states)
+
+
+def solve_absorbing(chain, b, states, n_states, tol=1e-12, max_iterations=1000000):
+    """
+    解 x = b + T x (只在 states 這些狀態上，其餘狀態的 x 視為 0)。
+    有 scipy 時用稀疏矩陣直接解 (I - T) x = b，否則用迭代法 x <- b + T x 直到收斂。
+    """
+    x = np.zeros(n_states)
+    if not states.any():
+        return x
+    rows, cols, data = chain
+    keep = states[rows] & states[cols]
+    if sparse is not None:
+        index = np.cumsum(states) - 1
+        size = int(states.sum())
+        matrix = sparse.identity(size, format="csr") - sparse.csr_matrix(
+            (data[keep], (index[rows[keep]], index[cols[keep]])), shape=(size, size))
+        x[states] = np.atleast_1d(spsolve(matrix.tocsc(), b[states]))
+        return x
+
+    restricted = (rows[keep], cols[keep], data[keep])
+    b = np.where(states, b, 0.0)
+    for _ in range(max_iterations):
+        new_x = b + _multiply(restricted, x, n_states)
+        if np.max(np.abs(new_x - x)) < tol:
+            return new_x
+        x = new_x
+    return x
+
+
+def _can_reach(chain, targets, n_states):
+    """ 沿著轉移反向擴散：哪些狀態有機會 (機率 > 0) 走到 targets """
+    rows, cols, _ = chain
+    reach = targets.copy()
+    while True:
+        new_reach = reach.copy()
+        new_reach[rows[reach[cols]]] = True
+        if np.array_equal(new_reach, reach):
+            return reach
+        reach = new_reach
+
+
+def evaluate_policy(model, q):
+    """
+    回傳 dict：
+      success_rate / mean_length: 有 TimeLimit (max_steps 步截斷) 時的精確成功率與平均回合長度，
+                                  這才是 run(is_training=False) 抽樣估計的數值 (用起點分布往前推 max_steps 步)
+      success_rate_unlimited / mean_length_unlimited: 不截斷時的吸收機率與期望長度 (解稀疏線性方程組)，
+                                  有機率永遠不會結束 (卡在某個迴圈) 時長度為 inf
+    """
+    n_states = model["probs"].shape[0]
+    chain, goal, hole = policy_chain(model, q)
+    initial = model["initial"]
+
+    # --- 有限步數 (TimeLimit)：分布 d_t 往前推，每一步累計進入終點的機率與還活著的機率 ---
+    max_steps = model["max_steps"]
+    success = length = 0.0
+    if max_steps:
+        rows, cols, data = chain
+        distribution = initial.copy()
+        for _ in range(max_steps):
+            alive = distribution.sum()
+            if alive < 1e-15:
+                break
+            length += alive
+            success += distribution @ goal
+            distribution = np.bincount(cols, weights=data * distribution[rows], minlength=n_states)
+
+    # --- 不截斷：吸收機率 x = goal + T x，期望長度 L = 1 + T L ---
+    ends = (goal + hole) > 0
+    transient = _can_reach(chain, ends, n_states)
+    success_unlimited = solve_absorbing(chain, goal, transient, n_states)
+    absorbed = solve_absorbing(chain, goal + hole, transient, n_states)
+    certain = transient & (absorbed > 1 - 1e-9)      # 一定會結束的狀態，期望長度才有限
+    lengths = solve_absorbing(chain, np.ones(n_states), certain, n_states)
+    lengths[~certain] = np.inf
+    start = initial > 0
+
+    return {
+        "success_rate": float(success) if max_steps else float(initial @ success_unlimited),
+        "mean_length": float(length) if max_steps else float(initial[start] @ lengths[start]),
+        "success_rate_unlimited": float(initial @ success_unlimited),
+        "mean_length_unlimited": float(initial[start] @ lengths[start]),
+        "max_steps": max_steps,
+    }
+
+
+def sample_policy(model, q, episodes, rng=None):
+    """
+    向量化抽樣 (交叉驗證用)：所有 episode 同時走，動作取 Q 最大 (同分隨機)，超過 max_steps 截斷。
+    回傳 (rewards_per_episode, lengths)。
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    n_states = model["probs"].shape[0]
+    states = rng.choice(n_states, size=episodes, p=model["initial"])
+    rewards_per_episode = np.zeros(episodes)
+    lengths = np.zeros(episodes, dtype=np.int64)
+    active = np.arange(episodes)
+    max_steps = model["max_steps"] or np.iinfo(np.int64).max
+    step = 0
+    while len(active) and step < max_steps:
+        s = states[active]
+        new_states, rewards, terminated = sample_transitions(model, s, greedy_actions(q[s], rng), rng)
+        states[active] = new_states
+        lengths[active] += 1
+        rewards_per_episode[active[terminated]] = rewards[terminated]
+        active = active[~terminated]
+        step += 1
+    return rewards_per_episode, lengths
+
+
+def print_evaluation(result):
+    print(f"✅ Exact Success Rate: {result['success_rate']:.2%} "
+          f"(mean episode length {result['mean_length']:.1f} steps, limit {result['max_steps']})")
+    print(f"   Without the step limit: {result['success_rate_unlimited']:.2%}, "
+          f"mean episode length {result['mean_length_unlimited']:.1f} steps")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Exact success rate of the greedy policy from a saved Q-table")
+    parser.add_argument('--map', default='frozen_lake_map.pkl', help='Pickled map description')
+    parser.add_argument('--q-table', default='frozen_lake8x8.pkl', help='Pickled Q-table')
+    parser.add_argument('--sample', type=int, default=0, help='Also sample this many episodes as a cross-check')
+    args = parser.parse_args()
+
+    with open(args.map, 'rb') as f:
+        map_desc = pickle.load(f)
+    with open(args.q_table, 'rb') as f:
+        q = pickle.load(f)
+
+    model = map_model(map_desc, max_steps=episode_limit(len(map_desc)))
+    print_evaluation(evaluate_policy(model, q))
+    if args.sample:
+        rewards_per_episode, lengths = sample_policy(model, q, args.sample)
+        print(f"   Sampled: {rewards_per_episode.mean():.2%} over {args.sample} episodes, "
+              f"mean length {lengths.mean():.1f} steps")
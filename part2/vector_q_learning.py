@@ -0,0 +1,202 @@
+import numpy as np
+
+from planning import map_model
+
+# ---------------------------------------------------------
+# 向量化 Q-Learning：直接讀 env.unwrapped.P 的轉移表 (大地圖改由地圖建立，見 env_model)，同時推進上千個獨立的 episode
+# 不再逐步呼叫 env.step 與 Gymnasium wrapper，每一步所有 episode 的動作選擇、轉移、Q 更新都是一次 NumPy 運算
+# ---------------------------------------------------------
+
+def transition_arrays(env):
+    """
+    把 env.unwrapped.P (dict: P[s][a] = [(機率, 下一個狀態, 獎勵, 是否結束), ...]) 轉成 NumPy 陣列。
+    每個 (s, a) 的轉移數補齊到相同的 K 個 (不足的機率填 0)：
+      probs[s, a, k], next_states[s, a, k], rewards[s, a, k], dones[s, a, k]
+    另外回傳起點分布 (initial) 與 TimeLimit 的最大步數 (max_steps，沒有時為 None)。
+    """
+    P = env.unwrapped.P
+    n_states = len(P)
+    n_actions = len(P[0])
+    k = max(len(P[s][a]) for s in range(n_states) for a in range(n_actions))
+
+    probs = np.zeros((n_states, n_actions, k))
+    next_states = np.zeros((n_states, n_actions, k), dtype=np.int64)
+    rewards = np.zeros((n_states, n_actions, k))
+    dones = np.zeros((n_states, n_actions, k), dtype=bool)
+    for s in range(n_states):
+        for a in range(n_actions):
+            for i, (p, s2, r, done) in enumerate(P[s][a]):
+                probs[s, a, i] = p
+                next_states[s, a, i] = s2
+                rewards[s, a, i] = r
+                dones[s, a, i] = done
+            next_states[s, a, len(P[s][a]):] = s  # 補齊的項目機率為 0，指回自己即可
+
+    max_steps = env.spec.max_episode_steps if env.spec is not None else None
+    return {
+        "probs": probs,
+        "next_states": next_states,
+        "rewards": rewards,
+        "dones": dones,
+        "initial": np.asarray(env.unwrapped.initial_state_distrib, dtype=float),
+        "max_steps": max_steps,
+    }
+
+
+def env_model(env, max_states=64 * 64):
+    """
+    向量化訓練用的轉移模型：一般大小的地圖直接讀 env.unwrapped.P (transition_arrays)；
+    狀態數超過 max_states 時逐格轉換 P 的 dict 太慢，改由地圖 (env.unwrapped.desc) 以 planning.map_model 建立，
+    兩者的轉移規則與陣列格式相同 (只差補齊項目的內容，機率都是 0)。
+    """
+    unwrapped = env.unwrapped
+    if len(unwrapped.P) <= max_states:
+        return transition_arrays(env)
+    # FrozenLakeEnv 沒有保存 is_slippery：會滑時起點的每個動作都有 3 種結果
+    start = int(np.argmax(unwrapped.initial_state_distrib))
+    max_steps = env.spec.max_episode_steps if env.spec is not None else None
+    return map_model(unwrapped.desc, is_slippery=len(unwrapped.P[start][0]) > 1, max_steps=max_steps)
+
+
+class SparseQTable:
+    """
+    只為走過的狀態配置 Q 值的表格 (大地圖上大部分狀態可能永遠不會被走到)：
+      index[s] = 狀態 s 在 values 中的列號，0 代表還沒走過 (values 第 0 列固定全為 0，讀取時不用另外判斷)
+      values   = (已配置列數, 動作數) 的緊湊型別陣列 (預設 float32)，不夠時容量加倍
+    支援 q[states]、q[states, actions] 讀取與 q[states, actions] = ... 寫入，和 NumPy 的 Q-table 用法相同。
+    """
+
+    def __init__(self, n_states, n_actions=4, dtype=np.float32, capacity=64):
+        self.shape = (n_states, n_actions)
+        self.dtype = np.dtype(dtype)
+        self.index = np.zeros(n_states, dtype=np.int32)
+        self.values = np.zeros((min(capacity, n_states) + 1, n_actions), dtype=self.dtype)
+        self.size = 1
+
+    def __len__(self):
+        """ 走過 (已配置) 的狀態數 """
+        return self.size - 1
+
+    @property
+    def nbytes(self):
+        """ 實際佔用的記憶體 (索引 + 已配置的 Q 值) """
+        return self.index.nbytes + self.values.nbytes
+
+    def _allocate(self, states):
+        """ 為還沒走過的狀態配置新的列 """
+        new = np.unique(states[self.index[states] == 0])
+        if len(new) == 0:
+            return
+        if self.size + len(new) > len(self.values):
+            capacity = max(2 * len(self.values), self.size + len(new))
+            values = np.zeros((min(capacity, self.shape[0] + 1), self.shape[1]), dtype=self.dtype)
+            values[:self.size] = self.values[:self.size]
+            self.values = values
+        self.index[new] = np.arange(self.size, self.size + len(new))
+        self.size += len(new)
+
+    def __getitem__(self, key):
+        states, actions = key if isinstance(key, tuple) else (key, slice(None))
+        return self.values[self.index[states], actions]
+
+    def __setitem__(self, key, value):
+        states, actions = key
+        self._allocate(np.asarray(states))
+        self.values[self.index[states], actions] = value
+
+    def to_dense(self):
+        """ 轉回一般的 (狀態數, 動作數) Q-table，存檔與評估時使用 """
+        return self.values[self.index]
+
+
+def greedy_actions(q_rows, rng):
+    """ 每一列取 Q 值最大的動作，同分時隨機選一個 (與 run 中的 tie-breaking 相同) """
+    best = q_rows.max(axis=1, keepdims=True)
+    noise = rng.random(q_rows.shape)
+    return np.argmax(np.where(q_rows == best, noise, -1.0), axis=1)
+
+
+def sample_transitions(model, states, actions, rng):
+    """ 依轉移機率抽樣 (與 categorical_sample 相同：第一個累積機率 > u 的項目) """
+    cumulative = np.cumsum(model["probs"][states, actions], axis=1)
+    u = rng.random(len(states))[:, None]
+    k = np.minimum(np.sum(cumulative <= u, axis=1), cumulative.shape[1] - 1)
+    return (model["next_states"][states, actions, k],
+            model["rewards"][states, actions, k],
+            model["dones"][states, actions, k])
+
+
+def train_q_learning(model, episodes, learning_rate_a=0.1, discount_factor_g=0.99, epsilon_decay_rate=None,
+                     batch_size=1000, rng=None, q=None, return_lengths=False):
+    """
+    與 run(is_training=True) 相同的 Q-Learning 設定，但同時跑 batch_size 個 episode：
+      - 第 i 個 episode 的 epsilon = max(1 - i * epsilon_decay_rate, 0) (與逐回合遞減相同的排程)
+      - 探索時隨機動作，否則取 Q 最大的動作 (同分隨機)
+      - 每一步所有 episode 的 Q 更新一起算 (以同一份舊 Q 計算目標值)。同一步內有 c 個 episode 更新同一個 (s, a) 時，
+        取目標值的平均，並用 1 - (1 - 學習率)^c 當步長 (等同連續做 c 次相同目標的更新)，
+        直接把 c 個更新相加會讓步長變成 c 倍而發散
+      - 超過 TimeLimit 步數的 episode 截斷 (truncated)，與 gym.make 加上的 TimeLimit 一致
+    一個 episode 結束後，該位置立刻接著跑下一個還沒開始的 episode。
+    q 可以是 NumPy 陣列 (任何浮點型別，例如 float32 / float16 省記憶體) 或 SparseQTable (只存走過的狀態)。
+    回傳 (q, rewards_per_episode)，rewards_per_episode[i] = 第 i 個 episode 是否到達終點 (1 / 0)；
+    return_lengths=True 時另外回傳每個 episode 走的步數。
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    n_states, n_actions = model["probs"].shape[:2]
+    if q is None:
+        q = np.zeros((n_states, n_actions))
+    if epsilon_decay_rate is None:
+        epsilon_decay_rate = 1 / (episodes * 0.8)
+    max_steps = model["max_steps"] or np.iinfo(np.int64).max
+    starts = np.flatnonzero(model["initial"])          # 起點分布只在少數狀態上，抽樣時不必掃過整張地圖
+    start_probs = model["initial"][starts]
+
+    slots = min(batch_size, episodes)
+    episode_ids = np.arange(slots)       # 每個位置目前在跑第幾個 episode
+    states = rng.choice(starts, size=slots, p=start_probs)
+    steps = np.zeros(slots, dtype=np.int64)
+    active = np.ones(slots, dtype=bool)
+    next_episode = slots
+    rewards_per_episode = np.zeros(episodes)
+    episode_lengths = np.zeros(episodes, dtype=np.int64)
+
+    while active.any():
+        idx = np.flatnonzero(active)
+        s = states[idx]
+        epsilon = np.maximum(1 - episode_ids[idx] * epsilon_decay_rate, 0)
+
+        # --- 動作選擇 (Epsilon-Greedy，同分隨機) ---
+        explore = rng.random(len(idx)) < epsilon
+        actions = greedy_actions(q[s], rng)
+        actions[explore] = rng.integers(0, n_actions, size=int(explore.sum()))
+
+        new_states, rewards, terminated = sample_transitions(model, s, actions, rng)
+
+        # --- Q-Learning 更新 (批次) ---
+        targets = rewards + discount_factor_g * q[new_states].max(axis=1)
+        updated, inverse, counts = np.unique(s * n_actions + actions, return_inverse=True, return_counts=True)
+        target_sums = np.bincount(inverse, weights=targets)
+        updated_states, updated_actions = np.divmod(updated, n_actions)
+        old = q[updated_states, updated_actions]
+        step = 1 - (1 - learning_rate_a) ** counts
+        q[updated_states, updated_actions] = old + step * (target_sums / counts - old)
+
+        states[idx] = new_states
+        steps[idx] += 1
+        finished = terminated | (steps[idx] >= max_steps)
+
+        # --- 結束的 episode：記錄結果，換下一個 episode ---
+        done_idx = idx[finished]
+        rewards_per_episode[episode_ids[done_idx]] = rewards[finished] == 1
+        episode_lengths[episode_ids[done_idx]] = steps[done_idx]
+        n_new = min(len(done_idx), episodes - next_episode)
+        restart = done_idx[:n_new]
+        episode_ids[restart] = np.arange(next_episode, next_episode + n_new)
+        states[restart] = rng.choice(starts, size=n_new, p=start_probs)
+        steps[restart] = 0
+        next_episode += n_new
+        active[done_idx[n_new:]] = False
+
+    if return_lengths:
+        return q, rewards_per_episode, episode_lengths
+    return q, rewards_per_episode
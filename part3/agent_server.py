@@ -0,0 +1,354 @@
+# agent_server.py - 以 asyncio 把 Agent 放在獨立行程提供服務 (JSON lines 協定)，Arena 可同時進行多場對戰
+#
+# 用法 (先 cd 到 part3 資料夾)：
+#   python agent_server.py serve --agents smart alphabeta --copies 2 --port 8765 --time-budget 0.2
+#   python agent_server.py play --port 8765 --black alphabeta --white smart --matches 8 --concurrency 8
+#
+# 協定：每個請求 / 回應都是一行 JSON (UTF-8，以 "\n" 結尾)，同一條連線可以同時送出多個請求，回應以 id 對應 (順序不保證)
+#   {"id": 1, "op": "info"}
+#     -> {"id": 1, "agents": {"smart": {"candidate_radius": 2}, ...}}
+#   {"id": 2, "op": "choose_action", "agent": "smart", "board_size": 9, "board": [81 個 0/1/2], "valid_moves": [...]}
+#     -> {"id": 2, "move": 40, "seconds": 0.0003, "stats": {...}}
+#   發生錯誤時回傳 {"id": ..., "error": "訊息"}
+
+import argparse
+import asyncio
+import json
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from agents import BaseAgent
+
+
+class AgentServer:
+    """
+    【Agent 伺服器 AgentServer】
+    agents: {名稱: [Agent 實例, ...]}，同一個名稱可以放多個實例 (copies)，讓多場對戰同時向同一種 Agent 要步。
+    Agent 物件有狀態 (置換表、搜尋中的棋盤)，因此一個實例同一時間只處理一個請求；
+    choose_action 在執行緒池中執行，事件迴圈不會被任何一個慢的 Agent 卡住。
+    CPU 密集的 Agent 建議各自開一個 server 行程 (不同 port)，才能真正平行並與其他 Agent 隔離。
+    """
+
+    def __init__(self, agents):
+        self.agents = {name: list(instances) for name, instances in agents.items()}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, sum(len(v) for v in self.agents.values())))
+        self._idle = None
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=8765, path=None):
+        """ 開始監聽 TCP (host, port) 或 Unix socket (path)；回傳 asyncio Server """
+        self._idle = {}
+        for name, instances in self.agents.items():
+            queue = asyncio.Queue()
+            for agent in instances:
+                queue.put_nowait(agent)
+            self._idle[name] = queue
+
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_connection, path=path)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+    async def serve_forever(self, host="127.0.0.1", port=8765, path=None):
+        server = await self.start(host, port, path)
+        async with server:
+            await server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False)
+        for instances in self.agents.values():
+            for agent in instances:
+                if hasattr(agent, "close"):
+                    agent.close()
+
+    async def _handle_connection(self, reader, writer):
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.create_task(self._handle_line(line, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except ConnectionError:
+            pass
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+    async def _handle_line(self, line, writer, write_lock):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            response = await self._dispatch(request)
+        except Exception as e:
+            response = {"error": f"{type(e).__name__}: {e}"}
+        response["id"] = request_id
+
+        async with write_lock:
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            await writer.drain()
+
+    async def _dispatch(self, request):
+        op = request.get("op")
+        if op == "info":
+            return {"agents": {name: {"candidate_radius": instances[0].candidate_radius}
+                               for name, instances in self.agents.items()}}
+        if op != "choose_action":
+            raise ValueError(f"不支援的 op: {op}")
+
+        name = request["agent"]
+        if name not in self._idle:
+            raise KeyError(f"沒有名為 {name} 的 Agent")
+        board_size = request["board_size"]
+        board = np.array(request["board"], dtype=int).reshape(board_size, board_size)
+        valid_moves = np.array(request["valid_moves"], dtype=int)
+
+        # 取一個閒置的實例 (全部忙碌時在這裡等待，不影響其他請求)
+        agent = await self._idle[name].get()
+        try:
+            start = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            move = await loop.run_in_executor(self._executor, agent.choose_action, board, valid_moves)
+            seconds = time.perf_counter() - start
+            stats = agent.search_stats()
+        finally:
+            self._idle[name].put_nowait(agent)
+        return {"move": None if move is None else int(move), "seconds": seconds, "stats": stats}
+
+
+class RemoteAgent(BaseAgent):
+    """
+    【遠端 AI RemoteAgent】
+    透過 AgentServer 向另一個行程中的 Agent 要步，對 Arena 來說和一般 Agent 一樣：
+      choose_action        ：同步版本 (阻塞直到伺服器回應)，可直接用在 GomokuArena.play_match
+      choose_action_async  ：非同步版本，供 GomokuArena.play_match_async 同時進行多場對戰；
+                             同一個 RemoteAgent 可以被多場對戰共用，請求在同一條連線上多工
+    agent: 伺服器上的 Agent 名稱；指定 path 時改用 Unix socket。
+    """
+
+    def __init__(self, name, agent, host="127.0.0.1", port=8765, path=None):
+        super().__init__(name)
+        self.agent = agent
+        self.host = host
+        self.port = port
+        self.path = path
+        self._radius = None
+        self._sync = None        # (socket, 檔案物件)
+        self._async = None       # (reader, writer, 讀取 task, 事件迴圈)
+        self._opening = None     # (建立連線的 task, 事件迴圈)：多場對戰同時第一次要步時只開一條連線
+        self._pending = {}       # id -> Future
+        self._next_id = 0
+
+    @property
+    def candidate_radius(self):
+        """ 沿用伺服器上該 Agent 的 candidate_radius (第一次使用時查詢；非同步對戰會先在 connect_async 查好) """
+        if self._radius is None:
+            info = self._request_sync({"op": "info"})
+            self._radius = (info["agents"][self.agent]["candidate_radius"] or 0,)
+        return self._radius[0] or None
+
+    def _choose_request(self, board, valid_moves):
+        board = np.asarray(board)
+        return {"op": "choose_action", "agent": self.agent, "board_size": int(board.shape[0]),
+                "board": board.ravel().tolist(), "valid_moves": np.asarray(valid_moves).tolist()}
+
+    def _handle_response(self, response):
+        if "error" in response:
+            raise RuntimeError(f"AgentServer ({self.agent}): {response['error']}")
+        self.stats = dict(response.get("stats") or {}, server_seconds=response["seconds"])
+        return response["move"]
+
+    # ---- 同步 ----
+    def _request_sync(self, payload):
+        if self._sync is None:
+            if self.path is not None:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.connect(self.path)
+            else:
+                sock = socket.create_connection((self.host, self.port))
+            self._sync = (sock, sock.makefile("rwb"))
+        self._next_id += 1
+        stream = self._sync[1]
+        stream.write(json.dumps(dict(payload, id=self._next_id)).encode("utf-8") + b"\n")
+        stream.flush()
+        line = stream.readline()
+        if not line:
+            raise ConnectionError("AgentServer 已關閉連線")
+        return json.loads(line)
+
+    def choose_action(self, board, valid_moves):
+        if np.asarray(valid_moves).size == 0:
+            return None
+        return self._handle_response(self._request_sync(self._choose_request(board, valid_moves)))
+
+    # ---- 非同步 ----
+    async def _connection(self):
+        loop = asyncio.get_running_loop()
+        if self._async is None or self._async[3] is not loop:
+            if self._opening is None or self._opening[1] is not loop:
+                self._opening = (loop.create_task(self._open(loop)), loop)
+            await self._opening[0]
+        return self._async
+
+    async def _open(self, loop):
+        if self.path is not None:
+            reader, writer = await asyncio.open_unix_connection(self.path)
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        task = loop.create_task(self._read_responses(reader))
+        self._async = (reader, writer, task, loop)
+
+    async def connect_async(self):
+        """ 建立非同步連線並查詢 candidate_radius，之後讀取 candidate_radius 不會阻塞事件迴圈 """
+        await self._connection()
+        if self._radius is None:
+            info = await self._request_async({"op": "info"})
+            if "error" in info:
+                raise RuntimeError(f"AgentServer: {info['error']}")
+            self._radius = (info["agents"][self.agent]["candidate_radius"] or 0,)
+
+    async def _read_responses(self, reader):
+        """ 背景 task：把回應依 id 交給等待中的 Future """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._pending.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("AgentServer 已關閉連線"))
+            self._pending.clear()
+
+    async def _request_async(self, payload):
+        _, writer, _, loop = await self._connection()
+        self._next_id += 1
+        request_id = self._next_id
+        future = loop.create_future()
+        self._pending[request_id] = future
+        writer.write(json.dumps(dict(payload, id=request_id)).encode("utf-8") + b"\n")
+        await writer.drain()
+        return await future
+
+    async def choose_action_async(self, board, valid_moves):
+        if np.asarray(valid_moves).size == 0:
+            return None
+        response = await self._request_async(self._choose_request(board, valid_moves))
+        return self._handle_response(response)
+
+    async def aclose(self):
+        """ 關閉非同步連線 (在同一個事件迴圈內呼叫) """
+        if self._async is not None:
+            _, writer, task, _ = self._async
+            writer.close()
+            task.cancel()
+            self._async = None
+            self._opening = None
+
+    def close(self):
+        if self._sync is not None:
+            sock, stream = self._sync
+            stream.close()
+            sock.close()
+            self._sync = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(_sync=None, _async=None, _opening=None, _pending={})  # 連線不傳給子行程
+        return state
+
+
+async def play_matches(pairings, board_size=9, win_streak=5, concurrency=16, seed=0, recorder=None,
+                       instrumentation=None):
+    """
+    同時進行多場對戰 (最多 concurrency 場)：pairings 為 [(黑方 Agent, 白方 Agent), ...]，回傳每場的勝方。
+    RemoteAgent 可被多場共用；本機 Agent 在執行緒中思考，同一個本機 Agent 不要同時出現在多場對戰中。
+    """
+    from arena import GomokuArena
+    from instrumentation import MatchInstrumentation
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def play(index, black, white):
+        async with semaphore:
+            arena = GomokuArena(black, white, board_size=board_size, win_streak=win_streak, render=False)
+            # 效能紀錄以「一場接一場」的方式編號，同時進行的對戰各記各的，結束後再合併
+            match_stats = None if instrumentation is None else MatchInstrumentation()
+            winner = await arena.play_match_async(seed=seed + index, recorder=recorder, instrumentation=match_stats)
+            if match_stats is not None:
+                instrumentation.merge(match_stats)
+            return winner
+
+    return await asyncio.gather(*(play(index, black, white) for index, (black, white) in enumerate(pairings)))
+
+
+if __name__ == "__main__":
+    from tournament import AGENT_TYPES, budget_kwargs, make_agent
+
+    parser = argparse.ArgumentParser(description="Serve Gomoku agents over a socket or play matches against them")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve = subparsers.add_parser("serve", help="Host agents")
+    serve.add_argument('--agents', nargs='+', default=["smart"], choices=sorted(AGENT_TYPES), help='Agent types to host')
+    serve.add_argument('--copies', type=int, default=1, help='Instances per agent type (concurrent requests)')
+    serve.add_argument('--board-size', type=int, default=9, help='Board size')
+    serve.add_argument('--win-streak', type=int, default=5, help='Stones in a row needed to win')
+    serve.add_argument('--time-budget', type=float, default=None, help='Per-move time budget in seconds for search agents')
+
+    play = subparsers.add_parser("play", help="Play concurrent matches against a running server")
+    play.add_argument('--black', default="smart", help='Server agent playing black')
+    play.add_argument('--white', default="smart", help='Server agent playing white')
+    play.add_argument('--matches', type=int, default=8, help='Number of matches')
+    play.add_argument('--concurrency', type=int, default=8, help='Matches in flight at the same time')
+    play.add_argument('--board-size', type=int, default=9, help='Board size')
+    play.add_argument('--win-streak', type=int, default=5, help='Stones in a row needed to win')
+    play.add_argument('--seed', type=int, default=0, help='Seed of the first match')
+
+    for sub in (serve, play):
+        sub.add_argument('--host', default="127.0.0.1", help='TCP host')
+        sub.add_argument('--port', type=int, default=8765, help='TCP port')
+        sub.add_argument('--unix', default=None, help='Unix socket path (instead of TCP)')
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        agents = {}
+        for agent_type in args.agents:
+            spec = (agent_type, AGENT_TYPES[agent_type][0], budget_kwargs(agent_type, args.time_budget))
+            agents[agent_type] = [make_agent(spec, args.board_size, args.win_streak) for _ in range(args.copies)]
+        where = args.unix or f"{args.host}:{args.port}"
+        print(f"AgentServer 在 {where} 提供 {', '.join(agents)} (每種 {args.copies} 個實例)")
+        try:
+            asyncio.run(AgentServer(agents).serve_forever(args.host, args.port, args.unix))
+        except KeyboardInterrupt:
+            pass
+    else:
+        black = RemoteAgent(args.black, args.black, args.host, args.port, args.unix)
+        white = RemoteAgent(args.white, args.white, args.host, args.port, args.unix)
+
+        async def main():
+            start = time.perf_counter()
+            winners = await play_matches([(black, white)] * args.matches, args.board_size, args.win_streak,
+                                         args.concurrency, args.seed)
+            await black.aclose()
+            await white.aclose()
+            return winners, time.perf_counter() - start
+
+        winners, seconds = asyncio.run(main())
+        print(f"{args.matches} 場 (同時 {args.concurrency} 場)，耗時 {seconds:.2f} 秒："
+              f"黑勝 {winners.count(1)}、白勝 {winners.count(2)}、和局 {winners.count(0)}")
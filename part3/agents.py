@@ -1,15 +1,32 @@
 import random
+import time
 import numpy as np
 from abc import ABC, abstractmethod
+from evaluator import VectorizedEvaluator
+from bitboard import BitBoard
+from candidates import CandidateTracker
+from transposition import ZobristHasher, TranspositionTable, EXACT, LOWER, UPPER
+from threats import ThreatIndex
+from threat_solver import ThreatSpaceSolver, find_forced_move
+from eval_cache import symmetric_zobrist
 
 class BaseAgent(ABC):
+    # 若設為 1 或 2，Arena 只會把「距離棋子 radius 格以內的空位」當作 valid_moves 傳入 (env.get_candidate_moves)
+    # None 代表使用所有空位
+    candidate_radius = None
+
     def __init__(self, name):
         self.name = name
+        self.stats = {}  # 上一次 choose_action 的搜尋統計，由各子類別填入
 
     @abstractmethod
     def choose_action(self, board, valid_moves):
         pass
 
+    def search_stats(self):
+        """ 上一次 choose_action 的搜尋統計 (評估的盤面數、置換表命中、搜尋深度...)，Arena 記錄效能時使用 """
+        return dict(self.stats)
+
 class RandomAgent(BaseAgent):
     def choose_action(self, board, valid_moves):
         # 修正：檢查 NumPy 陣列是否為空
@@ -18,10 +35,15 @@ class RandomAgent(BaseAgent):
         return random.choice(valid_moves.tolist()) # 確保這裡使用列表
 
 class GreedyAgent(BaseAgent):
-    def __init__(self, name, board_size, win_streak):
+    # 致勝點與必擋點一定緊鄰現有棋子，只看距離 1 格以內的空位就夠了 (空棋盤時 env 回傳天元)
+    candidate_radius = 1
+
+    # backend: "numpy" (逐格模擬) 或 "bitboard" (轉成位元棋盤，用 shift-and-AND 檢查一步致勝)
+    def __init__(self, name, board_size, win_streak, backend="numpy"):
         super().__init__(name)
         self.board_size = board_size
         self.win_streak = win_streak
+        self.backend = backend
 
     def choose_action(self, board, valid_moves):
         # 修正：檢查 NumPy 陣列是否為空
@@ -53,6 +75,13 @@ class GreedyAgent(BaseAgent):
 
     def _find_winning_move(self, board, valid_moves_list, player_id):
         """ 輔助方法：模擬下棋，檢查是否能一步致勝或防守 """
+        if self.backend == "bitboard":
+            bitboard = BitBoard.from_array(board, self.win_streak)
+            for move in valid_moves_list:
+                if bitboard.wins_with(move, player_id):
+                    return move
+            return None
+
         for move in valid_moves_list: # <-- 確保迭代列表
             r, c = move // self.board_size, move % self.board_size
             
@@ -91,8 +120,20 @@ class GreedyAgent(BaseAgent):
 
 
 class SmartAgent(GreedyAgent):
-    def __init__(self, name, board_size, win_streak):
-        super().__init__(name, board_size, win_streak)
+    # 只評估棋子附近的空位，大棋盤時分支數可減少一個數量級
+    candidate_radius = 2
+
+    # evaluator: "incremental" (預設，只重算通過落子點的視窗)、"vectorized" (NumPy 批次評估)
+    #            或 "naive" (原本的整盤掃描，保留作為對照)
+    # time_budget: 每步思考時間上限 (秒)；naive 模式在大棋盤上超過一半預算時，剩下的候選步改用增量評估
+    # eval_cache: eval_cache.EvaluationCache，候選步分數以「下了之後的盤面」的對稱標準形 (Zobrist 雜湊) 快取，
+    #             三種 evaluator 都適用 (分數相同)，可跨 Agent、跨對局共用
+    def __init__(self, name, board_size, win_streak, evaluator="incremental", backend="numpy", time_budget=None,
+                 eval_cache=None):
+        super().__init__(name, board_size, win_streak, backend)
+        self.evaluator = evaluator
+        self.time_budget = time_budget
+        self.eval_cache = eval_cache
         self.scores = {
             5: 10000000, 
             4: 100000,   
@@ -116,19 +157,16 @@ class SmartAgent(GreedyAgent):
         best_score = -99999999
         best_move = random.choice(valid_moves_list) 
 
-        for move in valid_moves_list: # <-- 確保迭代列表
-            r, c = move // self.board_size, move % self.board_size
-            
-            # 1. 模擬自己下子 (進攻評估)
-            board[r, c] = my_id
-            score = self._evaluate_board(board, my_id)
-            
-            # 2. 模擬對手下子 (防守評估，Minimax 概念)
-            opponent_score = self._evaluate_board(board, opponent_id)
-            score -= opponent_score * 0.9 
+        # 增量模式下，評估器同時維護威脅索引，之後的必勝/必擋檢查只需查集合
+        threats = self._make_evaluator(board) if self.evaluator == "incremental" else None
+        cache_counts = None if self.eval_cache is None else (self.eval_cache.hits, self.eval_cache.misses)
+        move_scores = self._score_moves(board, valid_moves_list, my_id, opponent_id, threats)
+        self.stats = {"positions_evaluated": len(valid_moves_list)}
+        if cache_counts is not None:
+            self.stats["cache_hits"] = self.eval_cache.hits - cache_counts[0]
+            self.stats["cache_misses"] = self.eval_cache.misses - cache_counts[1]
 
-            board[r, c] = 0 # 復原
-            
+        for move, score in zip(valid_moves_list, move_scores):
             if score > best_score:
                 best_score = score
                 best_move = move
@@ -136,16 +174,97 @@ class SmartAgent(GreedyAgent):
                 best_move = move
 
         # 確保一步必勝和一步必擋的策略優先級最高
-        winning_move = self._find_winning_move(board, valid_moves_list, my_id)
+        winning_move = self._find_threat_move(board, valid_moves_list, my_id, threats)
         if winning_move is not None:
             return winning_move
 
-        blocking_move = self._find_winning_move(board, valid_moves_list, opponent_id)
+        blocking_move = self._find_threat_move(board, valid_moves_list, opponent_id, threats)
         if blocking_move is not None:
             return blocking_move
             
         return best_move
 
+    def _find_threat_move(self, board, valid_moves_list, player_id, threats=None):
+        """ 與 _find_winning_move 結果相同 (取索引最小的致勝點)，有威脅索引時直接查表 """
+        if threats is None:
+            return self._find_winning_move(board, valid_moves_list, player_id)
+        winning_cells = threats.winning_moves(player_id)
+        if not winning_cells:
+            return None
+        valid_set = set(valid_moves_list)
+        return min((move for move in winning_cells if move in valid_set), default=None)
+
+    def _score_moves(self, board, valid_moves_list, my_id, opponent_id, evaluator=None):
+        """ 計算每個候選步的分數：MyScore - OpponentScore * 0.9，有快取時只計算沒命中的候選步 """
+        if self.eval_cache is None:
+            return self._score_moves_uncached(board, valid_moves_list, my_id, opponent_id, evaluator)
+
+        # 分數只看下了之後的盤面 (在八種旋轉 / 翻轉下不變)，鍵 = 該盤面的對稱標準形雜湊
+        hasher = symmetric_zobrist(self.board_size)
+        after, _ = hasher.canonical(hasher.after_moves(hasher.hash_board(board), valid_moves_list, my_id))
+        namespace = ("smart", self.win_streak)
+        keys = [self.eval_cache.key_from_hash(h, my_id, namespace) for h in after]
+        move_scores = [self.eval_cache.get(key) for key in keys]
+        missing = [index for index, score in enumerate(move_scores) if score is None]
+        if missing:
+            computed = self._score_moves_uncached(board, [valid_moves_list[index] for index in missing],
+                                                  my_id, opponent_id, evaluator)
+            for index, score in zip(missing, computed):
+                move_scores[index] = score
+                self.eval_cache.put(keys[index], score)
+        return move_scores
+
+    def _score_moves_uncached(self, board, valid_moves_list, my_id, opponent_id, evaluator=None):
+        if self.evaluator == "naive":
+            deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget / 2
+            move_scores = []
+            for index, move in enumerate(valid_moves_list):
+                if deadline is not None and time.perf_counter() > deadline:
+                    # 時間不夠：剩下的候選步改用增量評估 (分數與整盤掃描相同，只是快得多)
+                    evaluator = evaluator or self._make_evaluator(board)
+                    for move in valid_moves_list[index:]:
+                        score, opponent_score = evaluator.totals_after(move, my_id)
+                        move_scores.append(score - opponent_score * 0.9)
+                    break
+                r, c = move // self.board_size, move % self.board_size
+
+                # 1. 模擬自己下子 (進攻評估)
+                board[r, c] = my_id
+                score = self._evaluate_board(board, my_id)
+
+                # 2. 模擬對手下子 (防守評估，Minimax 概念)
+                opponent_score = self._evaluate_board(board, opponent_id)
+                score -= opponent_score * 0.9
+
+                board[r, c] = 0 # 復原
+                move_scores.append(score)
+            return move_scores
+
+        if self.evaluator == "vectorized":
+            vectorized = VectorizedEvaluator(self.board_size, self.win_streak, self._window_values())
+            return vectorized.score_moves(board, valid_moves_list, my_id).tolist()
+
+        # 增量評估：整盤只掃描一次，之後每個候選步只看通過該格的 4 * win_streak 個視窗
+        if evaluator is None:
+            evaluator = self._make_evaluator(board)
+        move_scores = []
+        for move in valid_moves_list:
+            score, opponent_score = evaluator.totals_after(move, my_id)
+            score -= opponent_score * 0.9
+            move_scores.append(score)
+        return move_scores
+
+    def _make_evaluator(self, board):
+        """ 建立並載入與 _evaluate_board 分數一致的增量評估器 (附帶威脅索引) """
+        return ThreatIndex(self.board_size, self.win_streak, self._window_values()).load(board)
+
+    def _window_values(self):
+        """ 視窗內有 m 顆己方棋子 (無對手) 時 _evaluate_line 的分數，m = 0 ~ win_streak """
+        return [
+            self._evaluate_line([1] * m + [0] * (self.win_streak - m), 1, 2)
+            for m in range(self.win_streak + 1)
+        ]
+
     def _evaluate_board(self, board, player_id):
         total_score = 0
         
@@ -153,7 +272,7 @@ class SmartAgent(GreedyAgent):
             for c in range(self.board_size):
                 if board[r, c] == player_id:
                     total_score += self._get_position_score(board, r, c, player_id)
-                    
+
         return total_score
 
     def _get_position_score(self, board, r, c, player_id):
@@ -198,12 +317,13 @@ class SmartAgent(GreedyAgent):
         if mine == 0:
             return 0 
 
+        # 評分表以五子棋為準：連成一線用 scores[5]、差一顆用 scores[4]，其他 win_streak 也對應到同樣的等級
         if mine == self.win_streak:
-            return self.scores[self.win_streak]
+            return self.scores[5]
 
         if mine > 0 and (mine + empty) >= self.win_streak:
             
-            if mine == 4:
+            if mine == self.win_streak - 1:
                 if empty == 1:
                     return self.scores[4] 
                 
@@ -219,4 +339,277 @@ class SmartAgent(GreedyAgent):
                 if empty >= 4:
                     return self.scores[1]
         
-        return 0
\ No newline at end of file
+        return 0
+
+
+class _SearchTimeout(Exception):
+    """ 搜尋時間用完時，從遞迴深處一路跳回根節點 """
+
+
+class AlphaBetaAgent(SmartAgent):
+    """
+    【Alpha-Beta 搜尋 AI AlphaBetaAgent】
+    Negamax + Alpha-Beta 剪枝，葉節點沿用 SmartAgent 的棋型評分表 (以 IncrementalEvaluator 增量計算)。
+    以 killer move / history heuristic 排序候選步，並用 iterative deepening 在時間內逐層加深，
+    時間一到就回傳目前為止找到的最佳步。
+    以 Zobrist 雜湊查置換表，不同走法順序到達的相同盤面不會重複搜尋。
+
+    time_limit: 每步思考時間上限 (秒)
+    max_depth: 最大搜尋深度
+    max_width: 每個節點只展開靜態評分最高的前幾個候選步
+    tt_size: 置換表格數 (跨步保留，讓上一步的搜尋結果可以重複利用)
+    use_solver: 搜尋前先用 VCF/VCT 解算器找強制勝 / 強制防守 (最多用掉 1/4 的思考時間)
+    eval_cache: eval_cache.EvaluationCache，以根盤面的對稱標準形記錄搜尋結果 (深度、最佳步、分數)；
+                已搜到 max_depth (或已證明勝負) 的盤面直接回傳，否則把記錄的最佳步排在第一個先搜。
+                葉節點的評估是 O(1) 的增量分數，不經過快取
+    """
+    WIN_SCORE = 10 ** 12
+
+    def __init__(self, name, board_size, win_streak, time_limit=1.0, max_depth=8, max_width=12,
+                 tt_size=1 << 18, use_solver=True, backend="numpy", eval_cache=None):
+        super().__init__(name, board_size, win_streak, backend=backend, eval_cache=eval_cache)
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.max_width = max_width
+        self.zobrist = ZobristHasher(board_size)
+        self.tt = TranspositionTable(tt_size)
+        self.solver = None
+        if use_solver:
+            self.solver = ThreatSpaceSolver(board_size, win_streak, max_nodes=5000, time_limit=time_limit / 12)
+
+    def choose_action(self, board, valid_moves):
+        if valid_moves.size == 0:
+            return None
+
+        valid_moves_list = valid_moves.tolist()
+        my_id = 2 if np.sum(board == 1) > np.sum(board == 2) else 1
+        opponent_id = 3 - my_id
+
+        self._deadline = time.perf_counter() + self.time_limit
+        self._evaluator = self._make_evaluator(board)
+        self._nodes = 0
+        self._depth = 0
+        self._tt_counts = (self.tt.probes, self.tt.hits)
+        self._solver_nodes = 0
+
+        # 一步必勝 / 一步必擋不需要搜尋 (查威脅索引)
+        winning_move = self._find_threat_move(board, valid_moves_list, my_id, self._evaluator)
+        if winning_move is not None:
+            return self._finish(winning_move, "win")
+        blocking_move = self._find_threat_move(board, valid_moves_list, opponent_id, self._evaluator)
+        if blocking_move is not None:
+            return self._finish(blocking_move, "block")
+
+        # 強制勝 / 強制防守 (只搜尋衝四、活三，比全寬度搜尋深得多)
+        if self.solver is not None:
+            solver_nodes = self.solver.total_nodes
+            forced_move = find_forced_move(self.solver, board, my_id, valid_moves_list)
+            self._solver_nodes = self.solver.total_nodes - solver_nodes
+            if forced_move is not None:
+                return self._finish(forced_move, "solver")
+
+        # 以前搜過這個盤面 (或它的旋轉 / 翻轉)：夠深就直接用，否則只拿來排序
+        valid_set = set(valid_moves_list)
+        cached = None
+        if self.eval_cache is not None:
+            hasher = symmetric_zobrist(self.board_size)
+            canonical, symmetry = hasher.canonical(hasher.hash_board(board))
+            cache_key = self.eval_cache.key_from_hash(canonical, my_id, ("alphabeta", self.win_streak))
+            cached = self.eval_cache.get(cache_key)
+            if cached is not None:
+                cached_depth, cached_move, cached_score = cached
+                cached_move = hasher.from_canonical(cached_move, symmetry)
+                if cached_move in valid_set and (cached_depth >= self.max_depth
+                                                 or abs(cached_score) >= self.WIN_SCORE - self.max_depth):
+                    self._depth = cached_depth
+                    return self._finish(cached_move, "cache")
+
+        self._tracker = CandidateTracker(self.board_size).load(board)
+        self._killers = [[None, None] for _ in range(self.max_depth + 1)]
+        self._history = [0] * (self.board_size * self.board_size)
+        self._hash = self.zobrist.hash_board(board)
+        self.tt.new_search()
+
+        root_moves = [m for m in self._ordered_moves(my_id, 0) if m in valid_set]
+        if not root_moves:
+            return self._finish(random.choice(valid_moves_list), "random")
+        if cached is not None and cached_move in root_moves:
+            root_moves.remove(cached_move)
+            root_moves.insert(0, cached_move)
+
+        best_move = root_moves[0]
+        best_score = None
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score, move = self._search_root(root_moves, depth, my_id)
+            except _SearchTimeout as timeout:
+                # 這一層沒搜完：若已完整搜過至少一個根節點步，採用這一層目前的最佳步
+                if timeout.args and timeout.args[0] is not None:
+                    best_move = timeout.args[0]
+                break
+
+            best_move, best_score = move, score
+            self._depth = depth
+            # 下一層先搜上一層的最佳步，剪枝效果最好
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+            if abs(score) >= self.WIN_SCORE - self.max_depth:
+                break  # 已找到必勝/必敗，不用再加深
+
+        # 只記錄完整搜完的深度 (root_moves[0] 就是那一層的最佳步)，而且比快取裡原有的更深時才覆蓋
+        if self.eval_cache is not None and best_score is not None and (cached is None or self._depth > cached[0]):
+            self.eval_cache.put(cache_key, (self._depth, hasher.to_canonical(root_moves[0], symmetry), best_score))
+        return self._finish(best_move, "search")
+
+    def _finish(self, move, source):
+        """ 記錄這一步的搜尋統計後回傳 move (source：這一步是由哪個階段決定的) """
+        probes, hits = self._tt_counts
+        self.stats = {
+            "source": source,
+            "nodes": self._nodes,
+            "depth": self._depth,
+            "tt_probes": self.tt.probes - probes,
+            "tt_hits": self.tt.hits - hits,
+            "solver_nodes": self._solver_nodes,
+        }
+        return move
+
+    def _search_root(self, root_moves, depth, player):
+        alpha, beta = -self.WIN_SCORE - 1, self.WIN_SCORE + 1
+        best_score, best_move = None, None
+
+        for move in root_moves:
+            try:
+                score = self._try_move(move, player, depth, alpha, beta, 0)
+            except _SearchTimeout:
+                raise _SearchTimeout(best_move)
+
+            if best_score is None or score > best_score:
+                best_score, best_move = score, move
+            alpha = max(alpha, score)
+
+        return best_score, best_move
+
+    def _try_move(self, move, player, depth, alpha, beta, ply):
+        """ 落子 -> 遞迴搜尋 -> 復原，回傳以 player 角度的分數 """
+        evaluator = self._evaluator
+        evaluator.place(move, player)
+        self._tracker.place(move)
+        self._hash = self.zobrist.toggle(self._hash, move, player)
+        try:
+            if evaluator.fives[player]:
+                return self.WIN_SCORE - ply  # 越快贏越好
+            return -self._negamax(depth - 1, -beta, -alpha, 3 - player, ply + 1)
+        finally:
+            evaluator.remove(move)
+            self._tracker.remove(move)
+            self._hash = self.zobrist.toggle(self._hash, move, player)
+
+    def _negamax(self, depth, alpha, beta, player, ply):
+        self._nodes += 1
+        if time.perf_counter() > self._deadline:
+            raise _SearchTimeout()
+
+        if depth == 0:
+            return self._evaluator.score(player) - self._evaluator.score(3 - player)
+
+        # 查置換表：同一盤面已搜尋到足夠深度時直接使用 (或縮小 alpha-beta 視窗)
+        h = self._hash
+        original_alpha = alpha
+        tt_move = None
+        entry = self.tt.probe(h)
+        if entry is not None:
+            tt_depth, flag, tt_score, tt_move = entry
+            if tt_depth >= depth:
+                tt_score = self._score_from_tt(tt_score, ply)
+                if flag == EXACT:
+                    return tt_score
+                if flag == LOWER:
+                    alpha = max(alpha, tt_score)
+                elif flag == UPPER:
+                    beta = min(beta, tt_score)
+                if alpha >= beta:
+                    return tt_score
+
+        moves = self._ordered_moves(player, ply)
+        if not moves:
+            return 0  # 和局
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+
+        best = -self.WIN_SCORE - 1
+        best_move = None
+        for move in moves:
+            score = self._try_move(move, player, depth, alpha, beta, ply)
+            if score > best:
+                best = score
+                best_move = move
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                self._record_cutoff(move, depth, ply)
+                break
+
+        if best <= original_alpha:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(h, depth, flag, self._score_to_tt(best, ply), best_move)
+        return best
+
+    def _score_to_tt(self, score, ply):
+        """ 必勝/必敗分數與距離根節點的步數有關，存表時改成「距離此盤面」的步數 """
+        if score >= self.WIN_SCORE - 1000:
+            return score + ply
+        if score <= -self.WIN_SCORE + 1000:
+            return score - ply
+        return score
+
+    def _score_from_tt(self, score, ply):
+        if score >= self.WIN_SCORE - 1000:
+            return score - ply
+        if score <= -self.WIN_SCORE + 1000:
+            return score + ply
+        return score
+
+    def _ordered_moves(self, player, ply):
+        """
+        候選步排序：
+        0. 有一步致勝就只下那步；對手有致勝點時只考慮擋住它 (威脅索引查表)
+        1. 先用棋型評分的增量 (進攻得分 + 擋住對手的分數) 取前 max_width 個
+        2. killer move (同一層曾造成剪枝的步) 優先，其餘依 history 分數排序
+        """
+        evaluator = self._evaluator
+        winning_cells = evaluator.winning_moves(player)
+        if winning_cells:
+            return [min(winning_cells)]
+        must_block = evaluator.winning_moves(3 - player)
+        if must_block:
+            return sorted(must_block)
+
+        my_total = evaluator.score(player)
+        other_total = evaluator.score(3 - player)
+
+        static = []
+        for move in self._tracker.moves():
+            mine, other = evaluator.totals_after(move, player)
+            static.append(((mine - my_total) + (other_total - other), move))
+        static.sort(reverse=True)
+        moves = [move for _, move in static[:self.max_width]]
+
+        killers = self._killers[ply] if ply < len(self._killers) else [None, None]
+        history = self._history
+        moves.sort(key=lambda m: (m in killers, history[m]), reverse=True)
+        return moves
+
+    def _record_cutoff(self, move, depth, ply):
+        if ply < len(self._killers):
+            killers = self._killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        self._history[move] += depth * depth
+
@@ -1,5 +1,6 @@
 # arena.py - 最終修復版 (適用於 Pygame 環境)
 
+import asyncio
 import time
 # 引用您的五子棋環境檔 (請確保您的環境檔名是 oop_project_env.py)
 # 假設您已將 tempCodeRunnerFile.py 重新命名為 oop_project_env.py
@@ -11,28 +12,35 @@ class GomokuArena:
     負責管理兩個 AI 之間的對戰流程。
     """
     # 移除 master 參數
-    def __init__(self, agent1, agent2, board_size=9, win_streak=5, render=True):
+    # backend: 傳給 GomokuEnv 的棋盤後端 ("numpy" 或 "bitboard")
+    def __init__(self, agent1, agent2, board_size=9, win_streak=5, render=True, backend="numpy"):
         
         # 直接呼叫 GomokuEnv (現在是 Pygame 版本)
         self.env = GomokuEnv(
             board_size=board_size, 
             win_streak=win_streak, 
-            render_mode='human' if render else None
+            render_mode='human' if render else None,
+            backend=backend
         )
             
         self.agent1 = agent1
         self.agent2 = agent2
         self.render = render
 
-    def play_match(self, delay=0.5): # <-- 關鍵修正：恢復 play_match 函式！
+    def play_match(self, delay=0.5, verbose=True, seed=None, recorder=None, instrumentation=None): # <-- 關鍵修正：恢復 play_match 函式！
         """
-        開始一場比賽
+        開始一場比賽，回傳勝方 (1: 黑棋, 2: 白棋, 0: 和局)
         delay: 每步暫停的秒數，方便人類觀看
+        verbose: 是否印出比賽訊息 (大量對戰時關閉)
+        seed: 傳給 env.reset 的亂數種子
+        recorder: 對局紀錄寫入器 (例如 game_record.GameRecordWriter)，比賽結束時寫入一筆紀錄
+        instrumentation: 效能紀錄 (instrumentation.MatchInstrumentation)，記錄每步思考時間與 Agent 的搜尋統計
         """
-        obs, _ = self.env.reset()
+        obs, _ = self.env.reset(seed=seed)
         terminated = False
         
-        print(f"--- 比賽開始: {self.agent1.name} (黑棋 ●) vs {self.agent2.name} (白棋 ○) ---")
+        if verbose:
+            print(f"--- 比賽開始: {self.agent1.name} (黑棋 ●) vs {self.agent2.name} (白棋 ○) ---")
         if self.render:
             self.env.render()
 
@@ -43,11 +51,19 @@ class GomokuArena:
             else:
                 current_agent = self.agent2
             
-            # 2. 獲取合法步數
-            valid_moves = self.env.get_valid_moves()
+            # 2. 獲取合法步數 (Agent 可選擇只看棋子附近的候選步)
+            if current_agent.candidate_radius:
+                valid_moves = self.env.get_candidate_moves(current_agent.candidate_radius)
+            else:
+                valid_moves = self.env.get_valid_moves()
             
-            # 3. AI 思考決定下一步
+            # 3. AI 思考決定下一步 (計時)
+            start = time.perf_counter()
             action = current_agent.choose_action(self.env.board, valid_moves)
+            seconds = time.perf_counter() - start
+            if instrumentation is not None:
+                instrumentation.record_move(current_agent.name, self.env.current_player, seconds,
+                                            current_agent.search_stats())
             
             # 4. 執行動作 (下子)
             obs, reward, terminated, truncated, info = self.env.step(action)
@@ -56,20 +72,69 @@ class GomokuArena:
             if self.render:
                 row = action // self.env.board_size
                 col = action % self.env.board_size
-                print(f"\n[{current_agent.name}] 下在 ({row}, {col})")
+                print(f"\n[{current_agent.name}] 下在 ({row}, {col})，思考 {seconds:.3f} 秒")
                 self.env.render()
                 time.sleep(delay) # 暫停一下方便觀看
 
         # 6. 遊戲結束，宣佈結果
         winner_id = info.get("winner", 0)
-        print("\n" + "="*30)
-        if winner_id == 1:
-            print(f"🏆 獲勝者是: {self.agent1.name} (黑棋)！")
-        elif winner_id == 2:
-            print(f"🏆 獲勝者是: {self.agent2.name} (白棋)！")
-        else:
-            print("🤝 平手 (和局)！")
-        print("="*30)
+        if verbose:
+            print("\n" + "="*30)
+            if winner_id == 1:
+                print(f"🏆 獲勝者是: {self.agent1.name} (黑棋)！")
+            elif winner_id == 2:
+                print(f"🏆 獲勝者是: {self.agent2.name} (白棋)！")
+            else:
+                print("🤝 平手 (和局)！")
+            print("="*30)
+
+        if instrumentation is not None:
+            instrumentation.end_game(self.agent1.name, self.agent2.name, winner_id, seed)
+        if recorder is not None:
+            recorder.write_game(self.env.move_history, winner_id, self.agent1.name, self.agent2.name, seed)
         
         # 額外：如果使用 Pygame，結束後需要呼叫 close
-        self.env.close()
\ No newline at end of file
+        self.env.close()
+        return winner_id
+
+    async def play_match_async(self, seed=None, recorder=None, instrumentation=None):
+        """
+        無畫面的非同步版 play_match，回傳勝方 (1: 黑棋, 2: 白棋, 0: 和局)。
+        有 choose_action_async 的 Agent (例如 agent_server.RemoteAgent) 直接 await，
+        並在開局前呼叫 connect_async (若有)；
+        一般 Agent 在執行緒中思考，等待期間事件迴圈可以繼續推進其他對戰。
+        """
+        for agent in (self.agent1, self.agent2):
+            if hasattr(agent, "connect_async"):
+                await agent.connect_async()  # 先連線並取得 candidate_radius 等設定
+
+        obs, _ = self.env.reset(seed=seed)
+        terminated = False
+        info = {}
+
+        while not terminated:
+            current_agent = self.agent1 if self.env.current_player == 1 else self.agent2
+            if current_agent.candidate_radius:
+                valid_moves = self.env.get_candidate_moves(current_agent.candidate_radius)
+            else:
+                valid_moves = self.env.get_valid_moves()
+
+            start = time.perf_counter()
+            if hasattr(current_agent, "choose_action_async"):
+                action = await current_agent.choose_action_async(self.env.board, valid_moves)
+            else:
+                action = await asyncio.to_thread(current_agent.choose_action, self.env.board.copy(), valid_moves)
+            seconds = time.perf_counter() - start
+            if instrumentation is not None:
+                instrumentation.record_move(current_agent.name, self.env.current_player, seconds,
+                                            current_agent.search_stats())
+
+            obs, reward, terminated, truncated, info = self.env.step(action)
+
+        winner_id = info.get("winner", 0)
+        if instrumentation is not None:
+            instrumentation.end_game(self.agent1.name, self.agent2.name, winner_id, seed)
+        if recorder is not None:
+            recorder.write_game(self.env.move_history, winner_id, self.agent1.name, self.agent2.name, seed)
+        self.env.close()
+        return winner_id
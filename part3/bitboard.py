@@ -0,0 +1,146 @@
+import numpy as np
+
+# 快取：每個 (board_size, win_streak) 的「通過某格的線段遮罩」只需要建一次
+_SEGMENT_CACHE = {}
+
+
+class BitBoard:
+    """
+    【位元棋盤 BitBoard】
+    每位玩家用一個 Python 大整數 (big-int) 當作遮罩，第 (r, c) 格對應第 r * (board_size + 1) + c 個位元。
+    每一列最後多留一個永遠為 0 的「隔板」位元，橫向與斜向位移時就不會從上一列接到下一列。
+
+    連線判斷不用逐格走訪，而是沿四個方向做 shift-and-AND：
+    mask & (mask >> s) & (mask >> 2s) ... 只要結果不為 0 就代表有 win_streak 連線。
+    """
+
+    def __init__(self, board_size, win_streak=5):
+        self.board_size = board_size
+        self.win_streak = win_streak
+        self.stride = board_size + 1
+
+        # 四個方向對應的位移量：橫、直、右下斜、左下斜
+        self.shifts = (1, self.stride, self.stride + 1, self.stride - 1)
+
+        # masks[player]：index 0 不使用，1 = 黑棋，2 = 白棋
+        self.masks = [0, 0, 0]
+        self.move_count = 0
+        self.segments = self._build_segments(board_size, win_streak)
+
+    @staticmethod
+    def _build_segments(board_size, win_streak):
+        """
+        segments[move][d]：以 move 為中心、沿方向 d 前後各 win_streak-1 格的線段遮罩。
+        線段長度最多 2 * win_streak - 1，任何落在線段內的 win_streak 連線都一定經過中心。
+        """
+        key = (board_size, win_streak)
+        if key in _SEGMENT_CACHE:
+            return _SEGMENT_CACHE[key]
+
+        stride = board_size + 1
+        segments = []
+        for move in range(board_size * board_size):
+            row, col = divmod(move, board_size)
+            per_direction = []
+            for dr, dc in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                segment = 0
+                for k in range(-win_streak + 1, win_streak):
+                    r, c = row + dr * k, col + dc * k
+                    if 0 <= r < board_size and 0 <= c < board_size:
+                        segment |= 1 << (r * stride + c)
+                per_direction.append(segment)
+            segments.append(per_direction)
+
+        _SEGMENT_CACHE[key] = segments
+        return segments
+
+    @classmethod
+    def from_array(cls, board, win_streak=5):
+        """ 由 NumPy 棋盤 (0/1/2) 建立位元棋盤，整盤轉換只用向量化的 packbits """
+        board = np.asarray(board)
+        bitboard = cls(board.shape[0], win_streak)
+
+        # 右側補一行 0 當作隔板，再把每位玩家的棋子打包成位元組轉成大整數
+        padded = np.zeros((board.shape[0], bitboard.stride), dtype=board.dtype)
+        padded[:, :board.shape[1]] = board
+        for player in (1, 2):
+            packed = np.packbits(padded.ravel() == player, bitorder="little")
+            bitboard.masks[player] = int.from_bytes(packed.tobytes(), "little")
+
+        bitboard.move_count = int(np.count_nonzero(board))
+        return bitboard
+
+    def to_array(self):
+        """ 轉回 NumPy 棋盤 (除錯或顯示用) """
+        board = np.zeros((self.board_size, self.board_size), dtype=int)
+        for r in range(self.board_size):
+            for c in range(self.board_size):
+                board[r, c] = self.get(r, c)
+        return board
+
+    def bit(self, row, col):
+        return 1 << (row * self.stride + col)
+
+    def move_bit(self, move):
+        """ 攤平索引 (row * board_size + col) 轉成位元 """
+        row, col = divmod(move, self.board_size)
+        return 1 << (row * self.stride + col)
+
+    def get(self, row, col):
+        bit = self.bit(row, col)
+        if self.masks[1] & bit:
+            return 1
+        if self.masks[2] & bit:
+            return 2
+        return 0
+
+    def place(self, row, col, player):
+        self.masks[player] |= self.bit(row, col)
+        self.move_count += 1
+
+    def remove(self, row, col):
+        bit = self.bit(row, col)
+        self.masks[1] &= ~bit
+        self.masks[2] &= ~bit
+        self.move_count -= 1
+
+    def is_full(self):
+        return self.move_count >= self.board_size * self.board_size
+
+    def has_streak(self, mask):
+        """ mask 中是否存在任一方向的 win_streak 連線 """
+        for shift in self.shifts:
+            if self._run(mask, shift):
+                return True
+        return False
+
+    def has_streak_through(self, mask, move):
+        """ 只檢查通過 move (攤平索引) 的連線，與 check_win 從落子點往外數的語意相同 """
+        steps = self.win_streak - 1
+        for shift, segment in zip(self.shifts, self.segments[move]):
+            run = mask & segment
+            for _ in range(steps):
+                run &= run >> shift
+                if not run:
+                    break
+            if run:
+                return True
+        return False
+
+    def _run(self, mask, shift):
+        # 結果的第 i 個位元 = 從 i 開始沿此方向有 win_streak 顆連續棋子
+        for _ in range(self.win_streak - 1):
+            mask &= mask >> shift
+            if not mask:
+                return 0
+        return mask
+
+    def is_win(self, player, row=None, col=None):
+        """ player 是否已連線；給定 (row, col) 時只檢查通過該格的連線 """
+        if row is None:
+            return self.has_streak(self.masks[player])
+        return self.has_streak_through(self.masks[player], row * self.board_size + col)
+
+    def wins_with(self, move, player):
+        """ 模擬 player 下在 move (攤平索引) 後是否獲勝，不修改棋盤 """
+        return self.has_streak_through(self.masks[player] | self.move_bit(move), move)
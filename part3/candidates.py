@@ -0,0 +1,77 @@
+import numpy as np
+
+# 快取：同樣的 (board_size, radius) 共用一份鄰居表，建立 / reset 環境時不需重算
+_NEIGHBOUR_CACHE = {}
+
+
+def _neighbour_table(board_size, radius):
+    """ neighbours[move]：move 周圍 radius 格以內的格子 (不含自己) """
+    key = (board_size, radius)
+    if key not in _NEIGHBOUR_CACHE:
+        neighbours = []
+        for move in range(board_size * board_size):
+            row, col = divmod(move, board_size)
+            cells = []
+            for r in range(max(0, row - radius), min(board_size, row + radius + 1)):
+                for c in range(max(0, col - radius), min(board_size, col + radius + 1)):
+                    if (r, c) != (row, col):
+                        cells.append(r * board_size + c)
+            neighbours.append(cells)
+        _NEIGHBOUR_CACHE[key] = neighbours
+    return _NEIGHBOUR_CACHE[key]
+
+
+class CandidateTracker:
+    """
+    【候選步追蹤器 CandidateTracker】
+    五子棋有意義的落子幾乎都在既有棋子附近，因此只維護「距離任一棋子 radius 格以內的空位」。
+    每個格子記錄附近有幾顆棋子 (near)，落子/提子時只更新周圍 (2 * radius + 1)^2 個格子，
+    不需要每次重新掃描整個棋盤。
+    """
+
+    def __init__(self, board_size, radius=2):
+        self.board_size = board_size
+        self.radius = radius
+        self.near = [0] * (board_size * board_size)
+        self.occupied = [False] * (board_size * board_size)
+        self.candidates = set()
+        self.stone_count = 0
+
+        # 預先算好每個格子的鄰居 (不含自己)
+        self.neighbours = _neighbour_table(board_size, radius)
+
+    def load(self, board):
+        """ 從 NumPy 棋盤重建候選集合 """
+        self.near = [0] * (self.board_size * self.board_size)
+        self.occupied = [False] * (self.board_size * self.board_size)
+        self.candidates = set()
+        self.stone_count = 0
+        for move in np.flatnonzero(np.asarray(board).ravel()):
+            self.place(int(move))
+        return self
+
+    def place(self, move):
+        self.occupied[move] = True
+        self.candidates.discard(move)
+        self.stone_count += 1
+        for cell in self.neighbours[move]:
+            self.near[cell] += 1
+            if not self.occupied[cell]:
+                self.candidates.add(cell)
+
+    def remove(self, move):
+        self.occupied[move] = False
+        self.stone_count -= 1
+        if self.near[move] > 0:
+            self.candidates.add(move)
+        for cell in self.neighbours[move]:
+            self.near[cell] -= 1
+            if self.near[cell] == 0:
+                self.candidates.discard(cell)
+
+    def moves(self):
+        """ 依索引排序的候選步；空棋盤時回傳天元 """
+        if self.stone_count == 0:
+            center = self.board_size // 2
+            return [center * self.board_size + center]
+        return sorted(self.candidates)
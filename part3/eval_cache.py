@@ -0,0 +1,174 @@
+# eval_cache.py - 以「對稱標準形」的 Zobrist 雜湊為鍵的盤面評估快取 (LRU，有上限)
+#
+# 測速 (先 cd 到 part3 資料夾)：
+#   python eval_cache.py --board-size 9 --games 3
+
+import argparse
+import random
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from replay_buffer import symmetry_tables
+from transposition import ZobristHasher
+
+# 快取：同樣的 board_size 共用一份對稱鍵值表
+_HASHER_CACHE = {}
+
+# 同一個行程內共用的快取 (tournament 的每個子行程各一份)，以容量區分
+_SHARED_CACHES = {}
+
+
+class SymmetricZobrist:
+    """
+    【對稱 Zobrist 雜湊 SymmetricZobrist】
+    鍵值與環境 / AlphaBetaAgent 的 ZobristHasher 相同，另外為八種旋轉 / 翻轉各排一份鍵值表：
+      sym_keys[p, s, cell] = keys[p][targets[s][cell]] (棋子在對稱 s 之後所在格子的鍵值)
+    hashes[s] 就是對稱 s 之後盤面的雜湊值 (hashes[0] 等於 env.hash)，落子 / 提子只要 XOR 八個值，
+    八個之中最小的就是對稱標準形的鍵，不必把盤面複製成位元組字串比較。
+    """
+
+    def __init__(self, board_size):
+        self.board_size = board_size
+        self.sources, self.targets = symmetry_tables(board_size)
+        keys = np.array(ZobristHasher(board_size).keys, dtype=np.int64)
+        self.sym_keys = keys[:, self.targets]  # (3, 8, n*n)
+
+    def hash_board(self, board):
+        """ 八種對稱下的雜湊值 (長度 8 的陣列) """
+        flat = np.asarray(board).ravel()
+        stones = np.flatnonzero(flat)
+        return np.bitwise_xor.reduce(self.sym_keys[flat[stones], :, stones], axis=0)
+
+    def toggle(self, hashes, move, player):
+        """ 落子或提子後的八個雜湊值 """
+        return hashes ^ self.sym_keys[player, :, move]
+
+    def after_moves(self, hashes, moves, player):
+        """ 每個候選步下了之後的八個雜湊值，形狀 (len(moves), 8) """
+        return hashes[None, :] ^ self.sym_keys[player][:, moves].T
+
+    @staticmethod
+    def canonical(hashes):
+        """ (標準形的雜湊值, 達到它的對稱編號)；hashes 為 (..., 8) 時逐列計算 """
+        symmetry = np.argmin(hashes, axis=-1)
+        return np.take_along_axis(hashes, np.expand_dims(symmetry, -1), axis=-1)[..., 0], symmetry
+
+    def to_canonical(self, move, symmetry):
+        """ 原盤面上的 move 在標準形盤面上的位置 """
+        return int(self.targets[symmetry][move])
+
+    def from_canonical(self, move, symmetry):
+        """ 標準形盤面上的 move 對應回原盤面的位置 """
+        return int(self.sources[symmetry][move])
+
+
+def symmetric_zobrist(board_size):
+    if board_size not in _HASHER_CACHE:
+        _HASHER_CACHE[board_size] = SymmetricZobrist(board_size)
+    return _HASHER_CACHE[board_size]
+
+
+def canonical_key(board):
+    """
+    盤面在八種旋轉 / 翻轉下的標準形鍵：八個對稱雜湊值中最小的一個。
+    互為對稱的盤面得到相同的鍵，評估分數 (只看連線視窗) 也相同。
+    """
+    board = np.asarray(board)
+    hashes = symmetric_zobrist(board.shape[0]).hash_board(board)
+    return int(SymmetricZobrist.canonical(hashes)[0])
+
+
+def shared_cache(max_entries=200000):
+    """ 同一個行程內共用的快取：tournament / main 只把容量傳給 make_agent，所有 Agent (跨對局) 共用同一個 """
+    if max_entries not in _SHARED_CACHES:
+        _SHARED_CACHES[max_entries] = EvaluationCache(max_entries)
+    return _SHARED_CACHES[max_entries]
+
+
+class EvaluationCache:
+    """
+    【盤面評估快取 EvaluationCache】
+    OrderedDict 實作的 LRU：查到就移到最後，超過 max_entries 時從最久沒用到的開始丟掉，記憶體用量有上限。
+    鍵 = (namespace, 對稱標準形的 Zobrist 雜湊, player_id)，namespace 用來區分不同的評分方式 (例如 win_streak 不同)，
+    因此同一個快取可以讓多個 Agent、多場對局共用；鏡像或旋轉後的相同盤面也會命中。
+    Agent 端通常直接用 SymmetricZobrist 增量算出標準形雜湊，再以 key_from_hash 組成鍵。
+    """
+
+    def __init__(self, max_entries=200000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, board, player_id, namespace=None):
+        return namespace, canonical_key(board), player_id
+
+    def key_from_hash(self, canonical_hash, player_id, namespace=None):
+        return namespace, int(canonical_hash), player_id
+
+    def get(self, key):
+        """ 查快取，沒有時回傳 None """
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, board, player_id, compute, namespace=None):
+        """ 有快取就直接回傳，否則呼叫 compute(board, player_id) 並存起來 """
+        key = self.key(board, player_id, namespace)
+        value = self.get(key)
+        if value is None:
+            value = compute(board, player_id)
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
+if __name__ == "__main__":
+    from agents import AlphaBetaAgent, SmartAgent
+    from arena import GomokuArena
+
+    parser = argparse.ArgumentParser(description="Benchmark the symmetric evaluation cache with SmartAgent / AlphaBetaAgent")
+    parser.add_argument('--board-size', type=int, default=9, help='Board size')
+    parser.add_argument('--games', type=int, default=3, help='Games per configuration')
+    parser.add_argument('--max-entries', type=int, default=200000, help='Cache capacity')
+    parser.add_argument('--agent', default="naive", choices=["naive", "incremental", "vectorized", "alphabeta"],
+                        help='SmartAgent evaluator, or the alpha-beta agent')
+    args = parser.parse_args()
+
+    def make(name, shared):
+        if args.agent == "alphabeta":
+            return AlphaBetaAgent(name, n, 5, time_limit=0.2, eval_cache=shared)
+        return SmartAgent(name, n, 5, evaluator=args.agent, eval_cache=shared)
+
+    n = args.board_size
+    cache = EvaluationCache(args.max_entries)
+    for label, shared in (("無快取", None), ("共用快取", cache)):
+        start = time.perf_counter()
+        for game in range(args.games):
+            random.seed(game)  # 兩種設定下的對局相同，差別只在有沒有快取
+            black, white = make("Black", shared), make("White", shared)
+            GomokuArena(black, white, board_size=n, render=False).play_match(verbose=False, seed=game)
+        seconds = time.perf_counter() - start
+        print(f"{label}: {args.games} 場 {seconds:.2f} 秒")
+    total = cache.hits + cache.misses
+    print(f"快取 {len(cache)} 筆，命中 {cache.hits}/{total} ({cache.hits / max(1, total):.1%})，淘汰 {cache.evictions} 筆")
@@ -0,0 +1,270 @@
+import numpy as np
+
+# 快取：同樣的 (board_size, win_streak) 只需要建一次視窗表
+_GEOMETRY_CACHE = {}
+
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+
+def window_geometry(board_size, win_streak):
+    """
+    建立所有「完整落在棋盤內」的連線視窗。
+    回傳 (windows, cell_windows)：
+      windows[w]      = 視窗 w 包含的格子 (攤平索引)
+      cell_windows[c] = 通過格子 c 的所有視窗編號 (四個方向，每方向最多 win_streak 個)
+    """
+    key = (board_size, win_streak)
+    if key in _GEOMETRY_CACHE:
+        return _GEOMETRY_CACHE[key]
+
+    windows = []
+    cell_windows = [[] for _ in range(board_size * board_size)]
+
+    for dr, dc in DIRECTIONS:
+        for r in range(board_size):
+            for c in range(board_size):
+                end_r = r + dr * (win_streak - 1)
+                end_c = c + dc * (win_streak - 1)
+                if not (0 <= end_r < board_size and 0 <= end_c < board_size):
+                    continue
+
+                cells = tuple((r + dr * k) * board_size + (c + dc * k) for k in range(win_streak))
+                for cell in cells:
+                    cell_windows[cell].append(len(windows))
+                windows.append(cells)
+
+    _GEOMETRY_CACHE[key] = (windows, cell_windows)
+    return windows, cell_windows
+
+
+class IncrementalEvaluator:
+    """
+    【增量評估器 IncrementalEvaluator】
+    與 SmartAgent._evaluate_board 算出相同的分數，但把分數拆成「每個視窗」來維護：
+    每個視窗記錄黑白雙方的棋子數，落子/提子時只重算通過該格的視窗 (4 * win_streak 個)，
+    不需要重新掃描整個棋盤。
+
+    window_values[m]：視窗內有 m 顆己方棋子、沒有對手棋子時，_evaluate_line 給的分數。
+    原本的 _evaluate_board 會對視窗內每一顆己方棋子各算一次，因此視窗貢獻 = m * window_values[m]。
+    """
+
+    def __init__(self, board_size, win_streak, window_values):
+        self.board_size = board_size
+        self.win_streak = win_streak
+        self.windows, self.cell_windows = window_geometry(board_size, win_streak)
+
+        # gain[m] = 視窗有 m 顆己方棋子時對總分的貢獻
+        self.gain = [m * window_values[m] for m in range(win_streak + 1)]
+
+        # counts[player][w]：玩家在視窗 w 內的棋子數 (index 0 不使用)
+        n_windows = len(self.windows)
+        self.counts = [None, [0] * n_windows, [0] * n_windows]
+        self.totals = [0, 0, 0]
+        self.cells = [0] * (board_size * board_size)
+
+        # fives[player]：已經連成 win_streak 的視窗數，> 0 代表該玩家獲勝 (搜尋時用來判斷終局)
+        self.fives = [0, 0, 0]
+
+    def load(self, board):
+        """ 從 NumPy 棋盤重建所有視窗計數 (只在開始時做一次完整掃描) """
+        n_windows = len(self.windows)
+        self.counts = [None, [0] * n_windows, [0] * n_windows]
+        self.totals = [0, 0, 0]
+        self.fives = [0, 0, 0]
+        self.cells = [int(v) for v in np.asarray(board).ravel()]
+
+        for player in (1, 2):
+            counts = self.counts[player]
+            for cell, owner in enumerate(self.cells):
+                if owner == player:
+                    for w in self.cell_windows[cell]:
+                        counts[w] += 1
+
+        black, white = self.counts[1], self.counts[2]
+        gain = self.gain
+        for w in range(n_windows):
+            if white[w] == 0:
+                self.totals[1] += gain[black[w]]
+            if black[w] == 0:
+                self.totals[2] += gain[white[w]]
+            if black[w] == self.win_streak:
+                self.fives[1] += 1
+            elif white[w] == self.win_streak:
+                self.fives[2] += 1
+        return self
+
+    def score(self, player_id):
+        """ 等同於 SmartAgent._evaluate_board(board, player_id) """
+        return self.totals[player_id]
+
+    def place(self, move, player_id):
+        """ 在 move (攤平索引) 落子，只更新通過該格的視窗 """
+        opponent_id = 3 - player_id
+        mine_counts = self.counts[player_id]
+        other_counts = self.counts[opponent_id]
+        gain = self.gain
+        totals = self.totals
+
+        for w in self.cell_windows[move]:
+            mine = mine_counts[w]
+            other = other_counts[w]
+            if other == 0:
+                totals[player_id] += gain[mine + 1] - gain[mine]
+            if mine == 0:
+                # 這個視窗原本屬於對手，現在被擋住了
+                totals[opponent_id] -= gain[other]
+            mine_counts[w] = mine + 1
+            if mine + 1 == self.win_streak:
+                self.fives[player_id] += 1
+
+        self.cells[move] = player_id
+
+    def remove(self, move):
+        """ 提起 move 上的棋子 (place 的逆操作) """
+        player_id = self.cells[move]
+        opponent_id = 3 - player_id
+        mine_counts = self.counts[player_id]
+        other_counts = self.counts[opponent_id]
+        gain = self.gain
+        totals = self.totals
+
+        for w in self.cell_windows[move]:
+            mine = mine_counts[w] - 1
+            other = other_counts[w]
+            if other == 0:
+                totals[player_id] -= gain[mine + 1] - gain[mine]
+            if mine == 0:
+                totals[opponent_id] += gain[other]
+            mine_counts[w] = mine
+            if mine + 1 == self.win_streak:
+                self.fives[player_id] -= 1
+
+        self.cells[move] = 0
+
+    def totals_after(self, move, player_id):
+        """ 不修改狀態，回傳「player_id 下在 move 之後」雙方的總分 (mine, opponent) """
+        opponent_id = 3 - player_id
+        mine_counts = self.counts[player_id]
+        other_counts = self.counts[opponent_id]
+        gain = self.gain
+        mine_total = self.totals[player_id]
+        other_total = self.totals[opponent_id]
+
+        for w in self.cell_windows[move]:
+            mine = mine_counts[w]
+            other = other_counts[w]
+            if other == 0:
+                mine_total += gain[mine + 1] - gain[mine]
+            if mine == 0:
+                other_total -= gain[other]
+
+        return mine_total, other_total
+
+
+def window_index_matrix(board_size, win_streak):
+    """
+    用 strided view 一次取出所有方向的視窗，回傳 shape = (n_windows, win_streak) 的格子索引矩陣。
+    橫/直向用 sliding_window_view，斜向則從 (win_streak x win_streak) 的方塊視窗中取對角線。
+    """
+    key = ("matrix", board_size, win_streak)
+    if key in _GEOMETRY_CACHE:
+        return _GEOMETRY_CACHE[key]
+
+    if win_streak > board_size:
+        # 棋盤比連線長度小：沒有任何視窗 (sliding_window_view 不接受比輸入大的視窗)
+        matrix = np.zeros((0, win_streak), dtype=np.intp)
+        _GEOMETRY_CACHE[key] = matrix
+        return matrix
+
+    index = np.arange(board_size * board_size).reshape(board_size, board_size)
+    sliding = np.lib.stride_tricks.sliding_window_view
+    k = np.arange(win_streak)
+
+    horizontal = sliding(index, win_streak, axis=1).reshape(-1, win_streak)
+    vertical = sliding(index, win_streak, axis=0).reshape(-1, win_streak)
+    blocks = sliding(index, (win_streak, win_streak))
+    diagonal = blocks[:, :, k, k].reshape(-1, win_streak)
+    anti_diagonal = blocks[:, :, k, win_streak - 1 - k].reshape(-1, win_streak)
+
+    matrix = np.concatenate([horizontal, vertical, diagonal, anti_diagonal])
+    _GEOMETRY_CACHE[key] = matrix
+    return matrix
+
+
+class VectorizedEvaluator:
+    """
+    【向量化評估器 VectorizedEvaluator】
+    一次把整個棋盤的所有視窗取出 (n_windows x win_streak)，批次計算雙方棋子數，
+    再用 bincount 把每個視窗的分數變化分配給它包含的空格，一次算出所有候選步的分數。
+    分數與 SmartAgent 的評分表完全相同，可直接替換來比較速度。
+    """
+
+    def __init__(self, board_size, win_streak, window_values):
+        self.board_size = board_size
+        self.win_streak = win_streak
+        self.window_cells = window_index_matrix(board_size, win_streak)
+        self.gain = np.array([m * window_values[m] for m in range(win_streak + 1)] + [0], dtype=np.int64)
+
+    def score_moves(self, board, moves, my_id):
+        """ 回傳每個 move 的分數 MyScore - OpponentScore * 0.9 (與 SmartAgent 逐步模擬的結果相同) """
+        opponent_id = 3 - my_id
+        n_cells = self.board_size * self.board_size
+
+        lines = np.asarray(board).ravel()[self.window_cells]
+        mine = np.count_nonzero(lines == my_id, axis=1)
+        other = np.count_nonzero(lines == opponent_id, axis=1)
+
+        # 目前盤面的總分
+        my_total = int(self.gain[mine][other == 0].sum())
+        other_total = int(self.gain[other][mine == 0].sum())
+
+        # 在某個空格落子後，每個包含它的視窗帶來的分數變化
+        my_delta = np.where(other == 0, self.gain[mine + 1] - self.gain[mine], 0)
+        other_delta = np.where(mine == 0, -self.gain[other], 0)
+
+        empty = lines == 0
+        targets = self.window_cells[empty]
+        my_gain = np.bincount(targets, weights=np.broadcast_to(my_delta[:, None], empty.shape)[empty], minlength=n_cells)
+        other_gain = np.bincount(targets, weights=np.broadcast_to(other_delta[:, None], empty.shape)[empty], minlength=n_cells)
+
+        moves = np.asarray(moves, dtype=np.intp)
+        my_after = my_total + my_gain[moves].astype(np.int64)
+        other_after = other_total + other_gain[moves].astype(np.int64)
+        return my_after - other_after * 0.9
+
+
+if __name__ == "__main__":
+    # 比較三種評估方式的結果與速度：python evaluator.py
+    import time
+    from agents import SmartAgent
+
+    rng = np.random.default_rng(0)
+    for size in (9, 15, 19):
+        board = np.zeros((size, size), dtype=int)
+        stones = rng.choice(size * size, size * size // 4, replace=False)
+        for i, cell in enumerate(stones):
+            board.flat[cell] = 1 + i % 2
+        moves = np.where(board.flatten() == 0)[0].tolist()
+
+        timings = {}
+        results = {}
+        for mode in ("naive", "incremental", "vectorized"):
+            agent = SmartAgent("bench", size, 5, evaluator=mode)
+            start = time.perf_counter()
+            results[mode] = [float(s) for s in agent._score_moves(board, moves, 1, 2)]
+            timings[mode] = time.perf_counter() - start
+
+        same = results["naive"] == results["incremental"] == results["vectorized"]
+        print(f"{size}x{size}: " + ", ".join(f"{m}={t * 1000:.2f}ms" for m, t in timings.items()) + f", 分數一致={same}")
+
+    # 其他連線長度 (3 / 4 / 6)：三種評估方式的分數也必須一致，而且不會因評分表缺少對應的鍵而出錯
+    board = np.zeros((9, 9), dtype=int)
+    stones = rng.choice(81, 20, replace=False)
+    for i, cell in enumerate(stones):
+        board.flat[cell] = 1 + i % 2
+    moves = np.where(board.flatten() == 0)[0].tolist()
+    for win_streak in (3, 4, 6):
+        results = {mode: [float(s) for s in SmartAgent("check", 9, win_streak, evaluator=mode)._score_moves(board, moves, 1, 2)]
+                   for mode in ("naive", "incremental", "vectorized")}
+        same = results["naive"] == results["incremental"] == results["vectorized"]
+        print(f"win_streak={win_streak}: 分數一致={same}")
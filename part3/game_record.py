@@ -0,0 +1,206 @@
+# game_record.py - 精簡的二進位對局紀錄：串流附加寫入、memory-map 延遲讀取、重播到 GomokuEnv
+#
+# 看紀錄檔內容 (先 cd 到 part3 資料夾)：
+#   python game_record.py games.gmr --show 3
+
+import argparse
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+# 每場對局一筆紀錄，直接接在檔案尾端 (沒有檔案層級的檔頭，多次執行可附加到同一個檔案)：
+#   固定長度檔頭 + 黑方名稱 + 白方名稱 (UTF-8) + 落子序列
+# 落子以攤平索引存成 uint8 (棋盤 <= 16x16) 或 uint16，一場 9x9 對局通常不到 80 bytes。
+RECORD_MAGIC = b"GR"
+RECORD_HEADER = struct.Struct("<2sBBbBBBQH")  # magic, board_size, win_streak, winner, 每步位元組數, 黑方名稱長度, 白方名稱長度, seed, 步數
+NO_SEED = 2 ** 64 - 1  # seed=None 時寫入的值
+
+GameRecord = namedtuple("GameRecord", ["board_size", "win_streak", "black", "white", "seed", "winner", "moves"])
+
+
+def _move_dtype(move_bytes):
+    return np.dtype("<u1") if move_bytes == 1 else np.dtype("<u2")
+
+
+def encode_game(moves, winner, board_size, win_streak=5, black="", white="", seed=None):
+    """ 把一場對局編碼成一筆紀錄 (bytes) """
+    move_bytes = 1 if board_size * board_size <= 256 else 2
+    black_bytes = black.encode("utf-8")[:255]
+    white_bytes = white.encode("utf-8")[:255]
+    moves = np.asarray(moves, dtype=_move_dtype(move_bytes))
+    header = RECORD_HEADER.pack(RECORD_MAGIC, board_size, win_streak, winner, move_bytes,
+                                len(black_bytes), len(white_bytes), NO_SEED if seed is None else seed, len(moves))
+    return header + black_bytes + white_bytes + moves.tobytes()
+
+
+class GameRecordWriter:
+    """
+    【對局紀錄寫入器 GameRecordWriter】
+    以附加模式開啟紀錄檔，每場對局結束時寫入一筆紀錄。
+    可以直接當作 GomokuArena.play_match 的 recorder，也可以用 with 自動關檔。
+    """
+
+    def __init__(self, path, board_size=9, win_streak=5, flush_every=1):
+        self.path = path
+        self.board_size = board_size
+        self.win_streak = win_streak
+        self.flush_every = flush_every  # 每幾場 flush 一次 (大量對戰時調大，減少系統呼叫)
+        self.n_written = 0
+        self._file = open(path, "ab")
+
+    def write_game(self, moves, winner, black="", white="", seed=None):
+        self._file.write(encode_game(moves, winner, self.board_size, self.win_streak, black, white, seed))
+        self.n_written += 1
+        if self.flush_every and self.n_written % self.flush_every == 0:
+            self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GameRecordReader:
+    """
+    【對局紀錄讀取器 GameRecordReader】
+    以 mmap 唯讀開啟紀錄檔，迭代時才逐筆解析檔頭；落子序列是直接指向 mmap 的 NumPy 視圖，不複製。
+    因此即使檔案有上百萬場對局，也只會讀到實際用到的部分 (要在關檔後保留落子序列請自行 .copy())。
+    需要隨機存取 (reader[i] / len(reader)) 時才掃一次所有檔頭建立位移索引。
+    檔尾若有寫到一半的紀錄 (例如程式中斷) 會被忽略。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mmap = None
+        self._offsets = None
+
+    def _open(self):
+        if self._mmap is None:
+            size = os.path.getsize(self.path)
+            if size == 0:
+                self._mmap = b""
+            else:
+                with open(self.path, "rb") as f:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def _read_at(self, offset):
+        """ 解析 offset 位置的紀錄，回傳 (GameRecord, 下一筆的 offset)；資料不完整時回傳 (None, None) """
+        buffer = self._open()
+        end = offset + RECORD_HEADER.size
+        if end > len(buffer):
+            return None, None
+        magic, board_size, win_streak, winner, move_bytes, black_len, white_len, seed, n_moves = \
+            RECORD_HEADER.unpack_from(buffer, offset)
+        if magic != RECORD_MAGIC:
+            raise ValueError(f"{self.path} 在位移 {offset} 處不是對局紀錄")
+
+        black = bytes(buffer[end:end + black_len]).decode("utf-8")
+        end += black_len
+        white = bytes(buffer[end:end + white_len]).decode("utf-8")
+        end += white_len
+        next_offset = end + n_moves * move_bytes
+        if next_offset > len(buffer):
+            return None, None
+        moves = np.frombuffer(buffer, dtype=_move_dtype(move_bytes), count=n_moves, offset=end)
+        record = GameRecord(board_size, win_streak, black, white, None if seed == NO_SEED else seed, winner, moves)
+        return record, next_offset
+
+    def __iter__(self):
+        offset = 0
+        while True:
+            record, offset = self._read_at(offset)
+            if record is None:
+                return
+            yield record
+
+    def offsets(self):
+        """ 每筆紀錄在檔案中的位移 (只掃檔頭，第一次呼叫時建立) """
+        if self._offsets is None:
+            buffer = self._open()
+            offsets = []
+            offset = 0
+            while offset + RECORD_HEADER.size <= len(buffer):
+                header = RECORD_HEADER.unpack_from(buffer, offset)
+                if header[0] != RECORD_MAGIC:
+                    raise ValueError(f"{self.path} 在位移 {offset} 處不是對局紀錄")
+                next_offset = offset + RECORD_HEADER.size + header[5] + header[6] + header[8] * header[4]
+                if next_offset > len(buffer):
+                    break
+                offsets.append(offset)
+                offset = next_offset
+            self._offsets = offsets
+        return self._offsets
+
+    def __len__(self):
+        return len(self.offsets())
+
+    def __getitem__(self, index):
+        return self._read_at(self.offsets()[index])[0]
+
+    def close(self):
+        if isinstance(self._mmap, mmap.mmap):
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # 還有落子序列的視圖指向 mmap，等它們被回收時才會真正釋放
+        self._mmap = None
+        self._offsets = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_mmap"] = None  # mmap 不傳給子行程，子行程自己再開一次
+        return state
+
+
+def replay_game(record, env=None, upto=None, render_mode=None):
+    """
+    把紀錄的前 upto 步 (預設全部) 直接下到 GomokuEnv，不需要重跑 Agent。
+    env 為 None 時建立新的環境；回傳重播後的環境 (env.move_history / undo 都可以繼續使用)。
+    """
+    from oop_project_env import GomokuEnv
+
+    if env is None:
+        env = GomokuEnv(board_size=record.board_size, win_streak=record.win_streak, render_mode=render_mode)
+    env.reset(seed=record.seed)
+    for move in record.moves[:upto]:
+        env.step(int(move))
+    return env
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect a Gomoku game-record file")
+    parser.add_argument('path', help='Game-record file')
+    parser.add_argument('--show', type=int, default=0, help='Replay and print the first N games')
+    args = parser.parse_args()
+
+    with GameRecordReader(args.path) as reader:
+        n_games = 0
+        n_moves = 0
+        outcomes = [0, 0, 0]
+        for record in reader:
+            if n_games < args.show:
+                env = replay_game(record)
+                print(f"\n第 {n_games} 場: {record.black} (黑) vs {record.white} (白)，seed={record.seed}，"
+                      f"勝方={record.winner}，共 {len(record.moves)} 步")
+                print(env.board)
+            n_games += 1
+            n_moves += len(record.moves)
+            outcomes[record.winner] += 1
+
+    print(f"共 {n_games} 場、{n_moves} 步 (黑勝 {outcomes[1]}、白勝 {outcomes[2]}、和局 {outcomes[0]})，"
+          f"檔案大小 {os.path.getsize(args.path)} bytes")
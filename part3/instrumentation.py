@@ -0,0 +1,125 @@
+# instrumentation.py - 對戰效能紀錄：每步思考時間、Agent 搜尋統計，輸出 JSON / CSV 與百分位數摘要
+
+import csv
+import json
+
+import numpy as np
+
+PERCENTILES = (50, 90, 99)
+
+
+class MatchInstrumentation:
+    """
+    【對戰效能紀錄 MatchInstrumentation】
+    傳給 GomokuArena.play_match(instrumentation=...)，記錄：
+      moves：每一步一筆 (第幾場、第幾手、Agent 名稱、執子顏色、choose_action 花的秒數、Agent 的搜尋統計)
+      games：每場一筆 (雙方名稱、勝方、seed、步數、雙方思考總秒數)
+    summary() 依 Agent 彙總：步數、思考時間的平均 / p50 / p90 / p99 / 最大值，以及各項搜尋統計的總和與平均。
+    """
+
+    def __init__(self):
+        self.moves = []
+        self.games = []
+        self._game_start = 0  # 目前這場的第一步在 self.moves 中的位置
+
+    def record_move(self, agent_name, player, seconds, stats=None):
+        row = {
+            "game": len(self.games),
+            "ply": len(self.moves) - self._game_start,
+            "agent": agent_name,
+            "player": player,
+            "seconds": seconds,
+        }
+        if stats:
+            row.update(stats)
+        self.moves.append(row)
+
+    def end_game(self, black, white, winner, seed=None):
+        rows = self.moves[self._game_start:]
+        self.games.append({
+            "game": len(self.games),
+            "black": black,
+            "white": white,
+            "winner": winner,
+            "seed": seed,
+            "moves": len(rows),
+            "black_seconds": sum(move["seconds"] for move in rows if move["player"] == 1),
+            "white_seconds": sum(move["seconds"] for move in rows if move["player"] == 2),
+        })
+        self._game_start = len(self.moves)
+
+    def merge(self, other):
+        """ 合併另一份紀錄 (例如子行程各自記錄的對局)，場次編號接在後面 """
+        offset = len(self.games)
+        for move in other.moves:
+            self.moves.append({**move, "game": move["game"] + offset})
+        for game in other.games:
+            self.games.append({**game, "game": game["game"] + offset})
+        self._game_start = len(self.moves)
+
+    def summary(self):
+        """ {agent 名稱: {"moves", "total_seconds", "mean_seconds", "p50_seconds", ..., 各項統計}} """
+        by_agent = {}
+        for move in self.moves:
+            by_agent.setdefault(move["agent"], []).append(move)
+
+        summary = {}
+        for agent, rows in by_agent.items():
+            seconds = np.array([row["seconds"] for row in rows])
+            entry = {
+                "moves": len(rows),
+                "total_seconds": float(seconds.sum()),
+                "mean_seconds": float(seconds.mean()),
+            }
+            for q, value in zip(PERCENTILES, np.percentile(seconds, PERCENTILES)):
+                entry[f"p{q}_seconds"] = float(value)
+            entry["max_seconds"] = float(seconds.max())
+
+            # 數值型的搜尋統計 (例如 nodes、tt_hits) 取總和與平均，每步平均只算有回報該項的步
+            counters = {}
+            for row in rows:
+                for key, value in row.items():
+                    if key in ("game", "ply", "agent", "player", "seconds"):
+                        continue
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        counters.setdefault(key, []).append(value)
+            for key, values in sorted(counters.items()):
+                entry[f"{key}_total"] = float(np.sum(values))
+                entry[f"{key}_mean"] = float(np.mean(values))
+            summary[agent] = entry
+        return summary
+
+    def to_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"summary": self.summary(), "games": self.games, "moves": self.moves}, f,
+                      ensure_ascii=False, indent=1)
+
+    def to_csv(self, path, table="moves"):
+        """ table: "moves" (每步一列)、"games" (每場一列) 或 "summary" (每個 Agent 一列) """
+        if table == "summary":
+            rows = [{"agent": agent, **entry} for agent, entry in self.summary().items()]
+        elif table == "games":
+            rows = self.games
+        else:
+            rows = self.moves
+
+        fields = []  # 各 Agent 回報的統計項目不同，欄位取聯集
+        for row in rows:
+            for key in row:
+                if key not in fields:
+                    fields.append(key)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def print_summary(self):
+        summary = self.summary()
+        print(f"\n{'Agent':<16}{'步數':>8}{'平均(ms)':>10}{'p50':>9}{'p90':>9}{'p99':>9}{'最大':>9}")
+        for agent, entry in summary.items():
+            print(f"{agent:<16}{entry['moves']:>8}{entry['mean_seconds'] * 1000:>10.2f}"
+                  f"{entry['p50_seconds'] * 1000:>9.2f}{entry['p90_seconds'] * 1000:>9.2f}"
+                  f"{entry['p99_seconds'] * 1000:>9.2f}{entry['max_seconds'] * 1000:>9.2f}")
+            counters = [key[:-len("_mean")] for key in entry if key.endswith("_mean") and key != "mean_seconds"]
+            if counters:
+                print("    每步平均: " + ", ".join(f"{key}={entry[key + '_mean']:.1f}" for key in counters))
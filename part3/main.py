@@ -1,30 +1,59 @@
-# main.py - 最終版本 (使用 SmartAgent 互相對戰)
+# main.py - 最終版本 (預設使用 SmartAgent 互相對戰)
+#
+# 用法 (先 cd 到 part3 資料夾)：
+#   python main.py                                    # 9x9，SmartAgent 互打
+#   python main.py --board-size 15                    # 標準 15x15
+#   python main.py --board-size 19 --black alphabeta --white mcts --time-budget 0.5
+
+import argparse
 
-from agents import RandomAgent, GreedyAgent, SmartAgent # 確保導入 SmartAgent
 from arena import GomokuArena
+from tournament import AGENT_TYPES, book_spec, budget_kwargs, cache_kwargs, make_agent
 
 def main():
+    parser = argparse.ArgumentParser(description="Gomoku AI arena")
+    parser.add_argument('--board-size', type=int, default=9, help='Board size (15 is standard, 19 also supported)')
+    parser.add_argument('--win-streak', type=int, default=5, help='Stones in a row needed to win')
+    parser.add_argument('--black', default="smart", choices=sorted(AGENT_TYPES), help='Agent playing black (moves first)')
+    parser.add_argument('--white', default="smart", choices=sorted(AGENT_TYPES), help='Agent playing white')
+    parser.add_argument('--time-budget', type=float, default=None, help='Per-move time budget in seconds for search agents')
+    parser.add_argument('--eval-cache', type=int, default=0, metavar='ENTRIES',
+                        help='Share a symmetry-aware evaluation cache of this many entries between both players (smart/alphabeta)')
+    parser.add_argument('--book', default=None, metavar='PATH', help='Let both players play from this opening book first')
+    parser.add_argument('--delay', type=float, default=0.5, help='Pause after each move (seconds)')
+    parser.add_argument('--no-render', action='store_true', help='Run without the Pygame window')
+    args = parser.parse_args()
+
     print("=== 初始化五子棋對戰系統 ===")
 
     # 1. 設定遊戲參數
-    # 建議先用 9x9 測試，標準是 15x15，太小會很容易平手
-    BOARD_SIZE = 9  
-    WIN_STREAK = 5  
+    # 建議先用 9x9 測試，標準是 15x15，太小會很容易平手；15x15 / 19x19 建議搭配 --time-budget 限制每步思考時間
+    BOARD_SIZE = args.board_size
+    WIN_STREAK = args.win_streak
 
     # 2. 建立兩個 AI 選手
-    # 選手 1 (黑棋，先手)：使用智慧型策略
-    player1 = SmartAgent(name="AI_Black", board_size=BOARD_SIZE, win_streak=WIN_STREAK)
-
-    # 選手 2 (白棋，後手)：使用智慧型策略
-    player2 = SmartAgent(name="AI_White", board_size=BOARD_SIZE, win_streak=WIN_STREAK)
+    # 選手 1 (黑棋，先手) / 選手 2 (白棋，後手)：預設都使用智慧型策略
+    # --eval-cache：兩位選手共用同一個評估快取；--book：開局先查開局庫
+    player1 = make_agent(book_spec(("AI_Black", AGENT_TYPES[args.black][0],
+                                    cache_kwargs(args.black, budget_kwargs(args.black, args.time_budget), args.eval_cache)),
+                                   args.book),
+                         BOARD_SIZE, WIN_STREAK)
+    player2 = make_agent(book_spec(("AI_White", AGENT_TYPES[args.white][0],
+                                    cache_kwargs(args.white, budget_kwargs(args.white, args.time_budget), args.eval_cache)),
+                                   args.book),
+                         BOARD_SIZE, WIN_STREAK)
 
     # 3. 建立競技場 (Arena)
     # 不再傳遞 root，因為 GomokuEnv 現在是 Pygame 版本
-    arena = GomokuArena(player1, player2, board_size=BOARD_SIZE, win_streak=WIN_STREAK, render=True)
+    arena = GomokuArena(player1, player2, board_size=BOARD_SIZE, win_streak=WIN_STREAK, render=not args.no_render)
 
     # 4. 開始比賽
     # delay=0.5 代表每走一步會暫停 0.5 秒
-    arena.play_match(delay=0.5)
+    arena.play_match(delay=args.delay if not args.no_render else 0)
+
+    for player in (player1, player2):
+        if hasattr(player, "close"):
+            player.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
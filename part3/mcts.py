@@ -0,0 +1,386 @@
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from agents import GreedyAgent
+from bitboard import BitBoard
+from candidates import CandidateTracker
+from evaluator import window_geometry
+
+# 快取：每個 (board_size, win_streak) 的「通過某格的所有連線格子」
+_LINE_CACHE = {}
+
+
+def _line_cells(board_size, win_streak):
+    """ line_cells[move]：與 move 同在某個連線視窗內的其他格子 (快速模擬時找致勝/必擋點用) """
+    key = (board_size, win_streak)
+    if key not in _LINE_CACHE:
+        windows, cell_windows = window_geometry(board_size, win_streak)
+        _LINE_CACHE[key] = [
+            sorted({cell for w in cell_windows[move] for cell in windows[w]} - {move})
+            for move in range(board_size * board_size)
+        ]
+    return _LINE_CACHE[key]
+
+
+class _Node:
+    """ 搜尋樹節點：player = 走到這個節點的那一方，wins 以 player 的角度計算 """
+    __slots__ = ("move", "parent", "player", "children", "untried", "visits", "wins", "winner")
+
+    def __init__(self, move, parent, player, untried, winner=None):
+        self.move = move
+        self.parent = parent
+        self.player = player
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+        self.winner = winner  # None = 尚未結束，0 = 和局，1/2 = 勝方
+
+    def best_child(self, exploration):
+        log_visits = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda child: child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits),
+        )
+
+
+class MCTSSearch:
+    """
+    【蒙地卡羅樹搜尋 MCTSSearch】
+    單一行程內的 UCT 搜尋。位元棋盤負責勝負判斷，CandidateTracker 負責限制樹的展開範圍 (棋子附近的空位)。
+    rollout 使用快速的隨機 (RandomAgent 風格) 或貪婪 (GreedyAgent 風格：能贏就贏、該擋就擋) 策略。
+    """
+
+    def __init__(self, board, player, win_streak=5, exploration=1.4, playout="greedy", seed=None):
+        board = np.asarray(board)
+        self.board_size = board.shape[0]
+        self.win_streak = win_streak
+        self.player = player
+        self.exploration = exploration
+        self.playout = playout
+        self.rng = random.Random(seed)
+
+        self.bitboard = BitBoard.from_array(board, win_streak)
+        self.tracker = CandidateTracker(self.board_size).load(board)
+        self.empties = np.flatnonzero(board.ravel() == 0).tolist()
+        self.line_cells = _line_cells(self.board_size, win_streak)
+
+        untried = self.tracker.moves()
+        self.rng.shuffle(untried)
+        self.root = _Node(None, None, 3 - player, untried)
+        self.simulations = 0
+
+    def run(self, n_simulations=None, time_limit=None):
+        """ 執行模擬直到次數或時間用完 (兩者皆未指定時跑 1000 次) """
+        if n_simulations is None and time_limit is None:
+            n_simulations = 1000
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+        done = 0
+        slowest = 0.0  # 目前最慢的一次模擬：剩下的時間不夠再跑一次就提早停，避免超出時間預算
+        while n_simulations is None or done < n_simulations:
+            now = time.perf_counter()
+            if deadline is not None and now + slowest > deadline:
+                break
+            self._simulate()
+            slowest = max(slowest, time.perf_counter() - now)
+            done += 1
+        self.simulations += done
+        return self.root_statistics()
+
+    def root_statistics(self):
+        """ {move: (visits, wins)}，wins 以 root 玩家的角度計算 """
+        return {child.move: (child.visits, child.wins) for child in self.root.children}
+
+    def _simulate(self):
+        masks = list(self.bitboard.masks)
+        path = []
+        node = self.root
+
+        # 1. Selection：節點全部展開後，依 UCT 往下走
+        while node.winner is None and not node.untried and node.children:
+            node = node.best_child(self.exploration)
+            masks[node.player] |= self.bitboard.move_bit(node.move)
+            self.tracker.place(node.move)
+            path.append(node.move)
+
+        # 2. Expansion：展開一個尚未嘗試的步
+        if node.winner is None and node.untried:
+            move = node.untried.pop()
+            player = 3 - node.player
+            masks[player] |= self.bitboard.move_bit(move)
+            self.tracker.place(move)
+            path.append(move)
+
+            winner = None
+            if self.bitboard.has_streak_through(masks[player], move):
+                winner = player
+            elif len(path) == len(self.empties):
+                winner = 0
+            untried = [] if winner is not None else self.tracker.moves()
+            self.rng.shuffle(untried)
+            child = _Node(move, node, player, untried, winner)
+            node.children.append(child)
+            node = child
+
+        for move in reversed(path):
+            self.tracker.remove(move)
+
+        # 3. Rollout：從這個節點快速下到終局
+        if node.winner is not None:
+            winner = node.winner
+        else:
+            played = set(path)
+            empties = [cell for cell in self.empties if cell not in played]
+            winner = self._rollout(masks, empties, 3 - node.player, path[-2:] if len(path) >= 2 else path)
+
+        # 4. Backpropagation
+        while node is not None:
+            node.visits += 1
+            if winner == node.player:
+                node.wins += 1
+            elif winner == 0:
+                node.wins += 0.5
+            node = node.parent
+
+    def _rollout(self, masks, empties, player, recent):
+        bitboard = self.bitboard
+        rng = self.rng
+        threshold = self.win_streak - 1
+
+        # last_move[p]：玩家 p 最後一步，用來找「能贏 / 該擋」的點
+        last_move = [None, None, None]
+        for move in recent:
+            owner = 1 if masks[1] & bitboard.move_bit(move) else 2
+            last_move[owner] = move
+
+        while empties:
+            move = None
+            if self.playout == "greedy":
+                move = self._urgent_move(masks, player, last_move[player], threshold)
+                if move is None:
+                    move = self._urgent_move(masks, 3 - player, last_move[3 - player], threshold)
+
+            if move is None:
+                index = rng.randrange(len(empties))
+                move = empties[index]
+                empties[index] = empties[-1]
+                empties.pop()
+            else:
+                empties.remove(move)
+
+            masks[player] |= bitboard.move_bit(move)
+            if bitboard.has_streak_through(masks[player], move):
+                return player
+            last_move[player] = move
+            player = 3 - player
+
+        return 0
+
+    def _urgent_move(self, masks, owner, last, threshold):
+        """ owner 最後一步所在的連線上，若有一步就能連成 win_streak 的空位就回傳它 """
+        if last is None:
+            return None
+        bitboard = self.bitboard
+        mask = masks[owner]
+        occupied = masks[1] | masks[2]
+        # 先用 popcount 過濾：附近棋子不夠多就不可能有致勝點
+        segments = bitboard.segments[last]
+        if max(bin(mask & segment).count("1") for segment in segments) < threshold:
+            return None
+        for cell in self.line_cells[last]:
+            bit = bitboard.move_bit(cell)
+            if not occupied & bit and bitboard.has_streak_through(mask | bit, cell):
+                return cell
+        return None
+
+
+def _root_worker(args):
+    """ Root parallelism：每個行程各自建一棵樹，回傳根節點統計 (必須是模組層級函式才能被 pickle) """
+    board, player, win_streak, n_simulations, time_limit, exploration, playout, seed = args
+    search = MCTSSearch(board, player, win_streak, exploration, playout, seed)
+    return search.run(n_simulations, time_limit)
+
+
+def _rollout_worker(args):
+    """ Leaf parallelism：從同一個葉節點盤面做多次 rollout，回傳 (player 勝場, 和局數) """
+    board, player, win_streak, n_rollouts, playout, seed = args
+    search = MCTSSearch(board, player, win_streak, playout=playout, seed=seed)
+    wins = draws = 0
+    for _ in range(n_rollouts):
+        winner = search._rollout(list(search.bitboard.masks), list(search.empties), player, [])
+        if winner == player:
+            wins += 1
+        elif winner == 0:
+            draws += 1
+    return wins, draws
+
+
+class MCTSAgent(GreedyAgent):
+    """
+    【蒙地卡羅樹搜尋 AI MCTSAgent】
+    以 UCT 選擇節點，rollout 分散到多個行程執行：
+      parallelism="root"：每個行程各跑一棵獨立的樹，最後加總根節點的拜訪次數 (擴充性最好)
+      parallelism="leaf"：主行程維護一棵樹，每個葉節點的多次 rollout 交給行程池同時執行
+
+    n_simulations: 每步模擬次數；time_limit: 每步思考秒數 (兩者可擇一或同時設定，先到先停)
+    n_workers: 行程數，預設為 CPU 核心數；1 代表不開行程池
+    playout: "random" 或 "greedy"
+    """
+    candidate_radius = 2
+
+    def __init__(self, name, board_size, win_streak, n_simulations=2000, time_limit=None, n_workers=None,
+                 parallelism="root", playout="greedy", exploration=1.4, seed=None):
+        super().__init__(name, board_size, win_streak, backend="bitboard")
+        self.n_simulations = n_simulations
+        self.time_limit = time_limit
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.parallelism = parallelism
+        self.playout = playout
+        self.exploration = exploration
+        # 未指定 seed 時從全域 random 取種子，讓 random.seed(...) 也能重現 MCTS 的結果
+        self.rng = random.Random(seed if seed is not None else random.getrandbits(64))
+        self._pool = None
+
+    def choose_action(self, board, valid_moves):
+        if valid_moves.size == 0:
+            return None
+
+        start = time.perf_counter()
+        valid_moves_list = valid_moves.tolist()
+        my_id = 2 if np.sum(board == 1) > np.sum(board == 2) else 1
+        self.stats = {"simulations": 0}
+
+        # 一步必勝 / 一步必擋不需要模擬
+        for player_id in (my_id, 3 - my_id):
+            urgent = self._find_winning_move(board, valid_moves_list, player_id)
+            if urgent is not None:
+                return urgent
+
+        if not np.any(board):
+            center = self.board_size // 2
+            return center * self.board_size + center
+
+        # 搜尋可用的時間 = time_limit 扣掉前面檢查已花的時間
+        self._time_left = None if self.time_limit is None else max(0.0, self.time_limit - (time.perf_counter() - start))
+        board = np.array(board)
+        if self.parallelism == "leaf" and self.n_workers > 1:
+            stats = self._search_leaf_parallel(board, my_id)
+        else:
+            stats = self._search_root_parallel(board, my_id)
+
+        self.stats = {"simulations": sum(visits for visits, _ in stats.values())}
+        valid_set = set(valid_moves_list)
+        stats = {move: value for move, value in stats.items() if move in valid_set}
+        if not stats:
+            return self.rng.choice(valid_moves_list)
+        return max(stats, key=lambda move: stats[move][0])
+
+    def _search_root_parallel(self, board, my_id):
+        if self.n_workers <= 1:
+            search = MCTSSearch(board, my_id, self.win_streak, self.exploration, self.playout, self.rng.random())
+            return search.run(self.n_simulations, self._time_left)
+
+        per_worker = None if self.n_simulations is None else max(1, self.n_simulations // self.n_workers)
+        jobs = [
+            (board, my_id, self.win_streak, per_worker, self._time_left, self.exploration, self.playout,
+             self.rng.random())
+            for _ in range(self.n_workers)
+        ]
+        merged = {}
+        for stats in self._get_pool().map(_root_worker, jobs):
+            for move, (visits, wins) in stats.items():
+                total_visits, total_wins = merged.get(move, (0, 0.0))
+                merged[move] = (total_visits + visits, total_wins + wins)
+        return merged
+
+    def _search_leaf_parallel(self, board, my_id):
+        """ 主行程做 selection/expansion，每個新葉節點的 rollout 一次分給所有行程 """
+        search = MCTSSearch(board, my_id, self.win_streak, self.exploration, self.playout, self.rng.random())
+        pool = self._get_pool()
+        rollouts_per_worker = 8
+        deadline = None if self._time_left is None else time.perf_counter() + self._time_left
+        budget = self.n_simulations
+        slowest = 0.0
+
+        while budget is None or search.simulations < budget:
+            now = time.perf_counter()
+            if deadline is not None and now + slowest > deadline:
+                break
+
+            node, leaf_board = self._select_leaf(search, board)
+            if node.winner is not None:
+                wins = rollouts_per_worker * self.n_workers if node.winner == node.player else 0
+                draws = rollouts_per_worker * self.n_workers if node.winner == 0 else 0
+            else:
+                to_move = 3 - node.player
+                jobs = [(leaf_board, to_move, self.win_streak, rollouts_per_worker, self.playout, self.rng.random())
+                        for _ in range(self.n_workers)]
+                results = list(pool.map(_rollout_worker, jobs))
+                losses = sum(w for w, _ in results)   # to_move 贏 = node.player 輸
+                draws = sum(d for _, d in results)
+                wins = rollouts_per_worker * self.n_workers - losses - draws
+
+            n_rollouts = rollouts_per_worker * self.n_workers
+            search.simulations += n_rollouts
+            # 以 node.player 的角度回傳，往上每層交換視角
+            score = wins + 0.5 * draws
+            while node is not None:
+                node.visits += n_rollouts
+                node.wins += score
+                score = n_rollouts - score
+                node = node.parent
+            slowest = max(slowest, time.perf_counter() - now)
+
+        return search.root_statistics()
+
+    def _select_leaf(self, search, board):
+        """ 走 selection + expansion，回傳新節點與對應的 NumPy 盤面 """
+        leaf_board = board.copy()
+        node = search.root
+        path = []
+        while node.winner is None and not node.untried and node.children:
+            node = node.best_child(search.exploration)
+            leaf_board.flat[node.move] = node.player
+            path.append(node.move)
+
+        if node.winner is None and node.untried:
+            move = node.untried.pop()
+            player = 3 - node.player
+            leaf_board.flat[move] = player
+            path.append(move)
+            winner = None
+            bitboard = BitBoard.from_array(leaf_board, search.win_streak)
+            if bitboard.is_win(player, move // search.board_size, move % search.board_size):
+                winner = player
+            elif len(path) == len(search.empties):
+                winner = 0
+            untried = [] if winner is not None else CandidateTracker(search.board_size).load(leaf_board).moves()
+            search.rng.shuffle(untried)
+            child = _Node(move, node, player, untried, winner)
+            node.children.append(child)
+            node = child
+
+        return node, leaf_board
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.n_workers)
+        return self._pool
+
+    def close(self):
+        """ 關閉行程池 (比賽結束後呼叫) """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __getstate__(self):
+        # 行程池不能被 pickle (例如把 Agent 傳到其他行程時)
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        return state
@@ -1,8 +1,11 @@
 import numpy as np
 import gymnasium as gym
 from gymnasium import spaces
-import pygame  # 引入 pygame 繪圖庫
 import os
+from bitboard import BitBoard
+from transposition import ZobristHasher
+from candidates import CandidateTracker
+from threats import ThreatIndex
 
 class GomokuEnv(gym.Env):
     """
@@ -12,14 +15,29 @@ class GomokuEnv(gym.Env):
     # 設定渲染模式與 FPS
     metadata = {'render_modes': ['human', 'rgb_array'], 'render_fps': 10}
 
-    def __init__(self, board_size=9, win_streak=5, render_mode=None):
+    # backend: "numpy" (預設，逐格檢查連線) 或 "bitboard" (額外維護位元棋盤，用 shift-and-AND 判斷勝負)
+    def __init__(self, board_size=9, win_streak=5, render_mode=None, backend="numpy"):
         self.board_size = board_size
         self.win_streak = win_streak
         self.render_mode = render_mode
+        self.backend = backend
         
         # 0: 空位, 1: 黑棋 (Player 1), 2: 白棋 (Player 2)
+        # 不論哪種 backend，self.board 都保持為 NumPy 矩陣，Agent 與畫面使用的介面不變
         self.board = np.zeros((board_size, board_size), dtype=int)
+        self.bitboard = BitBoard(board_size, win_streak) if backend == "bitboard" else None
         self.current_player = 1 
+
+        # Zobrist 雜湊：每次 step 增量更新，搜尋型 Agent 可用來查置換表
+        self.zobrist = ZobristHasher(board_size)
+        self.hash = 0
+
+        # 落子紀錄 (供 undo 使用) 與候選步集合：距離任一棋子 1 格 / 2 格以內的空位
+        self.move_history = []
+        self.candidate_trackers = {radius: CandidateTracker(board_size, radius) for radius in (1, 2)}
+
+        # 威脅索引：雙方「下了就贏」與「下了成四」的空位，隨 step / undo 增量更新
+        self.threats = ThreatIndex(board_size, win_streak)
         
         # 動作空間與觀察空間
         self.action_space = spaces.Discrete(board_size * board_size)
@@ -31,10 +49,23 @@ class GomokuEnv(gym.Env):
         self.clock = None
         self.tile_img = None # <-- 修正：用來暫存單個地板圖片
 
+        # 畫面快取：背景、重複使用的畫布與 rgb_array 畫面，以及上次繪製後變動的格子 (None = 整張重畫)
+        self._background = None
+        self._canvas = None
+        self._frame = None
+        self._dirty_cells = None
+
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
         self.board = np.zeros((self.board_size, self.board_size), dtype=int)
+        if self.bitboard is not None:
+            self.bitboard = BitBoard(self.board_size, self.win_streak)
         self.current_player = 1
+        self.hash = 0
+        self.move_history = []
+        self.candidate_trackers = {radius: CandidateTracker(self.board_size, radius) for radius in (1, 2)}
+        self.threats = ThreatIndex(self.board_size, self.win_streak)
+        self._dirty_cells = None
         
         if self.render_mode == "human":
             self._render_frame()
@@ -50,6 +81,14 @@ class GomokuEnv(gym.Env):
             return self.board, -10, False, False, {"error": "Invalid move"}
 
         self.board[row, col] = self.current_player
+        if self.bitboard is not None:
+            self.bitboard.place(row, col, self.current_player)
+        self.hash = self.zobrist.toggle(self.hash, action, self.current_player)
+        self.move_history.append(action)
+        for tracker in self.candidate_trackers.values():
+            tracker.place(action)
+        self.threats.place(action, self.current_player)
+        self._mark_dirty(row, col)
 
         terminated = False
         reward = 1
@@ -59,7 +98,7 @@ class GomokuEnv(gym.Env):
             reward = 100
             terminated = True
             info["winner"] = self.current_player
-        elif np.all(self.board != 0):
+        elif self._is_full():
             reward = 0
             terminated = True
             info["winner"] = 0 # 和局
@@ -71,8 +110,45 @@ class GomokuEnv(gym.Env):
 
         return self.board, reward, terminated, False, info
 
+    def undo(self):
+        """ 收回上一步 (step 的逆操作)，回傳被收回的 action；沒有可收回的步時回傳 None """
+        if not self.move_history:
+            return None
+
+        action = self.move_history.pop()
+        row, col = action // self.board_size, action % self.board_size
+        player = self.board[row, col]
+
+        self.board[row, col] = 0
+        if self.bitboard is not None:
+            self.bitboard.remove(row, col)
+        self.hash = self.zobrist.toggle(self.hash, action, player)
+        for tracker in self.candidate_trackers.values():
+            tracker.remove(action)
+        self.threats.remove(action)
+        self._mark_dirty(row, col)
+        self.current_player = player
+
+        if self.render_mode == "human":
+            self._render_frame()
+
+        return action
+
+    def _mark_dirty(self, row, col):
+        """ 記錄需要重畫的格子 (整張重畫待處理時不需要記) """
+        if self._dirty_cells is not None:
+            self._dirty_cells.append((row, col))
+
+    def _is_full(self):
+        if self.bitboard is not None:
+            return self.bitboard.is_full()
+        return np.all(self.board != 0)
+
     def check_win(self, row, col):
         player = self.board[row, col]
+        if self.bitboard is not None:
+            return self.bitboard.is_win(player, row, col)
+
         directions = [(0, 1), (1, 0), (1, 1), (1, -1)] 
 
         for dr, dc in directions:
@@ -92,10 +168,20 @@ class GomokuEnv(gym.Env):
         return False
 
     def render(self):
-        if self.render_mode == "human":
+        if self.render_mode in ("human", "rgb_array"):
             return self._render_frame()
 
     def _render_frame(self):
+        """
+        畫面快取策略：
+        - 地板平鋪背景只在第一次畫好一張 (self._background)，之後直接複製
+        - 畫布 (self._canvas) 重複使用；reset 後整張重畫，之後每次只重畫上一步 / undo 改到的格子
+        - rgb_array 模式回傳重複使用的 NumPy 畫面 (self._frame)，只更新變動的區塊
+          (需要保留多張畫面時請自行 .copy())
+        """
+        # 只有真的需要畫面時才載入 pygame，無畫面的批次對戰 / 測試不需付出 import 與視窗初始化的成本
+        import pygame
+
         # 初始化視窗 (只執行一次)
         if self.window is None and self.render_mode == "human":
             pygame.init()
@@ -106,8 +192,49 @@ class GomokuEnv(gym.Env):
         if self.clock is None and self.render_mode == "human":
             self.clock = pygame.time.Clock()
 
-        canvas = pygame.Surface((self.window_size, self.window_size))
-        
+        if self._canvas is None:
+            self._canvas = pygame.Surface((self.window_size, self.window_size))
+            self._background = self._make_background(pygame)
+            self._dirty_cells = None
+
+        canvas = self._canvas
+        if self._dirty_cells is None:
+            # 整張重畫：背景 + 所有棋子
+            canvas.blit(self._background, (0, 0))
+            for r, c in zip(*np.nonzero(self.board)):
+                self._draw_stone(pygame, canvas, r, c)
+            dirty_rects = [pygame.Rect(0, 0, self.window_size, self.window_size)]
+        else:
+            # 只重畫變動的格子：先用背景蓋掉該格，再畫上目前的棋子
+            dirty_rects = []
+            for r, c in self._dirty_cells:
+                rect = self._cell_rect(pygame, r, c)
+                canvas.blit(self._background, rect.topleft, area=rect)
+                if self.board[r, c] != 0:
+                    self._draw_stone(pygame, canvas, r, c)
+                dirty_rects.append(rect)
+        self._dirty_cells = []
+
+        if self.render_mode == "human":
+            # 更新視窗內容 (只送出變動的區塊)
+            for rect in dirty_rects:
+                self.window.blit(canvas, rect.topleft, area=rect)
+            pygame.event.pump() 
+            pygame.display.update(dirty_rects)
+            self.clock.tick(self.metadata["render_fps"])
+        elif self.render_mode == "rgb_array":
+            if self._frame is None:
+                self._frame = np.zeros((self.window_size, self.window_size, 3), dtype=np.uint8)
+            pixels = pygame.surfarray.pixels3d(canvas)  # (寬, 高, 3) 的唯讀視圖，不複製
+            for rect in dirty_rects:
+                self._frame[rect.top:rect.bottom, rect.left:rect.right] = \
+                    pixels[rect.left:rect.right, rect.top:rect.bottom].transpose(1, 0, 2)
+            del pixels  # 釋放 surface 的鎖
+            return self._frame
+
+    def _make_background(self, pygame):
+        """ 預先畫好平鋪地板的背景 (只執行一次) """
+        background = pygame.Surface((self.window_size, self.window_size))
         pix_square_size = self.window_size / self.board_size # 計算單一格子像素大小
 
         # --- 圖片載入與縮放邏輯 (只執行一次) ---
@@ -141,46 +268,62 @@ class GomokuEnv(gym.Env):
                     # 計算平鋪位置
                     pos_x = c * pix_square_size
                     pos_y = r * pix_square_size
-                    canvas.blit(self.tile_img, (pos_x, pos_y))
+                    background.blit(self.tile_img, (pos_x, pos_y))
         else:
             # 預設背景色
-            canvas.fill((221, 187, 136)) 
+            background.fill((221, 187, 136)) 
 
-        # 1. 畫格線 (如果需要，目前看起來圖片 floor.png 裡已經有格線了，建議移除)
-        # 由於您的 floor.png 圖片看起來已經有邊框，Pygame 的線條可能會重複
-        # 如果要完美無縫，通常不畫線，讓圖片自己連起來
-        # 暫時保留原有的畫線邏輯，如果產生問題請再移除。
-        # 由於 floor.png 是一塊帶有邊緣的圖，這裡不應該再畫線。
-        
-        # 2. 畫棋子
-        for r in range(self.board_size):
-            for c in range(self.board_size):
-                if self.board[r, c] == 0:
-                    continue
-                
-                # 計算中心點位置
-                center_x = (c + 0.5) * pix_square_size
-                center_y = (r + 0.5) * pix_square_size
-                radius = pix_square_size / 2.5
-
-                if self.board[r, c] == 1: # 黑棋
-                    pygame.draw.circle(canvas, (0, 0, 0), (center_x, center_y), radius)
-                elif self.board[r, c] == 2: # 白棋
-                    pygame.draw.circle(canvas, (255, 255, 255), (center_x, center_y), radius)
-                    # 白棋加個黑框比較好看
-                    pygame.draw.circle(canvas, (0, 0, 0), (center_x, center_y), radius, width=2)
+        # 由於 floor.png 是一塊帶有邊緣的圖，這裡不再畫格線。
+        return background
 
-        if self.render_mode == "human":
-            # 更新視窗內容
-            self.window.blit(canvas, canvas.get_rect())
-            pygame.event.pump() 
-            pygame.display.update()
-            self.clock.tick(self.metadata["render_fps"])
+    def _cell_rect(self, pygame, r, c):
+        """ 第 (r, c) 格在畫布上的像素範圍 (往外取整，確保蓋住整顆棋子) """
+        pix_square_size = self.window_size / self.board_size
+        left = int(np.floor(c * pix_square_size))
+        top = int(np.floor(r * pix_square_size))
+        right = min(self.window_size, int(np.ceil((c + 1) * pix_square_size)))
+        bottom = min(self.window_size, int(np.ceil((r + 1) * pix_square_size)))
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def _draw_stone(self, pygame, canvas, r, c):
+        pix_square_size = self.window_size / self.board_size
+
+        # 計算中心點位置
+        center_x = (c + 0.5) * pix_square_size
+        center_y = (r + 0.5) * pix_square_size
+        radius = pix_square_size / 2.5
+
+        if self.board[r, c] == 1: # 黑棋
+            pygame.draw.circle(canvas, (0, 0, 0), (center_x, center_y), radius)
+        elif self.board[r, c] == 2: # 白棋
+            pygame.draw.circle(canvas, (255, 255, 255), (center_x, center_y), radius)
+            # 白棋加個黑框比較好看
+            pygame.draw.circle(canvas, (0, 0, 0), (center_x, center_y), radius, width=2)
 
     def get_valid_moves(self):
         return np.where(self.board.flatten() == 0)[0]
 
+    def get_candidate_moves(self, radius=2):
+        """
+        只回傳距離任一棋子 radius (1 或 2) 格以內的空位，格式與 get_valid_moves 相同。
+        集合在 step / undo 時增量更新；空棋盤時回傳天元。
+        """
+        moves = self.candidate_trackers[radius].moves()
+        if not moves:
+            return self.get_valid_moves()  # 附近都下滿了，退回所有空位
+        return np.array(moves, dtype=int)
+
+    def get_threat_moves(self, player, kind="win"):
+        """
+        查詢威脅索引 (不需模擬落子)：
+        kind="win"  -> player 下了就獲勝的空位 (對手視角即為必擋點)
+        kind="four" -> player 下了就形成「四」的空位
+        """
+        cells = self.threats.winning_moves(player) if kind == "win" else self.threats.four_moves(player)
+        return np.array(sorted(cells), dtype=int)
+
     def close(self):
         if self.window is not None:
+            import pygame
             pygame.display.quit()
             pygame.quit()
\ No newline at end of file
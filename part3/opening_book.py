@@ -0,0 +1,187 @@
+# opening_book.py - 開局庫：離線從自我對弈建表，對局時以 memory-map 唯讀查詢
+#
+# 建表 (先 cd 到 part3 資料夾)：
+#   python opening_book.py --agent smart --games 2000 --plies 8 --output opening_book.bin
+# 或從現有的對局紀錄檔建表 (例如 tournament.py --record 產生的檔案)：
+#   python opening_book.py --records games.gmr --output opening_book.bin
+# 對局時查表 (每個 Agent 都包成 OpeningBookAgent)：
+#   python tournament.py --agents smart alphabeta --book opening_book.bin
+#   python main.py --black smart --white alphabeta --book opening_book.bin
+
+import argparse
+import struct
+from collections import defaultdict
+
+import numpy as np
+
+from agents import BaseAgent
+from transposition import ZobristHasher
+
+# 檔案格式：固定長度檔頭 + 依雜湊值排序的紀錄陣列 (可直接 np.memmap)
+BOOK_MAGIC = b"GMKBOOK1"
+BOOK_HEADER = struct.Struct("<8sHHHxxQ")  # magic, board_size, win_streak, max_plies, (padding), n_entries
+BOOK_DTYPE = np.dtype([
+    ("hash", "<u8"),    # 盤面 Zobrist 雜湊值
+    ("move", "<u2"),    # 建議的下一步 (攤平索引)
+    ("games", "<u4"),   # 這個盤面下這步的對局數
+    ("wins", "<u4"),    # 其中下這步的一方獲勝的場數
+    ("draws", "<u4"),   # 和局數
+])
+
+
+def build_opening_book(games, path, board_size, win_streak=5, max_plies=8, min_games=2):
+    """
+    從對局紀錄建立開局庫。
+    games: 可迭代的 (moves, winner)，moves 為攤平索引的落子序列，winner 為 1/2/0。
+    每個盤面只保留勝率最高 (和局算半勝) 且至少出現 min_games 次的那一步。
+    """
+    hasher = ZobristHasher(board_size)
+    stats = defaultdict(lambda: [0, 0, 0])  # (hash, move) -> [games, wins, draws]
+
+    for moves, winner in games:
+        h = 0
+        for ply, move in enumerate(moves[:max_plies]):
+            player = 1 if ply % 2 == 0 else 2
+            entry = stats[(h, move)]
+            entry[0] += 1
+            if winner == player:
+                entry[1] += 1
+            elif winner == 0:
+                entry[2] += 1
+            h = hasher.toggle(h, move, player)
+
+    best = {}
+    for (h, move), (n_games, wins, draws) in stats.items():
+        if n_games < min_games:
+            continue
+        key = ((wins + 0.5 * draws) / n_games, n_games)
+        if h not in best or key > best[h][0]:
+            best[h] = (key, move, n_games, wins, draws)
+
+    records = np.zeros(len(best), dtype=BOOK_DTYPE)
+    for index, h in enumerate(sorted(best)):
+        _, move, n_games, wins, draws = best[h]
+        records[index] = (h, move, n_games, wins, draws)
+
+    with open(path, "wb") as f:
+        f.write(BOOK_HEADER.pack(BOOK_MAGIC, board_size, win_streak, max_plies, len(records)))
+        f.write(records.tobytes())
+    return len(records)
+
+
+class OpeningBook:
+    """
+    【開局庫 OpeningBook】
+    以 np.memmap 唯讀開啟開局庫檔案，查詢時在排序好的雜湊欄位上做二分搜尋。
+    多個對戰子行程開同一個檔案時共用作業系統的 page cache，不會各自載入一份。
+    檔案在第一次查詢時才開啟；pickle 時只帶路徑，方便傳給子行程。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._records = None
+        with open(path, "rb") as f:
+            magic, self.board_size, self.win_streak, self.max_plies, self.n_entries = \
+                BOOK_HEADER.unpack(f.read(BOOK_HEADER.size))
+        if magic != BOOK_MAGIC:
+            raise ValueError(f"{path} 不是開局庫檔案")
+        self.hasher = ZobristHasher(self.board_size)
+
+    def _open(self):
+        if self._records is None:
+            if self.n_entries == 0:
+                self._records = np.zeros(0, dtype=BOOK_DTYPE)
+            else:
+                self._records = np.memmap(self.path, dtype=BOOK_DTYPE, mode="r",
+                                          offset=BOOK_HEADER.size, shape=(self.n_entries,))
+        return self._records
+
+    def lookup_hash(self, h):
+        """ 以雜湊值查詢，回傳 (move, games, wins, draws)，查無資料時回傳 None """
+        records = self._open()
+        index = int(np.searchsorted(records["hash"], np.uint64(h)))
+        if index < len(records) and int(records["hash"][index]) == h:
+            record = records[index]
+            return int(record["move"]), int(record["games"]), int(record["wins"]), int(record["draws"])
+        return None
+
+    def lookup(self, board):
+        """ 以 NumPy 棋盤查詢；超過開局庫涵蓋的步數就直接回傳 None """
+        if np.count_nonzero(board) >= self.max_plies:
+            return None
+        return self.lookup_hash(self.hasher.hash_board(board))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_records"] = None  # memmap 不傳給子行程，子行程自己再開一次
+        return state
+
+
+class OpeningBookAgent(BaseAgent):
+    """
+    【開局庫 AI OpeningBookAgent】
+    包裝任一個 Agent：開局階段若開局庫有這個盤面就直接照表下，否則交給原本的 Agent 思考。
+    建構參數與其他 Agent 相同 (name, board_size, win_streak, ...)，可以放進 tournament.make_agent 的 spec，
+    被包裝的 Agent 以 (agent_cls, agent_kwargs) 指定，在子行程內才建立。
+    開局庫的棋盤大小或連線數與這局不同時不查表。
+    """
+
+    def __init__(self, name, board_size, win_streak, book_path, agent_cls, agent_kwargs=None):
+        from tournament import make_agent  # tournament 也 import 這個模組，延後 import 避免循環
+
+        super().__init__(name)
+        self.board_size = board_size
+        self.win_streak = win_streak
+        self.agent = make_agent((name, agent_cls, agent_kwargs or {}), board_size, win_streak)
+        self.book = OpeningBook(book_path)
+        self.candidate_radius = self.agent.candidate_radius
+
+    def choose_action(self, board, valid_moves):
+        if valid_moves.size == 0:
+            return None
+        if self.book.board_size == len(board) and self.book.win_streak == self.win_streak:
+            entry = self.book.lookup(board)
+            if entry is not None and entry[0] in valid_moves:
+                self.stats = {"book_hit": 1}
+                return entry[0]
+        action = self.agent.choose_action(board, valid_moves)
+        self.stats = {"book_hit": 0, **self.agent.search_stats()}
+        return action
+
+    def close(self):
+        if hasattr(self.agent, "close"):
+            self.agent.close()
+
+
+if __name__ == "__main__":
+    from tournament import AGENT_TYPES, run_tournament
+
+    parser = argparse.ArgumentParser(description="Build a Gomoku opening book from self-play")
+    parser.add_argument('--agent', default="smart", choices=sorted(AGENT_TYPES), help='Agent type used for self-play')
+    parser.add_argument('--games', type=int, default=1000, help='Number of self-play games')
+    parser.add_argument('--plies', type=int, default=8, help='Number of opening plies stored in the book')
+    parser.add_argument('--min-games', type=int, default=2, help='Minimum games per stored move')
+    parser.add_argument('--board-size', type=int, default=9, help='Board size')
+    parser.add_argument('--win-streak', type=int, default=5, help='Stones in a row needed to win')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=0, help='Self-play seed')
+    parser.add_argument('--records', default=None, help='Build from this game-record file instead of self-play')
+    parser.add_argument('--output', default="opening_book.bin", help='Output file')
+    args = parser.parse_args()
+
+    if args.records:
+        from game_record import GameRecordReader
+
+        # 紀錄檔可能很大：只取棋盤大小相符的對局，落子序列只切出開局部分
+        reader = GameRecordReader(args.records)
+        games = [(record.moves[:args.plies].tolist(), record.winner) for record in reader
+                 if record.board_size == args.board_size and record.win_streak == args.win_streak]
+    else:
+        agent_cls, kwargs = AGENT_TYPES[args.agent]
+        specs = [(f"{args.agent}#0", agent_cls, kwargs), (f"{args.agent}#1", agent_cls, kwargs)]
+        report = run_tournament(specs, args.games, args.board_size, args.win_streak, args.workers, args.seed,
+                                collect_games=True)
+        games = [(moves, winner) for _, _, winner, moves in report["game_records"]]
+
+    n_entries = build_opening_book(games, args.output, args.board_size, args.win_streak, args.plies, args.min_games)
+    print(f"共 {len(games)} 場對局，開局庫共 {n_entries} 個盤面，已寫入 {args.output}")
@@ -0,0 +1,179 @@
+# replay_buffer.py - 自我對弈用的環狀經驗回放緩衝區 (可選擇八種棋盤對稱擴增)
+#
+# 範例 (先 cd 到 part3 資料夾)：
+#   python replay_buffer.py --games 50 --capacity 20000 --batch-size 256
+#   python replay_buffer.py --records games.gmr --capacity 1000000
+
+import argparse
+
+import numpy as np
+
+# 快取：每個 board_size 的八種對稱只需要算一次
+_SYMMETRY_CACHE = {}
+
+
+def symmetry_tables(board_size):
+    """
+    回傳 (sources, targets)，形狀皆為 (8, board_size * board_size)：
+      對稱 s 之後的棋盤 (攤平) = board[sources[s]]
+      原本下在 move 的棋，在對稱 s 之後位於 targets[s][move]
+    s = 0..3 為旋轉 0/90/180/270 度，4..7 為先左右翻轉再旋轉。
+    """
+    if board_size not in _SYMMETRY_CACHE:
+        index = np.arange(board_size * board_size).reshape(board_size, board_size)
+        sources = []
+        for flip in (False, True):
+            base = np.fliplr(index) if flip else index
+            for k in range(4):
+                sources.append(np.rot90(base, k).ravel())
+        sources = np.array(sources, dtype=np.intp)
+        targets = np.argsort(sources, axis=1)  # sources 是排列，反函數即為 targets
+        _SYMMETRY_CACHE[board_size] = (sources, targets)
+    return _SYMMETRY_CACHE[board_size]
+
+
+class ReplayBuffer:
+    """
+    【經驗回放緩衝區 ReplayBuffer】
+    以預先配置的 NumPy 陣列存 (棋盤, 輪到的玩家, 下的位置, 結果) 樣本，寫滿後從最舊的開始覆蓋，
+    記憶體用量固定為 capacity 筆，不會因為對局越來越多而成長，也不為每筆樣本建立 Python 物件。
+      boards[i]   ：落子前的盤面 (0/1/2，int8)
+      players[i]  ：輪到的玩家 (1 或 2)
+      moves[i]    ：實際下的位置 (攤平索引)
+      outcomes[i] ：以輪到的玩家角度看的最終結果 (1 勝、0 和、-1 負)
+
+    對稱擴增不額外佔空間：只存原始樣本，抽樣時才套用八種旋轉 / 翻轉。
+    提供 write_game，可以直接當作 GomokuArena.play_match 的 recorder，邊對戰邊填入。
+    """
+
+    def __init__(self, capacity, board_size=9, seed=None):
+        self.capacity = capacity
+        self.board_size = board_size
+        self.boards = np.zeros((capacity, board_size, board_size), dtype=np.int8)
+        self.players = np.zeros(capacity, dtype=np.int8)
+        self.moves = np.zeros(capacity, dtype=np.int16)
+        self.outcomes = np.zeros(capacity, dtype=np.int8)
+        self.size = 0      # 目前有效的樣本數
+        self.position = 0  # 下一筆要寫入的位置
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        return self.boards.nbytes + self.players.nbytes + self.moves.nbytes + self.outcomes.nbytes
+
+    def add_batch(self, boards, players, moves, outcomes):
+        """ 一次寫入多筆樣本 (超過容量時只保留最後 capacity 筆) """
+        boards = np.asarray(boards).reshape(-1, self.board_size, self.board_size)
+        count = len(boards)
+        if count == 0:
+            return
+        if count > self.capacity:
+            boards, players, moves, outcomes = (np.asarray(a)[-self.capacity:] for a in (boards, players, moves, outcomes))
+            count = self.capacity
+
+        index = (self.position + np.arange(count)) % self.capacity
+        self.boards[index] = boards
+        self.players[index] = players
+        self.moves[index] = moves
+        self.outcomes[index] = outcomes
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+
+    def add(self, board, player, move, outcome):
+        self.add_batch(np.asarray(board)[None], [player], [move], [outcome])
+
+    def write_game(self, moves, winner, black="", white="", seed=None):
+        """
+        把一整局拆成每一步的樣本 (與 GameRecordWriter.write_game 相同介面)。
+        所有落子前的盤面用一次向量化運算建出來：第 k 個盤面 = 前 k 步的棋子。
+        """
+        moves = np.asarray(moves, dtype=np.intp)
+        n_moves = len(moves)
+        if n_moves == 0:
+            return
+        players = np.where(np.arange(n_moves) % 2 == 0, 1, 2).astype(np.int8)
+        before = np.arange(n_moves)[:, None] > np.arange(n_moves)[None, :]  # before[k, j]：第 j 步在第 k 個盤面之前
+        boards = np.zeros((n_moves, self.board_size * self.board_size), dtype=np.int8)
+        boards[:, moves] = np.where(before, players[None, :], 0)
+
+        if winner == 0:
+            outcomes = np.zeros(n_moves, dtype=np.int8)
+        else:
+            outcomes = np.where(players == winner, 1, -1).astype(np.int8)
+        self.add_batch(boards, players, moves, outcomes)
+
+    def sample(self, batch_size, augment=None):
+        """
+        隨機抽 batch_size 筆樣本，回傳 (boards, players, moves, outcomes)。
+        augment：
+          None     不擴增
+          "random" 每筆樣本各套用一種隨機對稱 (筆數不變)
+          "all"    每筆樣本展開成八種對稱 (回傳 8 * batch_size 筆)
+        """
+        if self.size == 0:
+            raise ValueError("回放緩衝區是空的")
+        index = self.rng.integers(0, self.size, batch_size)
+        boards = self.boards[index].reshape(batch_size, -1)
+        players = self.players[index]
+        moves = self.moves[index].astype(np.intp)
+        outcomes = self.outcomes[index]
+
+        if augment is None:
+            return boards.reshape(-1, self.board_size, self.board_size), players, moves, outcomes
+
+        sources, targets = symmetry_tables(self.board_size)
+        if augment == "random":
+            symmetry = self.rng.integers(0, 8, batch_size)
+        elif augment == "all":
+            symmetry = np.tile(np.arange(8), batch_size)
+            boards, players, moves, outcomes = (np.repeat(a, 8, axis=0) for a in (boards, players, moves, outcomes))
+        else:
+            raise ValueError(f"不支援的 augment: {augment}")
+
+        boards = np.take_along_axis(boards, sources[symmetry], axis=1)
+        moves = targets[symmetry, moves]
+        return boards.reshape(-1, self.board_size, self.board_size), players, moves, outcomes
+
+    def clear(self):
+        self.size = 0
+        self.position = 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill a Gomoku replay buffer and sample minibatches")
+    parser.add_argument('--games', type=int, default=20, help='Arena games (smart vs greedy) used to fill the buffer')
+    parser.add_argument('--records', default=None, help='Fill from this game-record file instead of playing games')
+    parser.add_argument('--capacity', type=int, default=100000, help='Buffer capacity (samples)')
+    parser.add_argument('--batch-size', type=int, default=256, help='Minibatch size')
+    parser.add_argument('--board-size', type=int, default=9, help='Board size')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+
+    buffer = ReplayBuffer(args.capacity, args.board_size, seed=args.seed)
+
+    if args.records:
+        from game_record import GameRecordReader
+
+        n_games = 0
+        for record in GameRecordReader(args.records):
+            if record.board_size == args.board_size:
+                buffer.write_game(record.moves, record.winner)
+                n_games += 1
+    else:
+        from agents import GreedyAgent, SmartAgent
+        from arena import GomokuArena
+
+        arena = GomokuArena(SmartAgent("Smart", args.board_size, 5), GreedyAgent("Greedy", args.board_size, 5),
+                            board_size=args.board_size, render=False)
+        for game in range(args.games):
+            arena.play_match(verbose=False, seed=args.seed + game, recorder=buffer)
+        n_games = args.games
+
+    print(f"{n_games} 場對局 -> {len(buffer)} 筆樣本 (容量 {buffer.capacity}，佔用 {buffer.nbytes / 2 ** 20:.1f} MiB)")
+    for augment in (None, "random", "all"):
+        boards, players, moves, outcomes = buffer.sample(args.batch_size, augment=augment)
+        print(f"augment={augment}: boards {boards.shape}, 勝/和/負 = "
+              f"{np.sum(outcomes == 1)}/{np.sum(outcomes == 0)}/{np.sum(outcomes == -1)}")
@@ -0,0 +1,112 @@
+# scaling.py - 棋盤大小擴充測試：各 Agent 在 9x9 / 15x15 / 19x19 的每步思考時間，並畫成圖表
+#
+# 用法 (先 cd 到 part3 資料夾)：
+#   python scaling.py --sizes 9 15 19 --games 4 --time-budget 0.5
+
+import argparse
+import json
+
+import matplotlib
+matplotlib.use("Agg")  # 只輸出圖檔，不開視窗
+import matplotlib.pyplot as plt
+
+from agents import SmartAgent
+from arena import GomokuArena
+from instrumentation import MatchInstrumentation
+from tournament import AGENT_TYPES, budget_kwargs, make_agent
+
+# 除了 AGENT_TYPES 之外，也量原本整盤掃描的 SmartAgent，對照增量評估的差距
+EXTRA_AGENTS = {
+    "smart-naive": (SmartAgent, {"evaluator": "naive"}),
+}
+
+
+def agent_spec(agent_type, time_budget):
+    if agent_type in EXTRA_AGENTS:
+        agent_cls, kwargs = EXTRA_AGENTS[agent_type]
+        kwargs = dict(kwargs, time_budget=time_budget) if time_budget is not None else dict(kwargs)
+    else:
+        agent_cls = AGENT_TYPES[agent_type][0]
+        kwargs = budget_kwargs(agent_type, time_budget)
+    return agent_type, agent_cls, kwargs
+
+
+def measure(agent_types, sizes, games=4, win_streak=5, time_budget=None, opponent="smart"):
+    """
+    每個棋盤大小、每種 Agent 與 opponent 對戰 games 場 (輪流執黑)，依序執行不開平行，避免互相搶 CPU 影響計時。
+    回傳 {board_size: {agent_type: 摘要}}，摘要格式同 MatchInstrumentation.summary()。
+    """
+    results = {}
+    for board_size in sizes:
+        results[board_size] = {}
+        for agent_type in agent_types:
+            instrumentation = MatchInstrumentation()
+            for game in range(games):
+                agent = make_agent(agent_spec(agent_type, time_budget), board_size, win_streak)
+                rival = make_agent((f"{opponent} (對手)", AGENT_TYPES[opponent][0],
+                                    budget_kwargs(opponent, time_budget)), board_size, win_streak)
+                black, white = (agent, rival) if game % 2 == 0 else (rival, agent)
+                arena = GomokuArena(black, white, board_size=board_size, win_streak=win_streak, render=False)
+                arena.play_match(verbose=False, seed=game, instrumentation=instrumentation)
+                for player in (agent, rival):
+                    if hasattr(player, "close"):
+                        player.close()
+            results[board_size][agent_type] = instrumentation.summary()[agent_type]
+            entry = results[board_size][agent_type]
+            print(f"{board_size:>2}x{board_size:<2} {agent_type:<12} {entry['moves']:>5} 步  "
+                  f"p50 {entry['p50_seconds'] * 1000:8.2f} ms  p99 {entry['p99_seconds'] * 1000:8.2f} ms  "
+                  f"最大 {entry['max_seconds'] * 1000:8.2f} ms")
+    return results
+
+
+def plot(results, path, time_budget=None):
+    """ x 軸棋盤大小、y 軸每步思考時間 (對數)：實線 p50，虛線最大值 """
+    sizes = sorted(results)
+    agent_types = list(results[sizes[0]])
+    plt.figure(figsize=(8, 5))
+    for index, agent_type in enumerate(agent_types):
+        color = f"C{index}"
+        p50 = [results[size][agent_type]["p50_seconds"] * 1000 for size in sizes]
+        worst = [results[size][agent_type]["max_seconds"] * 1000 for size in sizes]
+        plt.plot(sizes, p50, "o-", color=color, label=f"{agent_type} p50")
+        plt.plot(sizes, worst, "x--", color=color, alpha=0.6, label=f"{agent_type} max")
+    if time_budget is not None:
+        plt.axhline(time_budget * 1000, color="red", linestyle=":", label="budget")
+    plt.xticks(sizes, [f"{size}x{size}" for size in sizes])
+    plt.yscale("log")
+    plt.xlabel("Board size")
+    plt.ylabel("Per-move latency (ms)")
+    plt.title("Gomoku agent latency vs board size")
+    plt.legend(fontsize=8, ncol=2)
+    plt.grid(True, which="both", alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-move latency of each agent versus board size")
+    parser.add_argument('--agents', nargs='+', default=["greedy", "smart", "smart-naive", "alphabeta", "mcts"],
+                        choices=sorted(AGENT_TYPES) + sorted(EXTRA_AGENTS), help='Agent types to measure')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[9, 15, 19], help='Board sizes')
+    parser.add_argument('--games', type=int, default=4, help='Games per agent and board size')
+    parser.add_argument('--win-streak', type=int, default=5, help='Stones in a row needed to win')
+    parser.add_argument('--time-budget', type=float, default=0.5, help='Per-move time budget in seconds (0 = agent defaults)')
+    parser.add_argument('--output', default="scaling", help='Output prefix for the .png chart and .json data')
+    args = parser.parse_args()
+
+    time_budget = args.time_budget or None
+    results = measure(args.agents, args.sizes, args.games, args.win_streak, time_budget)
+    plot(results, f"{args.output}.png", time_budget)
+    with open(f"{args.output}.json", "w", encoding="utf-8") as f:
+        json.dump({"time_budget": time_budget, "results": results}, f, ensure_ascii=False, indent=1)
+
+    if time_budget is not None:
+        over = [(size, agent_type, entry["max_seconds"]) for size, by_agent in results.items()
+                for agent_type, entry in by_agent.items() if entry["max_seconds"] > time_budget]
+        if over:
+            for size, agent_type, seconds in over:
+                print(f"超出預算：{size}x{size} {agent_type} 最慢一步 {seconds * 1000:.1f} ms")
+        else:
+            print(f"所有 Agent 每步都在 {time_budget * 1000:.0f} ms 預算內")
+    print(f"圖表已存到 {args.output}.png")
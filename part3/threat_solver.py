@@ -0,0 +1,172 @@
+import time
+
+import numpy as np
+
+from threats import ThreatIndex
+from transposition import ZobristHasher
+
+
+class _BudgetExceeded(Exception):
+    """ 搜尋節點數用完 """
+
+
+class ThreatSpaceSolver:
+    """
+    【威脅空間解算器 ThreatSpaceSolver】
+    只搜尋「強制」的走法：
+      VCF (Victory by Continuous Fours)：攻方每一步都成四，守方只能擋唯一的致勝點
+      VCT (Victory by Continuous Threats)：攻方每一步成四或成三 (下一步可成活四)，守方要擋或反衝四
+    因為守方的回應只有少數幾種，可以比全寬度搜尋深得多。
+
+    棋型判斷沿用 SmartAgent 的連線視窗 (ThreatIndex)：
+      win_cells  = 視窗內 win_streak-1 顆、無對手 -> _check_win_simulation 會判定勝利的點
+      four_cells = 視窗內 win_streak-2 顆、無對手 -> 下了就成四的點
+
+    max_depth: 攻方最多連續幾步威脅
+    max_nodes: 每次求解最多展開的節點數，超過就放棄 (回傳 None)
+    time_limit: 每次求解的秒數上限 (None 代表只看節點數)
+    """
+
+    def __init__(self, board_size, win_streak=5, max_depth=10, max_nodes=20000, time_limit=None):
+        self.board_size = board_size
+        self.win_streak = win_streak
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.zobrist = ZobristHasher(board_size)
+        self.nodes = 0        # 上一次求解展開的節點數
+        self.total_nodes = 0  # 累計展開的節點數 (統計用)
+
+    def solve_vcf(self, board, attacker, max_depth=None):
+        """
+        找 attacker 的連續衝四勝 (attacker 先下)。回傳雙方交替的落子序列，找不到回傳 None。
+        序列最後一步不是連成五，就是形成活四 / 雙四 (守方無法同時擋下兩個致勝點)。
+        """
+        return self._solve(board, attacker, max_depth or self.max_depth, allow_three=False)
+
+    def solve_vct(self, board, attacker, max_depth=None):
+        """ 找 attacker 的連續威脅勝 (四或三)。VCT 較昂貴，預設深度為 VCF 的一半 """
+        return self._solve(board, attacker, max_depth or max(1, self.max_depth // 2), allow_three=True)
+
+    def _solve(self, board, attacker, max_depth, allow_three):
+        self.threats = ThreatIndex(self.board_size, self.win_streak).load(board)
+        self._hash = self.zobrist.hash_board(board)
+        self._failed = {}  # 雜湊值 -> 已證明在此深度內無解
+        self.nodes = 0
+        self._deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        try:
+            return self._attack(attacker, max_depth, allow_three)
+        except _BudgetExceeded:
+            return None
+        finally:
+            self.total_nodes += self.nodes
+
+    def _place(self, move, player):
+        self.threats.place(move, player)
+        self._hash = self.zobrist.toggle(self._hash, move, player)
+
+    def _remove(self, move, player):
+        self.threats.remove(move)
+        self._hash = self.zobrist.toggle(self._hash, move, player)
+
+    def _attack(self, attacker, depth, allow_three):
+        """ 輪到攻方：回傳必勝序列或 None """
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise _BudgetExceeded()
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise _BudgetExceeded()
+
+        threats = self.threats
+        defender = 3 - attacker
+        if threats.win_cells[attacker]:
+            return [min(threats.win_cells[attacker])]
+        if depth == 0:
+            return None
+        if self._failed.get(self._hash, -1) >= depth:
+            return None
+
+        defender_wins = threats.win_cells[defender]
+        if len(defender_wins) > 1:
+            return None  # 守方有兩個致勝點，擋不完
+        if defender_wins:
+            moves = list(defender_wins)  # 必須先擋，且擋的這步本身也要是威脅
+        else:
+            moves = sorted(threats.four_cells[attacker])
+            if allow_three:
+                moves += [move for move in self._three_candidates(attacker) if move not in threats.four_cells[attacker]]
+
+        for move in moves:
+            self._place(move, attacker)
+            line = self._after_threat(move, attacker, depth, allow_three)
+            self._remove(move, attacker)
+            if line is not None:
+                return line
+
+        self._failed[self._hash] = depth
+        return None
+
+    def _after_threat(self, move, attacker, depth, allow_three):
+        """ 攻方剛下完 move：判斷是否為有效威脅，並檢查守方所有回應是否都輸 """
+        threats = self.threats
+        defender = 3 - attacker
+        attacker_wins = threats.win_cells[attacker]
+
+        if len(attacker_wins) >= 2:
+            return [move]  # 活四 / 雙四：守方只能擋一個
+        if attacker_wins:
+            defences = list(attacker_wins)  # 衝四：只能擋這一格
+        elif allow_three and threats.open_four_moves(attacker):
+            # 成三：守方可以擋在任何相關視窗的空位上，或反衝四逼攻方回應
+            defences = sorted(set(threats.four_cells[attacker]) | set(threats.four_cells[defender]))
+        else:
+            return None  # 不是威脅，守方可以自由下
+
+        line = None
+        for defence in defences:
+            self._place(defence, defender)
+            if len(threats.win_cells[defender]) >= 2:
+                sub = None  # 守方擋的同時形成活四，攻方不成立
+            else:
+                sub = self._attack(attacker, depth - 1, allow_three)
+            self._remove(defence, defender)
+            if sub is None:
+                return None
+            if line is None:
+                line = [move, defence] + sub
+        return line
+
+    def _three_candidates(self, attacker):
+        """ 可能成三的空位：視窗內已有 win_streak-3 顆攻方棋子且沒有守方棋子 """
+        threats = self.threats
+        mine = threats.counts[attacker]
+        other = threats.counts[3 - attacker]
+        target = self.win_streak - 3
+        cells = threats.cells
+        candidates = set()
+        for w, window in enumerate(threats.windows):
+            if mine[w] == target and other[w] == 0 and target > 0:
+                candidates.update(cell for cell in window if cells[cell] == 0)
+        return sorted(candidates)
+
+
+def find_forced_move(solver, board, my_id, valid_moves=None, use_vct=True):
+    """
+    給 Agent 在一般搜尋前呼叫：
+      1. 自己有 VCF (或 VCT) -> 回傳第一步 (強制取勝)
+      2. 對手有 VCF -> 回傳對手序列的第一步 (先佔住關鍵點防守)
+    都沒有 (或該步不在 valid_moves 中) 時回傳 None。
+    """
+    board = np.asarray(board)
+    valid_set = None if valid_moves is None else set(np.asarray(valid_moves).tolist())
+
+    lines = [lambda: solver.solve_vcf(board, my_id)]
+    if use_vct:
+        lines.append(lambda: solver.solve_vct(board, my_id))
+    lines.append(lambda: solver.solve_vcf(board, 3 - my_id))
+
+    for solve in lines:
+        line = solve()
+        if line and (valid_set is None or line[0] in valid_set):
+            return line[0]
+    return None
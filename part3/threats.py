@@ -0,0 +1,92 @@
+from evaluator import IncrementalEvaluator
+
+
+class ThreatIndex(IncrementalEvaluator):
+    """
+    【威脅索引 ThreatIndex】
+    在 IncrementalEvaluator 的視窗計數上，額外維護每位玩家的：
+      win_cells[p]  ：下了就連成 win_streak 的空位 (視窗內有 win_streak-1 顆己方棋子、沒有對手)
+      four_cells[p] ：下了就形成「四」的空位 (視窗內有 win_streak-2 顆己方棋子、沒有對手)
+    落子/提子時只更新通過該格的視窗，因此「一步必勝 / 一步必擋」只需要查集合，不必逐格模擬。
+
+    window_values 可省略 (只需要威脅資訊、不需要棋型分數時，例如環境本身)。
+    """
+
+    def __init__(self, board_size, win_streak, window_values=None):
+        if window_values is None:
+            window_values = [0] * (win_streak + 1)
+        super().__init__(board_size, win_streak, window_values)
+        # {cell: 有幾個視窗讓這格成為威脅}，index 0 不使用
+        self.win_cells = [None, {}, {}]
+        self.four_cells = [None, {}, {}]
+
+    def load(self, board):
+        super().load(board)
+        self.win_cells = [None, {}, {}]
+        self.four_cells = [None, {}, {}]
+        for w in range(len(self.windows)):
+            self._update_window(w, 1)
+        return self
+
+    def place(self, move, player_id):
+        windows = self.cell_windows[move]
+        for w in windows:
+            self._update_window(w, -1)
+        super().place(move, player_id)
+        for w in windows:
+            self._update_window(w, 1)
+
+    def remove(self, move):
+        windows = self.cell_windows[move]
+        for w in windows:
+            self._update_window(w, -1)
+        super().remove(move)
+        for w in windows:
+            self._update_window(w, 1)
+
+    def _update_window(self, w, sign):
+        """ 把視窗 w 目前造成的威脅加入 (sign=1) 或移出 (sign=-1) 索引 """
+        black = self.counts[1][w]
+        white = self.counts[2][w]
+        if black and white:
+            return
+        if black:
+            player_id, mine = 1, black
+        elif white:
+            player_id, mine = 2, white
+        else:
+            return
+
+        if mine == self.win_streak - 1:
+            index = self.win_cells[player_id]
+        elif mine == self.win_streak - 2:
+            index = self.four_cells[player_id]
+        else:
+            return
+
+        cells = self.cells
+        for cell in self.windows[w]:
+            if cells[cell] == 0:
+                count = index.get(cell, 0) + sign
+                if count:
+                    index[cell] = count
+                else:
+                    del index[cell]
+
+    def winning_moves(self, player_id):
+        """ player_id 下了就獲勝的空位 """
+        return self.win_cells[player_id].keys()
+
+    def four_moves(self, player_id):
+        """ player_id 下了就形成「四」(再一步即可獲勝) 的空位 """
+        return self.four_cells[player_id].keys()
+
+    def open_four_moves(self, player_id):
+        """ 下了之後會出現兩個以上不同致勝點 (活四或雙四) 的空位，對手無法一步擋下 """
+        result = []
+        for move in list(self.four_cells[player_id]):
+            self.place(move, player_id)
+            if len(self.win_cells[player_id]) >= 2:
+                result.append(move)
+            self.remove(move)
+        return result
@@ -0,0 +1,256 @@
+# tournament.py - 無畫面的大量對戰 (循環賽) 執行器
+#
+# 用法 (先 cd 到 part3 資料夾)：
+#   python tournament.py --agents random greedy smart --games 200 --workers 8
+#   python tournament.py --agents smart alphabeta --eval-cache 200000       # 每個子行程共用一個評估快取
+#   python tournament.py --agents smart alphabeta --book opening_book.bin   # 開局先查開局庫 (opening_book.py 建表)
+
+import argparse
+import itertools
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from agents import RandomAgent, GreedyAgent, SmartAgent, AlphaBetaAgent
+from arena import GomokuArena
+from eval_cache import shared_cache
+from game_record import GameRecordWriter
+from instrumentation import MatchInstrumentation
+from mcts import MCTSAgent
+from opening_book import OpeningBookAgent
+
+# CLI 可用的 Agent 種類與預設參數 (搜尋型 Agent 在對戰中給較短的思考時間，MCTS 不再開巢狀行程池)
+AGENT_TYPES = {
+    "random": (RandomAgent, {}),
+    "greedy": (GreedyAgent, {}),
+    "smart": (SmartAgent, {}),
+    "alphabeta": (AlphaBetaAgent, {"time_limit": 0.2}),
+    "mcts": (MCTSAgent, {"n_simulations": 300, "n_workers": 1}),
+}
+
+
+def budget_kwargs(agent_type, time_budget):
+    """
+    AGENT_TYPES 的參數，再依每步時間預算 (秒) 調整：搜尋型 Agent 改成「時間到就停」，
+    不再固定搜尋次數，棋盤越大就自動搜得越淺 / 模擬次數越少。time_budget=None 時維持預設。
+    """
+    kwargs = dict(AGENT_TYPES[agent_type][1])
+    if time_budget is None:
+        return kwargs
+    if agent_type == "smart":
+        kwargs["time_budget"] = time_budget
+    elif agent_type == "alphabeta":
+        kwargs["time_limit"] = time_budget * 0.95  # 時間到之後還要從遞迴跳回根節點，留一點餘裕
+    elif agent_type == "mcts":
+        kwargs.update(n_simulations=None, time_limit=time_budget)
+    return kwargs
+
+
+# 會查評估快取的 Agent 種類 (MCTS 用隨機模擬，不做盤面評估)
+CACHED_AGENTS = ("smart", "alphabeta")
+
+
+def cache_kwargs(agent_type, kwargs, eval_cache):
+    """ eval_cache = 快取容量 (筆數)；只記錄容量，make_agent 在各自的行程內才換成共用的 EvaluationCache """
+    if eval_cache and agent_type in CACHED_AGENTS:
+        return dict(kwargs, eval_cache=eval_cache)
+    return kwargs
+
+
+def book_spec(spec, book_path):
+    """ 把 spec 包成「先查開局庫，查不到才交給原本的 Agent」的 OpeningBookAgent (book_path=None 時不變) """
+    if book_path is None:
+        return spec
+    name, agent_cls, kwargs = spec
+    return name, OpeningBookAgent, {"book_path": book_path, "agent_cls": agent_cls, "agent_kwargs": kwargs}
+
+
+def make_agent(spec, board_size, win_streak):
+    """
+    spec = (name, AgentClass, kwargs)。
+    只傳「類別 + 參數」到子行程，在子行程內才建立 Agent，避免 pickle 整個 Agent 物件。
+    kwargs 的 eval_cache 是整數時視為容量，同一個行程內的 Agent 共用一個快取 (跨對局累積)。
+    """
+    name, agent_cls, kwargs = spec
+    if isinstance(kwargs.get("eval_cache"), int):
+        kwargs = dict(kwargs, eval_cache=shared_cache(kwargs["eval_cache"]))
+    if agent_cls is RandomAgent:
+        return agent_cls(name, **kwargs)
+    return agent_cls(name, board_size, win_streak, **kwargs)
+
+
+def _play_game(job):
+    """ 子行程執行的單場比賽 (模組層級函式才能被 pickle)，回傳 (i, j, 勝方, 落子紀錄, 效能紀錄或 None) """
+    i, j, black_spec, white_spec, board_size, win_streak, seed, instrument = job
+
+    # 每場比賽固定種子，結果可重現
+    random.seed(seed)
+    np.random.seed(seed % (2 ** 32))
+
+    black = make_agent(black_spec, board_size, win_streak)
+    white = make_agent(white_spec, board_size, win_streak)
+    arena = GomokuArena(black, white, board_size=board_size, win_streak=win_streak, render=False)
+    instrumentation = MatchInstrumentation() if instrument else None
+    winner = arena.play_match(verbose=False, seed=seed, instrumentation=instrumentation)
+    for agent in (black, white):
+        if hasattr(agent, "close"):
+            agent.close()
+    return i, j, winner, list(arena.env.move_history), instrumentation
+
+
+def schedule_games(specs, games_per_pair, board_size, win_streak, seed=0, instrument=False):
+    """ 每一對 Agent 對戰 games_per_pair 場，輪流執黑 (i = 黑棋 index, j = 白棋 index) """
+    jobs = []
+    rng = random.Random(seed)
+    for a, b in itertools.combinations(range(len(specs)), 2):
+        for game in range(games_per_pair):
+            i, j = (a, b) if game % 2 == 0 else (b, a)
+            jobs.append((i, j, specs[i], specs[j], board_size, win_streak, rng.getrandbits(63), instrument))
+    return jobs
+
+
+def run_tournament(specs, games_per_pair=100, board_size=9, win_streak=5, n_workers=None, seed=0,
+                   collect_games=False, record_path=None, instrument=False):
+    """
+    執行循環賽並回傳結果：
+      results[i][j] = [勝, 和, 負] (以 i 的角度，不分先後手)
+      elo[i]        = Elo 分數
+      games, seconds, games_per_second
+      game_records  = [(黑棋 index, 白棋 index, 勝方, 落子紀錄), ...] (collect_games=True 時)
+      instrumentation = MatchInstrumentation，每步思考時間與搜尋統計 (instrument=True 時)
+    record_path: 給定時，每場對局 (含雙方名稱與 seed) 依完成順序附加寫入這個對局紀錄檔
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    jobs = schedule_games(specs, games_per_pair, board_size, win_streak, seed, instrument)
+
+    n = len(specs)
+    results = [[[0, 0, 0] for _ in range(n)] for _ in range(n)]
+    total_moves = 0
+    game_records = []
+    instrumentation = MatchInstrumentation() if instrument else None
+    writer = None if record_path is None else GameRecordWriter(record_path, board_size, win_streak, flush_every=100)
+
+    start = time.perf_counter()
+    if n_workers <= 1:
+        outcomes = map(_play_game, jobs)
+    else:
+        pool = ProcessPoolExecutor(max_workers=n_workers)
+        outcomes = pool.map(_play_game, jobs, chunksize=max(1, len(jobs) // (n_workers * 8)))
+
+    for job, (i, j, winner, moves, game_stats) in zip(jobs, outcomes):
+        total_moves += len(moves)
+        if collect_games:
+            game_records.append((i, j, winner, moves))
+        if writer is not None:
+            writer.write_game(moves, winner, specs[i][0], specs[j][0], seed=job[6])
+        if instrumentation is not None:
+            instrumentation.merge(game_stats)
+        if winner == 1:
+            results[i][j][0] += 1
+            results[j][i][2] += 1
+        elif winner == 2:
+            results[i][j][2] += 1
+            results[j][i][0] += 1
+        else:
+            results[i][j][1] += 1
+            results[j][i][1] += 1
+    if n_workers > 1:
+        pool.shutdown()
+    if writer is not None:
+        writer.close()
+    seconds = time.perf_counter() - start
+
+    report = {
+        "names": [spec[0] for spec in specs],
+        "results": results,
+        "elo": elo_ratings(results),
+        "games": len(jobs),
+        "moves": total_moves,
+        "seconds": seconds,
+        "games_per_second": len(jobs) / seconds if seconds > 0 else float("inf"),
+    }
+    if collect_games:
+        report["game_records"] = game_records
+    if instrumentation is not None:
+        report["instrumentation"] = instrumentation
+    return report
+
+
+def elo_ratings(results, iterations=200, base=1500):
+    """
+    以 Bradley-Terry 模型 (MM 演算法) 擬合 Elo 分數，和局算半勝。
+    與逐場更新的 Elo 不同，結果不受比賽順序影響；平均分數固定為 base。
+    """
+    n = len(results)
+    wins = np.array([[r[0] + 0.5 * r[1] for r in row] for row in results], dtype=float)
+    games = wins + wins.T
+    strength = np.ones(n)
+
+    for _ in range(iterations):
+        total_wins = wins.sum(axis=1)
+        denominator = (games / (strength[:, None] + strength[None, :])).sum(axis=1)
+        # 全勝或全敗的 Agent 沒有有限的最佳解：每位都加一場對上平均實力 (strength = 1) 的虛擬和局
+        strength = (total_wins + 0.5) / (denominator + 1.0 / (strength + 1.0))
+        strength /= np.exp(np.mean(np.log(strength)))
+
+    return (base + 400 * np.log10(strength)).tolist()
+
+
+def print_report(report):
+    names = report["names"]
+    width = max(len(name) for name in names) + 2
+
+    print("\n=== 對戰結果 (列 vs 欄：勝-和-負) ===")
+    print(" " * width + "".join(f"{name:>{width + 8}}" for name in names))
+    for i, name in enumerate(names):
+        cells = []
+        for j in range(len(names)):
+            cells.append("-" if i == j else "{}-{}-{}".format(*report["results"][i][j]))
+        print(f"{name:<{width}}" + "".join(f"{cell:>{width + 8}}" for cell in cells))
+
+    print("\n=== Elo ===")
+    for name, elo in sorted(zip(names, report["elo"]), key=lambda item: -item[1]):
+        print(f"{name:<{width}} {elo:8.1f}")
+
+    print(f"\n共 {report['games']} 場、{report['moves']} 步，耗時 {report['seconds']:.2f} 秒，"
+          f"{report['games_per_second']:.2f} 場/秒")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gomoku headless tournament")
+    parser.add_argument('--agents', nargs='+', default=["random", "greedy", "smart"], choices=sorted(AGENT_TYPES),
+                        help='Agent types to include (round robin)')
+    parser.add_argument('--games', type=int, default=100, help='Games per pair of agents')
+    parser.add_argument('--board-size', type=int, default=9, help='Board size')
+    parser.add_argument('--win-streak', type=int, default=5, help='Stones in a row needed to win')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=0, help='Tournament seed')
+    parser.add_argument('--time-budget', type=float, default=None, help='Per-move time budget in seconds for search agents')
+    parser.add_argument('--eval-cache', type=int, default=0, metavar='ENTRIES',
+                        help='Share a symmetry-aware evaluation cache of this many entries per worker (smart/alphabeta)')
+    parser.add_argument('--book', default=None, metavar='PATH', help='Let every agent play from this opening book first')
+    parser.add_argument('--record', default=None, help='Append every game to this game-record file')
+    parser.add_argument('--stats-json', default=None, help='Write per-move timing and search statistics as JSON')
+    parser.add_argument('--stats-csv', default=None, help='Write per-move timing and search statistics as CSV')
+    args = parser.parse_args()
+
+    specs = []
+    for index, agent_type in enumerate(args.agents):
+        agent_cls, _ = AGENT_TYPES[agent_type]
+        kwargs = cache_kwargs(agent_type, budget_kwargs(agent_type, args.time_budget), args.eval_cache)
+        name = f"{agent_type}#{index}" if args.agents.count(agent_type) > 1 else agent_type
+        specs.append(book_spec((name, agent_cls, kwargs), args.book))
+
+    report = run_tournament(specs, args.games, args.board_size, args.win_streak, args.workers, args.seed,
+                            record_path=args.record, instrument=bool(args.stats_json or args.stats_csv))
+    print_report(report)
+    if "instrumentation" in report:
+        report["instrumentation"].print_summary()
+        if args.stats_json:
+            report["instrumentation"].to_json(args.stats_json)
+        if args.stats_csv:
+            report["instrumentation"].to_csv(args.stats_csv)
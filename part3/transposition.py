@@ -0,0 +1,99 @@
+import numpy as np
+
+# 快取：同樣的 (board_size, seed) 共用一組隨機鍵值
+_KEY_CACHE = {}
+
+# 置換表中的分數界線種類
+EXACT = 0   # 精確值
+LOWER = 1   # 下界 (發生 beta 剪枝，真實分數 >= score)
+UPPER = 2   # 上界 (沒有任何步超過 alpha，真實分數 <= score)
+
+
+class ZobristHasher:
+    """
+    【Zobrist 雜湊 ZobristHasher】
+    每個 (玩家, 格子) 配一個隨機 64-bit 整數，盤面雜湊值 = 所有棋子對應整數的 XOR。
+    落子與提子都只需要 XOR 一次，因此可以在 step / 搜尋時增量更新。
+    使用固定 seed，讓環境與各個 Agent 對同一個盤面算出相同的雜湊值。
+    """
+
+    def __init__(self, board_size, seed=20251216):
+        self.board_size = board_size
+        if (board_size, seed) not in _KEY_CACHE:
+            rng = np.random.default_rng(seed)
+            keys = rng.integers(1, 2 ** 63 - 1, size=(3, board_size * board_size), dtype=np.int64)
+            keys[0] = 0  # 空位不影響雜湊
+            _KEY_CACHE[(board_size, seed)] = keys.tolist()  # 轉成 Python int，XOR 比 NumPy 純量快
+        self.keys = _KEY_CACHE[(board_size, seed)]
+
+    def hash_board(self, board):
+        """ 從 NumPy 棋盤完整計算雜湊值 """
+        h = 0
+        flat = np.asarray(board).ravel()
+        for move in np.flatnonzero(flat):
+            h ^= self.keys[flat[move]][move]
+        return h
+
+    def toggle(self, h, move, player):
+        """ 落子或提子 (同一個操作) 後的雜湊值 """
+        return h ^ self.keys[player][move]
+
+
+class TranspositionTable:
+    """
+    【置換表 TranspositionTable】
+    固定大小 (2 的次方) 的雜湊表，以 Zobrist 雜湊值索引，
+    每格記錄：完整雜湊值、搜尋深度、界線種類、分數、最佳步。
+
+    替換策略 (depth-preferred + aging)：
+    空格、同一盤面、上一次搜尋留下的舊資料，或新資料搜尋得更深時才覆蓋。
+    """
+
+    def __init__(self, size=1 << 18):
+        # 向上取到 2 的次方，用 & mask 取代 %
+        capacity = 1
+        while capacity < size:
+            capacity <<= 1
+        self.capacity = capacity
+        self.mask = capacity - 1
+
+        self.keys = [None] * capacity
+        self.depths = [0] * capacity
+        self.flags = [EXACT] * capacity
+        self.scores = [0] * capacity
+        self.moves = [None] * capacity
+        self.ages = [0] * capacity
+        self.generation = 0
+
+        self.probes = 0
+        self.hits = 0
+
+    def new_search(self):
+        """ 每次開始新的一步搜尋時呼叫，讓舊資料可以被優先替換 """
+        self.generation += 1
+
+    def probe(self, h):
+        """ 查表：找到回傳 (depth, flag, score, move)，否則回傳 None """
+        self.probes += 1
+        index = h & self.mask
+        if self.keys[index] != h:
+            return None
+        self.hits += 1
+        self.ages[index] = self.generation
+        return self.depths[index], self.flags[index], self.scores[index], self.moves[index]
+
+    def store(self, h, depth, flag, score, move):
+        index = h & self.mask
+        if (self.keys[index] is not None and self.keys[index] != h
+                and self.ages[index] == self.generation and self.depths[index] > depth):
+            return  # 保留同一次搜尋中較深的結果
+
+        self.keys[index] = h
+        self.depths[index] = depth
+        self.flags[index] = flag
+        self.scores[index] = score
+        self.moves[index] = move
+        self.ages[index] = self.generation
+
+    def clear(self):
+        self.__init__(self.capacity)
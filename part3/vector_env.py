@@ -0,0 +1,191 @@
+# vector_env.py - 一次推進 N 個棋盤的向量化五子棋環境 (Gymnasium VectorEnv 介面)，給自我對弈產生資料用
+#
+# 測速 (先 cd 到 part3 資料夾)：
+#   python vector_env.py --num-envs 256 --steps 200
+
+import argparse
+import time
+
+import numpy as np
+import gymnasium as gym
+from gymnasium import spaces
+from gymnasium.vector import AutoresetMode
+from gymnasium.vector.utils import batch_space
+
+
+class VectorGomokuEnv(gym.vector.VectorEnv):
+    """
+    【向量化五子棋環境 VectorGomokuEnv】
+    用一個 (num_envs, board_size, board_size) 的陣列同時保存 N 盤棋，step 一次套用 N 個動作：
+      - 落子、非法步判斷、換手全部用 NumPy 索引一次完成
+      - 勝負判斷：一次取出所有落子點四個方向前後各 win_streak-1 格 (棋盤外圍預先補 0)，
+        再用長度 win_streak 的滑動視窗檢查是否全是同一位玩家
+      - 和局判斷：每盤維護已下的步數，不必每步掃整個棋盤
+    獎勵與單盤的 GomokuEnv 相同：獲勝 100、和局 0、一般落子 1、下在有子的位置 -10 (不換手)。
+
+    結束的棋盤會自動重置 (autoreset_mode)：
+      NEXT_STEP (Gymnasium 預設)：下一次 step 時重置，該盤傳入的動作會被忽略
+      SAME_STEP：同一次 step 就重置，結束時的盤面放在 info["final_obs"] (以 info["_final_obs"] 標記哪幾盤)
+    info["current_player"] 為每盤下一步輪到的玩家 (1 或 2)。
+    """
+
+    metadata = {"render_modes": [], "autoreset_mode": AutoresetMode.NEXT_STEP}
+
+    def __init__(self, num_envs, board_size=9, win_streak=5, autoreset_mode=AutoresetMode.NEXT_STEP, copy=True):
+        self.num_envs = num_envs
+        self.board_size = board_size
+        self.win_streak = win_streak
+        self.autoreset_mode = AutoresetMode(autoreset_mode)
+        self.metadata = {**self.metadata, "autoreset_mode": self.autoreset_mode}
+        self.copy = copy  # False 時 step / reset 直接回傳內部棋盤的視圖 (省一次複製，但下一次 step 會改到它)
+        self.render_mode = None
+
+        self.single_action_space = spaces.Discrete(board_size * board_size)
+        self.single_observation_space = spaces.Box(low=0, high=2, shape=(board_size, board_size), dtype=np.int8)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+
+        # 棋盤四周補 win_streak-1 圈 0，取連線時不必檢查邊界；self.boards 是去掉外圍的視圖
+        pad = win_streak - 1
+        self._pad = pad
+        self._padded = np.zeros((num_envs, board_size + 2 * pad, board_size + 2 * pad), dtype=np.int8)
+        self.boards = self._padded[:, pad:pad + board_size, pad:pad + board_size]
+        self.current_player = np.ones(num_envs, dtype=np.int8)
+        self.move_count = np.zeros(num_envs, dtype=np.int32)
+        self._autoreset_envs = np.zeros(num_envs, dtype=bool)
+        self._lines = self._line_index()
+
+    def _line_index(self):
+        """
+        lines[move, d, k]：以 move 為中心、方向 d 上第 k - (win_streak-1) 格在補邊棋盤 (攤平) 中的索引。
+        """
+        n, pad = self.board_size, self._pad
+        width = n + 2 * pad
+        rows, cols = np.divmod(np.arange(n * n), n)
+        offsets = np.arange(-pad, pad + 1)
+        lines = np.empty((n * n, 4, 2 * pad + 1), dtype=np.intp)
+        for d, (dr, dc) in enumerate([(0, 1), (1, 0), (1, 1), (1, -1)]):
+            r = rows[:, None] + pad + dr * offsets
+            c = cols[:, None] + pad + dc * offsets
+            lines[:, d] = r * width + c
+        return lines
+
+    def _observation(self):
+        return self.boards.copy() if self.copy else self.boards
+
+    def _info(self):
+        return {"current_player": self.current_player.copy()}
+
+    def _reset_boards(self, mask):
+        self._padded[mask] = 0
+        self.current_player[mask] = 1
+        self.move_count[mask] = 0
+
+    def reset(self, seed=None, options=None):
+        """ 重置棋盤；options={"reset_mask": mask} 時只重置 mask 為 True 的棋盤 """
+        super().reset(seed=seed)
+        mask = np.ones(self.num_envs, dtype=bool)
+        if options is not None and "reset_mask" in options:
+            mask = np.asarray(options["reset_mask"], dtype=bool)
+        self._reset_boards(mask)
+        self._autoreset_envs[mask] = False
+        return self._observation(), self._info()
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.intp).reshape(self.num_envs)
+        n = self.board_size
+        rewards = np.zeros(self.num_envs, dtype=np.float64)
+        terminated = np.zeros(self.num_envs, dtype=bool)
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        winners = np.zeros(self.num_envs, dtype=np.int8)
+
+        # NEXT_STEP：上一步已結束的棋盤在這一步重置，不執行動作
+        active = ~self._autoreset_envs
+        if self.autoreset_mode == AutoresetMode.NEXT_STEP and self._autoreset_envs.any():
+            self._reset_boards(self._autoreset_envs)
+
+        rows, cols = np.divmod(actions, n)
+        occupied = self.boards[np.arange(self.num_envs), rows, cols] != 0
+        invalid = active & occupied
+        rewards[invalid] = -10
+
+        # 合法的落子一次下完
+        envs = np.flatnonzero(active & ~occupied)
+        players = self.current_player[envs]
+        self.boards[envs, rows[envs], cols[envs]] = players
+        self.move_count[envs] += 1
+
+        # 勝負：取出落子點四個方向的線段，長度 win_streak 的視窗全是同一位玩家就算獲勝
+        flat = self._padded.reshape(self.num_envs, -1)
+        lines = flat[envs[:, None, None], self._lines[actions[envs]]] == players[:, None, None]
+        windows = np.lib.stride_tricks.sliding_window_view(lines, self.win_streak, axis=2)
+        won = windows.all(axis=3).any(axis=(1, 2))
+        full = self.move_count[envs] >= n * n
+
+        rewards[envs] = np.where(won, 100, np.where(full, 0, 1))
+        finished = envs[won | full]
+        terminated[finished] = True
+        winners[envs[won]] = players[won]
+        self.current_player[envs] = 3 - players
+
+        info = self._info()
+        info["winner"] = winners
+        info["_winner"] = terminated.copy()
+        info["invalid_move"] = invalid
+        info["_invalid_move"] = invalid.copy()
+
+        if self.autoreset_mode == AutoresetMode.SAME_STEP:
+            if terminated.any():
+                info["final_obs"] = self.boards.copy()
+                info["_final_obs"] = terminated.copy()
+                self._reset_boards(terminated)
+                info["current_player"] = self.current_player.copy()
+        elif self.autoreset_mode == AutoresetMode.NEXT_STEP:
+            self._autoreset_envs = terminated.copy()
+
+        return self._observation(), rewards, terminated, truncated, info
+
+    def valid_action_mask(self):
+        """ (num_envs, board_size * board_size) 的布林陣列，True 代表該格是空位 """
+        return self.boards.reshape(self.num_envs, -1) == 0
+
+    def sample_valid_actions(self):
+        """ 每盤各隨機選一個空位 (給隨機自我對弈 / 測速用) """
+        noise = self.np_random.random((self.num_envs, self.board_size * self.board_size))
+        return np.argmax(np.where(self.valid_action_mask(), noise, -1.0), axis=1)
+
+
+if __name__ == "__main__":
+    from oop_project_env import GomokuEnv
+
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized Gomoku environment")
+    parser.add_argument('--num-envs', type=int, default=256, help='Number of boards stepped together')
+    parser.add_argument('--steps', type=int, default=200, help='Vector steps to run')
+    parser.add_argument('--board-size', type=int, default=9, help='Board size')
+    parser.add_argument('--win-streak', type=int, default=5, help='Stones in a row needed to win')
+    args = parser.parse_args()
+
+    # 隨機落子的自我對弈：向量化環境 vs 逐盤呼叫 GomokuEnv
+    vec_env = VectorGomokuEnv(args.num_envs, args.board_size, args.win_streak)
+    vec_env.reset(seed=0)
+    games = 0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        _, _, terminated, _, _ = vec_env.step(vec_env.sample_valid_actions())
+        games += int(terminated.sum())
+    vec_seconds = time.perf_counter() - start
+    vec_steps = args.num_envs * args.steps
+
+    env = GomokuEnv(board_size=args.board_size, win_streak=args.win_streak)
+    env.reset(seed=0)
+    rng = np.random.default_rng(0)
+    single_steps = max(1000, vec_steps // 20)
+    start = time.perf_counter()
+    for _ in range(single_steps):
+        _, _, terminated, _, _ = env.step(int(rng.choice(env.get_valid_moves())))
+        if terminated:
+            env.reset()
+    single_seconds = time.perf_counter() - start
+
+    print(f"VectorGomokuEnv: {vec_steps / vec_seconds:,.0f} 步/秒 ({args.num_envs} 盤，完成 {games} 局)")
+    print(f"GomokuEnv      : {single_steps / single_seconds:,.0f} 步/秒")
@@ -4,7 +4,6 @@ The Warehouse is divided into a rectangular grid. A Target is randomly placed on
 '''
 import random
 from enum import Enum
-import pygame
 import sys
 from os import path
 
@@ -28,16 +27,22 @@ class GridTile(Enum):
 class WarehouseRobot:
 
     # Initialize the grid size. Pass in an integer seed to make randomness (Targets) repeatable.
-    def __init__(self, grid_rows=4, grid_cols=5, fps=1):
+    # render_mode='human' opens a pygame window on the first render(); None only prints to the console.
+    def __init__(self, grid_rows=4, grid_cols=5, fps=1, render_mode='human'):
         self.grid_rows = grid_rows
         self.grid_cols = grid_cols
         self.reset()
 
         self.fps = fps
         self.last_action=''
-        self._init_pygame()
+        self.render_mode = render_mode
+
+        # pygame is imported and the window created lazily, so headless robots never pay for it
+        self.window_surface = None
 
     def _init_pygame(self):
+        import pygame
+
         pygame.init() # initialize pygame
         pygame.display.init() # Initialize the display module
 
@@ -119,6 +124,14 @@ class WarehouseRobot:
             print() # new line
         print() # new line
 
+        if self.render_mode != 'human':
+            return
+
+        import pygame
+
+        if self.window_surface is None:
+            self._init_pygame()
+
         self._process_events()
 
         # clear to white background, otherwise text with varying length will leave behind prior rendered portions
@@ -150,6 +163,8 @@ class WarehouseRobot:
         self.clock.tick(self.fps)  
 
     def _process_events(self):
+        import pygame
+
         # Process user events, key presses
         for event in pygame.event.get():
             # User clicked on X at the top right corner of window